@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生产环境静态资源处理
+压缩CSS和JavaScript、以内容哈希命名写出外部资源文件，
+并为输出文件预先生成gzip（以及安装了brotli时的br）压缩副本，静态服务器可直接发送
+"""
+
+import gzip
+import hashlib
+import os
+import re
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 外部资源文件所在的子目录
+ASSET_DIR = 'assets'
+
+# 预压缩副本的扩展名
+COMPRESSED_SUFFIXES = ('.gz', '.br') if brotli is not None else ('.gz',)
+
+# 字符串字面量和注释按出现顺序匹配，注释标记出现在字符串中时不会被当作注释
+_CSS_TOKEN_RE = re.compile(r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|/\*.*?\*/', re.S)
+# 压缩期间代替字符串字面量的占位符
+_CSS_STRING_RE = re.compile(r'\x00(\d+)\x00')
+_CSS_SPACE_RE = re.compile(r'\s+')
+_CSS_PUNCT_RE = re.compile(r'\s*([{};,>])\s*')
+# 声明中冒号前的空白：其后先遇到";"或"}"（而不是"{"）的冒号属于声明，而不是选择器
+_CSS_DECL_COLON_RE = re.compile(r' :(?=[^{};]*[;}])')
+
+# 标识符字符：两侧都是标识符字符时，中间的空白不能省略
+_IDENT_RE = re.compile(r'[\w$]|[^\x00-\x7f]')
+
+# 出现在这些字符之后的"/"是正则表达式字面量的开头，而不是除号
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'delete', 'new', 'throw')
+
+# 行尾是这些字符时下一行必然是同一语句的延续（或已是语句边界），换行可以省略
+_JOIN_AFTER = set('{([,;:=&|?>')
+# 行首是这些字符时同理
+_JOIN_BEFORE = set('})].?:&|')
+
+
+def minify_css(source):
+    """压缩CSS：去掉注释和多余的空白，字符串字面量（如content和字体名）原样保留"""
+    strings = []
+
+    def hide(match):
+        token = match.group()
+        if token.startswith('/*'):
+            return ''
+        strings.append(token)
+        return f"\x00{len(strings) - 1}\x00"
+
+    text = _CSS_TOKEN_RE.sub(hide, source)
+    text = _CSS_SPACE_RE.sub(' ', text)
+    text = _CSS_PUNCT_RE.sub(r'\1', text)
+    # 选择器中冒号前的空白是后代选择器（如".a :hover"），只去掉声明中的
+    text = _CSS_DECL_COLON_RE.sub(':', text)
+    text = text.replace(': ', ':')
+    text = text.replace(';}', '}').strip()
+    return _CSS_STRING_RE.sub(lambda match: strings[int(match.group(1))], text)
+
+
+def _is_ident(char):
+    return bool(char) and _IDENT_RE.match(char) is not None
+
+
+def _regex_allowed(out):
+    """根据已输出的内容判断接下来的"/"是否开始一个正则表达式"""
+    text = ''.join(out[-12:]).rstrip()
+    if not text:
+        return True
+    if text[-1] in _REGEX_PRECEDERS:
+        return True
+    return any(text.endswith(word) and not _is_ident(text[-len(word) - 1:-len(word)])
+               for word in _REGEX_KEYWORDS)
+
+
+def minify_js(source):
+    """
+    压缩JavaScript：去掉注释、缩进和多余的空白
+
+    只做不改变语义的变换：字符串、模板字符串和正则表达式原样保留；
+    换行只在前后的字符表明语句必然延续时才省略，不依赖自动分号插入的规则。
+    """
+    out = []
+    # 嵌套的模板字符串插值：每个元素为插值表达式内未闭合的"{"数
+    templates = []
+    depth = 0
+    i, n = 0, len(source)
+
+    def scan_template(i):
+        """从模板字符串内部的位置i扫描到结束的反引号或"${"，返回新位置"""
+        start = i
+        while i < n:
+            char = source[i]
+            if char == '\\':
+                i += 2
+                continue
+            if char == '`':
+                out.append(source[start:i + 1])
+                return i + 1, False
+            if source.startswith('${', i):
+                out.append(source[start:i + 2])
+                return i + 2, True
+            i += 1
+        raise ValueError('模板字符串未闭合')
+
+    while i < n:
+        char = source[i]
+
+        if char in ' \t\r\n' or source.startswith(('//', '/*'), i):
+            # 连续的空白和注释一起处理，整体视为一段空白
+            j = i
+            newline = False
+            while j < n:
+                if source[j] in ' \t\r\n':
+                    newline = newline or source[j] == '\n'
+                    j += 1
+                elif source.startswith('//', j):
+                    while j < n and source[j] != '\n':
+                        j += 1
+                elif source.startswith('/*', j):
+                    end = source.find('*/', j + 2)
+                    if end < 0:
+                        raise ValueError('注释未闭合')
+                    newline = newline or '\n' in source[j:end]
+                    j = end + 2
+                else:
+                    break
+            prev = out[-1][-1] if out else ''
+            nxt = source[j] if j < n else ''
+            i = j
+            if not prev or not nxt:
+                continue
+            if newline and not (prev in _JOIN_AFTER or nxt in _JOIN_BEFORE):
+                out.append('\n')
+            elif _is_ident(prev) and _is_ident(nxt) or prev == nxt and prev in '+-/':
+                out.append(' ')
+            continue
+
+        if char in '\'"':
+            j = i + 1
+            while j < n and source[j] != char:
+                if source[j] == '\\':
+                    j += 1
+                elif source[j] == '\n':
+                    raise ValueError('字符串未闭合')
+                j += 1
+            out.append(source[i:j + 1])
+            i = j + 1
+            continue
+
+        if char == '`':
+            out.append('`')
+            i, interpolating = scan_template(i + 1)
+            if interpolating:
+                templates.append(depth)
+                depth = 0
+            continue
+
+        if char == '/' and _regex_allowed(out):
+            j = i + 1
+            in_class = False
+            while j < n:
+                c = source[j]
+                if c == '\\':
+                    j += 2
+                    continue
+                if c == '\n':
+                    raise ValueError('正则表达式未闭合')
+                if c == '[':
+                    in_class = True
+                elif c == ']':
+                    in_class = False
+                elif c == '/' and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and _is_ident(source[j]):
+                j += 1
+            out.append(source[i:j])
+            i = j
+            continue
+
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            if depth == 0 and templates:
+                # 插值表达式结束，回到模板字符串中
+                out.append('}')
+                depth = templates.pop()
+                i, interpolating = scan_template(i + 1)
+                if interpolating:
+                    templates.append(depth)
+                    depth = 0
+                continue
+            depth -= 1
+
+        out.append(char)
+        i += 1
+
+    return ''.join(out).strip()
+
+
+def content_name(prefix, content, ext):
+    """以内容哈希命名资源文件：prefix-<哈希前12位>.ext"""
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:12]
+    return f"{prefix}-{digest}.{ext}"
+
+
+def write_asset(directory, prefix, content, ext):
+    """
+    把资源内容写入以内容哈希命名的文件，同名文件已存在（内容必然相同）时不重写
+
+    Returns:
+        str: 文件名
+    """
+    name = content_name(prefix, content, ext)
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    return name
+
+
+def remove_stale(directory, keep, ext, prefix=''):
+    """删除目录中以prefix开头、不在keep里的资源文件及其压缩副本，返回删除的资源文件数"""
+    removed = 0
+    for name in os.listdir(directory):
+        base = name
+        for suffix in ('.gz', '.br'):
+            if base.endswith(suffix):
+                base = base[:-len(suffix)]
+        if base.startswith(prefix) and base.endswith(ext) and base not in keep:
+            os.remove(os.path.join(directory, name))
+            if base == name:
+                removed += 1
+    return removed
+
+
+def precompress(path):
+    """
+    为文件写出.gz（及.br）压缩副本
+
+    副本比源文件新时跳过；gzip头部不记录时间戳，相同内容总是得到相同的字节。
+
+    Returns:
+        int: 新写入的副本数
+    """
+    source_mtime = os.stat(path).st_mtime_ns
+    written = 0
+    content = None
+    for suffix in COMPRESSED_SUFFIXES:
+        target = path + suffix
+        try:
+            if os.stat(target).st_mtime_ns >= source_mtime:
+                continue
+        except OSError:
+            pass
+        if content is None:
+            with open(path, 'rb') as f:
+                content = f.read()
+        if suffix == '.gz':
+            data = gzip.compress(content, compresslevel=9, mtime=0)
+        else:
+            data = brotli.compress(content, quality=11)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, target)
+        written += 1
+    return written
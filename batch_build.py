@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量生成导航网站
+在一个进程中为多个书签集合（如每个团队一份YAML）各生成一个导航网站：解释器启动、PyYAML等模块的导入
+和页面模板的编译只做一次，各集合在进程池中并行构建（fork方式下worker直接继承已编译的模板）。
+
+每个集合的输入文件（大小和修改时间）、模板和构建选项记录在输出目录的构建状态中，
+输入和上次的输出都未变化的集合不再加载书签，直接跳过。
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from generate_nav import RENDERER_FINGERPRINT, content_hash, count_bookmarks, generate_html, load_bookmarks, \
+    load_page_template, yaml_files
+from parallel_render import resolve_jobs
+from yaml_cache import CACHE_VERSION, cache_path, parse_yaml, read_cache_data, read_cache_meta, write_cache
+
+# 书签集合：名称、书签来源（YAML文件、YAML目录或SQLite书签库）和输出的HTML文件
+Collection = namedtuple('Collection', ['name', 'source', 'output'])
+
+# 每个集合的页面文件名（位于输出目录下以集合名命名的子目录中）
+PAGE_NAME = 'index.html'
+
+# 构建状态文件（位于输出目录的缓存目录下）
+STATE_NAME = 'batch'
+STATE_SUFFIX = '.state'
+
+
+def discover_collections(directory, output_dir):
+    """
+    目录中的每个YAML文件、每个包含YAML文件的子目录各为一个集合，以文件名（不含扩展名）或子目录名命名
+    """
+    collections = []
+    for entry in sorted(os.listdir(directory)):
+        path = os.path.join(directory, entry)
+        if entry.startswith('.'):
+            continue
+        if os.path.isfile(path) and entry.endswith(('.yaml', '.yml')):
+            name = os.path.splitext(entry)[0]
+        elif os.path.isdir(path) and yaml_files(path):
+            name = entry
+        else:
+            continue
+        collections.append(Collection(name, path, os.path.join(output_dir, name, PAGE_NAME)))
+    return collections
+
+
+def read_collection_manifest(manifest_file, output_dir):
+    """
+    读取集合清单（YAML）：每项包含name和source，可选output（默认为输出目录/name/index.html）；
+    相对路径以清单文件所在目录为基准
+
+    Raises:
+        ValueError: 清单格式不正确
+    """
+    with open(manifest_file, 'rb') as f:
+        entries = parse_yaml(f)
+    if not isinstance(entries, list):
+        raise ValueError(f"集合清单{manifest_file}应为列表")
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_file))
+    collections = []
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get('name') or not entry.get('source'):
+            raise ValueError(f"集合清单中的条目应包含name和source: {entry!r}")
+        name = str(entry['name'])
+        output = entry.get('output') or os.path.join(output_dir, name, PAGE_NAME)
+        collections.append(Collection(name, os.path.join(base_dir, entry['source']), os.path.join(base_dir, output)))
+    return collections
+
+
+def load_collections(source, output_dir):
+    """
+    返回要构建的集合：source为目录时见discover_collections()，否则为集合清单文件
+
+    Raises:
+        ValueError: 清单格式不正确或集合名重复
+    """
+    if os.path.isdir(source):
+        collections = discover_collections(source, output_dir)
+    else:
+        collections = read_collection_manifest(source, output_dir)
+
+    seen = set()
+    for collection in collections:
+        if collection.name in seen:
+            raise ValueError(f"集合名重复: {collection.name}")
+        seen.add(collection.name)
+    return collections
+
+
+def input_key(collection, options, template_fingerprint):
+    """
+    集合输入的指纹：书签文件的大小和修改时间、模板、构建选项和渲染器，任何一项变化时指纹随之变化
+
+    Raises:
+        OSError: 书签来源不存在
+    """
+    files = []
+    for path in yaml_files(collection.source):
+        stat = os.stat(path)
+        files.append((os.path.abspath(path), stat.st_size, stat.st_mtime_ns))
+    return content_hash((RENDERER_FINGERPRINT, template_fingerprint, datetime.now().year,
+                         sorted(options.items()), files))
+
+
+def _output_matches(output_file, record):
+    """输出文件是否仍是上次构建写入的版本"""
+    try:
+        stat = os.stat(output_file)
+    except OSError:
+        return False
+    return stat.st_size == record['output_size'] and stat.st_mtime_ns == record['output_mtime_ns']
+
+
+def read_state(state_file):
+    """读取构建状态（集合名到上次构建记录的映射），不存在或已损坏时返回空字典"""
+    if read_cache_meta(state_file) is None:
+        return {}
+    try:
+        state = read_cache_data(state_file)
+    except (OSError, ValueError, EOFError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _init_worker(template_file):
+    # fork方式下模板已在主进程中编译，这里直接命中缓存；其他启动方式下每个worker只编译一次
+    load_page_template(template_file)
+
+
+def build_collection(collection, options):
+    """
+    构建一个集合（在worker进程中运行），生成器的输出不打印
+
+    Returns:
+        dict: 集合名、状态（built/unchanged/failed）、耗时、书签数和错误信息
+    """
+    start = time.perf_counter()
+    result = {'name': collection.name, 'status': 'built', 'bookmarks': 0, 'error': None}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            bookmarks_data = load_bookmarks(collection.source)
+            os.makedirs(os.path.dirname(os.path.abspath(collection.output)), exist_ok=True)
+            written = generate_html(bookmarks_data, collection.output, **options)
+        result['bookmarks'] = count_bookmarks(bookmarks_data)
+        if not written:
+            result['status'] = 'unchanged'
+    except Exception as e:
+        result.update(status='failed', error=f"{type(e).__name__}: {e}")
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def batch_build(collections, output_dir, jobs=0, full=False, sharded=False, virtual=False, search_index=True,
+                production=False, template_file=None, tag_facets=True, fuzzy_search=False, on_result=None):
+    """
+    并行构建多个集合
+
+    Args:
+        collections (list): Collection列表
+        output_dir (str): 输出目录，构建状态保存在其缓存目录下
+        jobs (int): worker数，0表示使用全部CPU核心，1表示在当前进程中依次构建
+        full (bool): 忽略构建状态和构建清单，全部重新生成
+        sharded, virtual, search_index, production, template_file, tag_facets, fuzzy_search:
+            见generate_nav.generate_html()
+        on_result (callable): 每个集合完成（或跳过）时以结果字典调用
+
+    Returns:
+        list: 各集合的结果（顺序与collections相同），status为built、unchanged、skipped或failed
+
+    Raises:
+        OSError, ValueError: 模板文件不存在或有误
+    """
+    template = load_page_template(template_file)
+    options = {
+        'incremental': not full,
+        'sharded': sharded,
+        'virtual': virtual,
+        'search_index': search_index,
+        'production': production,
+        'template_file': template_file,
+        'tag_facets': tag_facets,
+        'fuzzy_search': fuzzy_search,
+    }
+    state_file = cache_path(os.path.join(output_dir, STATE_NAME), STATE_SUFFIX)
+    state = {} if full else read_state(state_file)
+
+    results = {}
+    keys = {}
+    pending = []
+    for collection in collections:
+        try:
+            # 是否增量构建不影响输出，不计入指纹
+            keys[collection.name] = key = input_key(collection, dict(options, incremental=None),
+                                                    template.fingerprint)
+        except OSError as e:
+            results[collection.name] = {'name': collection.name, 'status': 'failed', 'seconds': 0.0,
+                                        'bookmarks': 0, 'error': f"找不到书签来源: {e.filename}"}
+            continue
+        record = state.get(collection.name)
+        if record and record['key'] == key and record['output'] == collection.output \
+                and _output_matches(collection.output, record):
+            results[collection.name] = {'name': collection.name, 'status': 'skipped', 'seconds': 0.0,
+                                        'bookmarks': record['bookmarks'], 'error': None}
+        else:
+            pending.append(collection)
+    if on_result:
+        for result in results.values():
+            on_result(result)
+
+    jobs = min(resolve_jobs(jobs), len(pending))
+    if jobs <= 1:
+        finished = (build_collection(collection, options) for collection in pending)
+    else:
+        executor = ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(template_file,))
+        futures = [executor.submit(build_collection, collection, options) for collection in pending]
+        finished = (future.result() for future in as_completed(futures))
+    try:
+        for result in finished:
+            results[result['name']] = result
+            if on_result:
+                on_result(result)
+    finally:
+        if jobs > 1:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    new_state = {name: record for name, record in state.items()
+                 if name in keys and results.get(name, {}).get('status') == 'skipped'}
+    for collection in pending:
+        result = results[collection.name]
+        if result['status'] == 'failed':
+            continue
+        stat = os.stat(collection.output)
+        new_state[collection.name] = {
+            'key': keys[collection.name],
+            'output': collection.output,
+            'output_size': stat.st_size,
+            'output_mtime_ns': stat.st_mtime_ns,
+            'bookmarks': result['bookmarks'],
+        }
+    write_cache(state_file, {'version': CACHE_VERSION}, new_state)
+    return [results[collection.name] for collection in collections]
+
+
+# 各状态在输出中的标记
+STATUS_LABELS = {
+    'built': '✅ 已生成',
+    'unchanged': '♻️  未变化',
+    'skipped': '⏭️  已跳过',
+    'failed': '❌ 失败',
+}
+
+
+def print_result(result):
+    """打印一个集合的结果"""
+    line = f"{STATUS_LABELS[result['status']]} {result['name']}"
+    if result['status'] == 'failed':
+        line += f": {result['error']}"
+    elif result['status'] != 'skipped':
+        line += f"（{result['bookmarks']} 个书签，{result['seconds']:.2f}s）"
+    print(line)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='在一个进程池中为多个书签集合批量生成导航网站')
+    parser.add_argument('source', help='集合目录（每个YAML文件或包含YAML文件的子目录为一个集合），或集合清单YAML文件')
+    parser.add_argument('-o', '--output-dir', default='sites',
+                        help='输出目录，每个集合写入以集合名命名的子目录（默认: sites）')
+    parser.add_argument('-j', '--jobs', type=int, default=0, help='并行构建的进程数（默认: 0，使用全部CPU核心）')
+    parser.add_argument('--full', action='store_true', help='忽略构建状态，全部重新生成')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--sharded', action='store_true', help='分片模式，见generate_nav.py')
+    mode.add_argument('--virtual', action='store_true', help='虚拟列表模式，见generate_nav.py')
+    parser.add_argument('--no-search-index', action='store_true', help='不生成搜索索引')
+    parser.add_argument('--fuzzy-search', action='store_true', help='模糊搜索，见generate_nav.py')
+    parser.add_argument('--no-tag-facets', action='store_true', help='不生成标签栏和标签索引')
+    parser.add_argument('--production', action='store_true', help='生产模式，见generate_nav.py')
+    parser.add_argument('--template', metavar='FILE', help='所有集合共用的自定义页面模板文件')
+    parser.add_argument('--report', metavar='FILE', help='把各集合的结果和耗时写入此JSON文件')
+    args = parser.parse_args()
+    if args.jobs < 0:
+        parser.error('--jobs 不能为负数')
+    if args.fuzzy_search and args.no_search_index:
+        parser.error('--fuzzy-search 需要搜索索引，不能与 --no-search-index 同时使用')
+
+    try:
+        collections = load_collections(args.source, args.output_dir)
+    except (OSError, ValueError) as e:
+        print(f"❌ 错误: {e}")
+        return
+    if not collections:
+        print(f"❌ 错误: {args.source} 中没有书签集合")
+        return
+
+    print(f"🚀 正在构建 {len(collections)} 个集合...")
+    start = time.perf_counter()
+    try:
+        results = batch_build(collections, args.output_dir, jobs=args.jobs, full=args.full, sharded=args.sharded,
+                              virtual=args.virtual, search_index=not args.no_search_index,
+                              production=args.production, template_file=args.template,
+                              tag_facets=not args.no_tag_facets, fuzzy_search=args.fuzzy_search,
+                              on_result=print_result)
+    except (OSError, ValueError) as e:
+        print(f"❌ 模板错误: {e}")
+        return
+    elapsed = time.perf_counter() - start
+
+    counts = {status: sum(1 for result in results if result['status'] == status) for status in STATUS_LABELS}
+    print(f"\n📊 共 {len(results)} 个集合，用时 {elapsed:.2f}s: 生成 {counts['built']} 个，"
+          f"未变化 {counts['unchanged']} 个，跳过 {counts['skipped']} 个，失败 {counts['failed']} 个")
+    slowest = sorted((result for result in results if result['status'] in ('built', 'unchanged')),
+                     key=lambda result: result['seconds'], reverse=True)[:5]
+    if slowest:
+        print("🐢 最慢的集合: " + '，'.join(f"{result['name']} {result['seconds']:.2f}s" for result in slowest))
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'seconds': elapsed, 'collections': results}, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已写入: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
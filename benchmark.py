@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能基准
+使用确定性的合成书签数据（YAML和CSV），分别测量加载、生成页面、CSV转YAML和YAML转CSV
+各阶段的耗时、峰值内存（RSS）和输出大小，并与保存的基线比较，超过回归阈值时以非零状态退出。
+
+每个阶段在单独的子进程中运行，峰值RSS互不影响。
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    # Windows上没有resource模块，不统计峰值内存
+    resource = None
+
+# 合成数据使用的词表
+CATEGORY_WORDS = ['开发工具', '设计资源', '学习平台', '效率工具', '新闻资讯', '影音娱乐', '云服务', '社区论坛',
+                  '生活服务', '购物比价', '金融理财', '人工智能']
+SUBCATEGORY_WORDS = ['版本控制', '文档工具', '图标库', '编程学习', '在线课程', '图片素材', '数据库', '监控',
+                     '笔记软件', '视频平台', '播客', '翻译工具', '设计灵感', '开发者社区']
+NAME_WORDS = ['GitHub', '知乎', 'Stack', '掘金', 'Docs', '云盘', 'Hub', '博客', 'Lab', '指南',
+              '哔哩哔哩', '豆瓣', '语雀', '飞书', '少数派', '微博', '网易云', '腾讯', '阿里云', '百度',
+              'Figma', 'Notion', '思否', '开源中国', '菜鸟', '极客', 'Python', 'Vue', 'React', 'Rust']
+NAME_SUFFIXES = ['', '', '官网', '社区', '文档', '中文站', '学院', '工作台', '镜像', '导航']
+TAG_WORDS = ['开源', '代码托管', '教程', 'Web开发', '免费', '社区', 'API', '设计', '工具', '问答',
+             '效率', '云存储', '视频', '音乐', '写作', '协作', '人工智能', '前端', '后端', '数据分析']
+DESCRIPTION_PATTERNS = ['{tag}相关的{name}网站', '面向开发者的{tag}平台，提供{tag2}服务',
+                        '{name}：{tag}与{tag2}资源合集', '国内常用的{tag}工具']
+
+# 默认测量的书签规模
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+# 测量的阶段
+STAGES = ['load', 'generate', 'csv_to_yaml', 'yaml_to_csv']
+
+# 每个阶段默认运行的次数（取最快的一次，减小耗时的波动）
+DEFAULT_REPEAT = 3
+
+# 默认的基线文件和回归阈值（相对基线的增幅）
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+DEFAULT_THRESHOLD = 0.25
+
+# 比较的指标
+METRICS = ['seconds', 'rss', 'output']
+
+
+def iter_synthetic_entries(total, bookmarks_per_subcategory=50, subcategories_per_category=8, seed=0):
+    """
+    逐个生成合成书签，返回(一级分类, 二级分类, 书签)
+
+    名称、标签和简介由常见的中英文站点名、后缀和标签组合而成，网址各不相同；
+    相同参数总是得到相同数据，不在内存中保留已生成的书签。
+    """
+    rng = random.Random(seed)
+    per_category = bookmarks_per_subcategory * subcategories_per_category
+    for index in range(total):
+        category_no, offset = divmod(index, per_category)
+        sub_no = offset // bookmarks_per_subcategory
+        name = f"{rng.choice(NAME_WORDS)}{rng.choice(NAME_SUFFIXES)}"
+        tags = rng.sample(TAG_WORDS, rng.randint(1, 4))
+        description = rng.choice(DESCRIPTION_PATTERNS).format(
+            name=name, tag=tags[0], tag2=rng.choice(TAG_WORDS))
+        yield (
+            f"{CATEGORY_WORDS[category_no % len(CATEGORY_WORDS)]}{category_no}",
+            f"{SUBCATEGORY_WORDS[sub_no % len(SUBCATEGORY_WORDS)]}{sub_no}",
+            {
+                'name': name,
+                'url': f"https://site{index}.example.com",
+                'icon': f"https://site{index}.example.com/favicon.ico",
+                'tags': tags,
+                'description': description,
+            },
+        )
+
+
+def make_bookmarks(total, bookmarks_per_subcategory=50, subcategories_per_category=8, seed=0):
+    """
+    生成与bookmarks.yaml结构一致的合成书签数据（见iter_synthetic_entries）
+
+    Args:
+        total (int): 书签总数
+        bookmarks_per_subcategory (int): 每个二级分类的书签数
+        subcategories_per_category (int): 每个一级分类的二级分类数
+        seed (int): 随机种子，相同参数总是得到相同数据
+    """
+    data = []
+    categories = {}
+    subcategories = {}
+    for category_name, subcategory_name, bookmark in iter_synthetic_entries(
+            total, bookmarks_per_subcategory, subcategories_per_category, seed):
+        category = categories.get(category_name)
+        if category is None:
+            category = categories[category_name] = {'category': category_name, 'subcategories': []}
+            data.append(category)
+        key = (category_name, subcategory_name)
+        subcategory = subcategories.get(key)
+        if subcategory is None:
+            subcategory = subcategories[key] = {'name': subcategory_name, 'bookmarks': []}
+            category['subcategories'].append(subcategory)
+        subcategory['bookmarks'].append(bookmark)
+    return data
+
+
+def write_corpus(total, directory, seed=0):
+    """
+    把合成书签写为YAML和CSV文件（已存在时直接复用，数据是确定的）
+
+    Returns:
+        tuple: (YAML文件路径, CSV文件路径)
+    """
+    from csv_to_yaml import write_bookmarks_yaml
+    from models import CSV_FIELDNAMES, Bookmark
+    from yaml_to_csv import bookmark_row
+
+    os.makedirs(directory, exist_ok=True)
+    yaml_file = os.path.join(directory, f"corpus-{total}-{seed}.yaml")
+    csv_file = os.path.join(directory, f"corpus-{total}-{seed}.csv")
+    if not os.path.exists(yaml_file):
+        write_bookmarks_yaml(iter_synthetic_entries(total, seed=seed), yaml_file + '.tmp')
+        os.replace(yaml_file + '.tmp', yaml_file)
+    if not os.path.exists(csv_file):
+        with open(csv_file + '.tmp', 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_FIELDNAMES)
+            for category, subcategory, bookmark in iter_synthetic_entries(total, seed=seed):
+                writer.writerow(bookmark_row(category, subcategory, Bookmark.from_dict(bookmark)))
+        os.replace(csv_file + '.tmp', csv_file)
+    return yaml_file, csv_file
+
+
+def run_stage(stage, yaml_file, csv_file, output_dir):
+    """
+    在当前进程中运行一个阶段（由子进程调用）
+
+    load和generate都不使用解析缓存；generate先加载数据再计时。
+
+    Returns:
+        dict: {'seconds': 耗时, 'rss': 峰值RSS字节数, 'output': 输出字节数}
+    """
+    from csv_to_yaml import csv_to_yaml
+    from generate_nav import generate_html, load_bookmarks
+    from yaml_cache import cache_path
+    from yaml_to_csv import yaml_to_csv
+
+    output = None
+    # 各阶段自身的输出信息不混入结果
+    with contextlib.redirect_stdout(io.StringIO()):
+        if stage == 'load':
+            start = time.perf_counter()
+            load_bookmarks(yaml_file, use_cache=False)
+            elapsed = time.perf_counter() - start
+        elif stage == 'generate':
+            data = load_bookmarks(yaml_file, use_cache=False)
+            output = os.path.join(output_dir, 'index.html')
+            start = time.perf_counter()
+            generate_html(data, output)
+            elapsed = time.perf_counter() - start
+        elif stage == 'csv_to_yaml':
+            output = os.path.join(output_dir, 'bookmarks.yaml')
+            start = time.perf_counter()
+            csv_to_yaml(csv_file, output)
+            elapsed = time.perf_counter() - start
+        elif stage == 'yaml_to_csv':
+            # 与首次导出相同，不命中解析缓存
+            with contextlib.suppress(OSError):
+                os.remove(cache_path(yaml_file))
+            output = os.path.join(output_dir, 'bookmarks.csv')
+            start = time.perf_counter()
+            yaml_to_csv(yaml_file, output)
+            elapsed = time.perf_counter() - start
+        else:
+            raise ValueError(f"未知的阶段: {stage}")
+
+    # Linux上ru_maxrss的单位为KB
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 if resource is not None else 0
+    return {'seconds': elapsed, 'rss': rss, 'output': os.path.getsize(output) if output else 0}
+
+
+def measure(stage, yaml_file, csv_file, repeat=DEFAULT_REPEAT):
+    """在子进程中运行阶段repeat次，取耗时最短的一次"""
+    best = None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as output_dir:
+            result = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--run-stage', stage, yaml_file, csv_file, output_dir],
+                capture_output=True, text=True, check=True)
+        metrics = json.loads(result.stdout.strip().splitlines()[-1])
+        if best is None or metrics['seconds'] < best['seconds']:
+            best = metrics
+    return best
+
+
+def compare(results, baseline, threshold):
+    """
+    与基线比较
+
+    Returns:
+        list: 超过阈值的回归，每项为(规模, 阶段, 指标, 基线值, 当前值)
+    """
+    regressions = []
+    for size, stages in results.items():
+        for stage, metrics in stages.items():
+            reference = baseline.get(size, {}).get(stage)
+            if not reference:
+                continue
+            for metric in METRICS:
+                old, new = reference.get(metric), metrics[metric]
+                if old and new > old * (1 + threshold):
+                    regressions.append((size, stage, metric, old, new))
+    return regressions
+
+
+def _change(new, old):
+    return f"{(new - old) / old:+.0%}" if old else ''
+
+
+def main():
+    """主函数"""
+    if len(sys.argv) > 1 and sys.argv[1] == '--run-stage':
+        print(json.dumps(run_stage(*sys.argv[2:6])))
+        return
+
+    parser = argparse.ArgumentParser(description='测量各阶段的耗时、峰值内存和输出大小，并与基线比较')
+    parser.add_argument('sizes', nargs='*', type=int, default=DEFAULT_SIZES,
+                        help=f"书签规模（默认: {' '.join(map(str, DEFAULT_SIZES))}，可加上1000000）")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES, help='测量的阶段（默认: 全部）')
+    parser.add_argument('--corpus-dir', help='合成数据目录，已有的数据直接复用（默认: 临时目录）')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f'每个阶段运行的次数，取最快的一次（默认: {DEFAULT_REPEAT}）')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help=f'基线文件（默认: {DEFAULT_BASELINE}）')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果写入基线文件（与已有基线合并）')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'回归阈值：任一指标比基线高出此比例即失败（默认: {DEFAULT_THRESHOLD}）')
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    with contextlib.ExitStack() as stack:
+        corpus_dir = args.corpus_dir or stack.enter_context(tempfile.TemporaryDirectory())
+        results = {}
+        print(f"{'书签数':>9} {'阶段':<12} {'耗时(s)':>9} {'每1万条(ms)':>12} {'峰值RSS(MB)':>12} {'输出(MB)':>9}  对比基线")
+        for total in args.sizes:
+            yaml_file, csv_file = write_corpus(total, corpus_dir)
+            stages = results[str(total)] = {}
+            for stage in args.stages:
+                metrics = stages[stage] = measure(stage, yaml_file, csv_file, args.repeat)
+                reference = baseline.get(str(total), {}).get(stage, {})
+                changes = ' '.join(
+                    f"{metric} {_change(metrics[metric], reference[metric])}"
+                    for metric in METRICS if reference.get(metric))
+                print(f"{total:>9} {stage:<12} {metrics['seconds']:>9.3f} "
+                      f"{metrics['seconds'] / total * 10000 * 1000:>12.1f} {metrics['rss'] / 1024 / 1024:>12.1f} "
+                      f"{metrics['output'] / 1024 / 1024:>9.1f}  {changes}")
+
+    if args.save_baseline:
+        for size, stages in results.items():
+            baseline.setdefault(size, {}).update(stages)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"💾 基线已写入: {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"❌ {len(regressions)} 项超过回归阈值（{args.threshold:.0%}）:")
+        for size, stage, metric, old, new in regressions:
+            print(f"   - {size} 条 {stage} {metric}: {old:.4g} → {new:.4g}（{_change(new, old)}）")
+        sys.exit(1)
+    if baseline:
+        print(f"✅ 未超过回归阈值（{args.threshold:.0%}）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,553 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+浏览器书签导入
+读取浏览器的书签，写出为YAML或CSV书签文件，或转换为与generate_nav.load_bookmarks()相同的Category列表：
+- Chrome、Firefox、Edge、Safari等导出的Netscape格式书签文件（bookmarks.html）
+- Firefox配置目录中的places.sqlite（请先复制，Firefox运行时会锁定该文件）
+- Chrome、Edge等Chromium系浏览器配置目录中的Bookmarks（JSON）
+
+HTML文件按块读入，由事件驱动的HTML解析器逐个产出书签；places.sqlite按文件夹树逐层以索引查询读取；
+Bookmarks以流式JSON解析器（安装了ijson时）读取。书签按(一级分类, 二级分类, 书签)的顺序交给
+csv_to_yaml.write_bookmarks_yaml()或CSV写入器，一遍完成。
+
+文件夹映射：第一层文件夹为一级分类，更深的文件夹路径以" / "连接为二级分类；
+直接位于一级分类文件夹中的书签归入DIRECT_SUBCATEGORY，不在任何文件夹中的书签归入ROOT_CATEGORY。
+书签栏、其他书签等浏览器自带的容器文件夹不占一层（可用--keep-root-folders保留）。
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from urllib.parse import quote
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# JSON格式错误（ijson的错误类型不是ValueError的子类）
+JSON_ERRORS = (ValueError, ijson.JSONError) if ijson is not None else (ValueError,)
+
+import profiling
+from csv_to_yaml import write_bookmarks_yaml
+from models import CSV_ADDED_FIELD, CSV_FIELDNAMES, Bookmark, Category, Subcategory
+from yaml_to_csv import bookmark_row
+
+# 每次读入并交给解析器的字符数
+READ_SIZE = 1 << 20
+
+# 不在任何文件夹中的书签所属的一级分类
+ROOT_CATEGORY = '未分类'
+
+# 直接位于一级分类文件夹中的书签所属的二级分类
+DIRECT_SUBCATEGORY = '其他'
+
+# 多层文件夹合并为二级分类名时的分隔符
+FOLDER_SEPARATOR = ' / '
+
+# 标记浏览器自带容器文件夹（书签栏、其他书签）的属性
+CONTAINER_ATTRS = ('personal_toolbar_folder', 'unfiled_bookmarks_folder')
+
+# 不是网页的书签（如Firefox的智能书签）
+SKIPPED_SCHEMES = ('place:',)
+
+# 支持的输入格式
+INPUT_FORMATS = ('html', 'places', 'chromium')
+
+# Firefox书签库中的容器文件夹（guid -> 保留这一层时使用的名称）和标签文件夹
+FIREFOX_ROOT = 'root________'
+FIREFOX_CONTAINERS = {
+    'menu________': '书签菜单',
+    'toolbar_____': '书签工具栏',
+    'unfiled_____': '其他书签',
+    'mobile______': '移动设备书签',
+}
+FIREFOX_TAGS_ROOT = 'tags________'
+
+# moz_bookmarks中的条目类型
+FIREFOX_BOOKMARK = 1
+FIREFOX_FOLDER = 2
+
+# 一个文件夹的直接子项，按位置排列（使用moz_bookmarks_parentindex索引和moz_places主键）
+PLACES_CHILDREN_QUERY = '''
+SELECT b.id, b.type, b.title, b.dateAdded, p.id, p.url, p.title
+FROM moz_bookmarks b LEFT JOIN moz_places p ON p.id = b.fk
+WHERE b.parent = ?
+ORDER BY b.position
+'''
+
+# 各网址的标签：标签文件夹下的书签指向同一网址
+PLACES_TAGS_QUERY = '''
+SELECT b.fk, t.title
+FROM moz_bookmarks t JOIN moz_bookmarks b ON b.parent = t.id
+WHERE t.parent = ? AND b.type = 1
+ORDER BY t.title
+'''
+
+# Chromium时间戳（1601-01-01起的微秒数）与Unix时间戳（秒）之差
+CHROMIUM_EPOCH_OFFSET = 11644473600
+
+
+def folder_location(path):
+    """由文件夹路径得到(一级分类, 二级分类)"""
+    if not path:
+        return ROOT_CATEGORY, DIRECT_SUBCATEGORY
+    return sys.intern(path[0]), sys.intern(FOLDER_SEPARATOR.join(path[1:]) or DIRECT_SUBCATEGORY)
+
+
+def format_added(value):
+    """
+    把ADD_DATE（Unix时间戳）转换为UTC时间字符串，无法解析时返回None
+
+    个别工具以毫秒或微秒导出，超出合理范围的值按1000倍逐级缩小。
+    """
+    try:
+        timestamp = int(value)
+    except (TypeError, ValueError):
+        return None
+    if timestamp <= 0:
+        return None
+    while timestamp > 100_000_000_000:
+        timestamp //= 1000
+    try:
+        return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+class NetscapeBookmarkParser(HTMLParser):
+    """
+    Netscape书签文件的事件驱动解析器
+
+    解析出的(一级分类, 二级分类, 书签)暂存在entries中，由调用方在每次feed()后取走；
+    <DD>简介写在书签之后，因此每个书签在遇到下一个标签时才产出。
+    """
+
+    def __init__(self, keep_root_folders=False, icon_data=True):
+        super().__init__(convert_charrefs=True)
+        self.keep_root_folders = keep_root_folders
+        self.icon_data = icon_data
+        self.entries = []
+        # 当前的文件夹路径；不占一层的文件夹（最外层列表、容器文件夹）记为None
+        self.stack = []
+        self.path = []
+        # 刚读完标题、尚未遇到其<DL>的文件夹
+        self.folder = None
+        # 正在读取文本的元素（h3、a或dd）及其文本
+        self.capture = None
+        self.text = []
+        self.link = None
+        self.bookmark = None
+        self.skipped = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('dt', 'dl', 'h3', 'a', 'hr'):
+            self._finish_bookmark()
+        if tag == 'h3':
+            attrs = dict(attrs)
+            container = not self.keep_root_folders and any(attr in attrs for attr in CONTAINER_ATTRS)
+            self._start_capture('h3')
+            self.folder = (None if container else '',)
+        elif tag == 'dl':
+            folder = self.folder[0] if self.folder else None
+            self.folder = None
+            self.stack.append(folder)
+            if folder is not None:
+                self.path.append(folder)
+        elif tag == 'a':
+            self.link = dict(attrs)
+            self._start_capture('a')
+        elif tag == 'dd' and self.bookmark is not None:
+            self._start_capture('dd')
+
+    def handle_endtag(self, tag):
+        if tag == 'h3' and self.capture == 'h3':
+            if self.folder[0] is not None:
+                self.folder = (self._end_capture() or '未命名文件夹',)
+            else:
+                self._end_capture()
+        elif tag == 'a' and self.capture == 'a':
+            self._end_link()
+        elif tag == 'dl':
+            self._finish_bookmark()
+            self.folder = None
+            if self.stack and self.stack.pop() is not None:
+                self.path.pop()
+
+    def handle_data(self, data):
+        if self.capture is not None:
+            self.text.append(data)
+
+    def close(self):
+        super().close()
+        self._finish_bookmark()
+
+    def _start_capture(self, element):
+        self.capture = element
+        self.text = []
+
+    def _end_capture(self):
+        self.capture = None
+        text = ' '.join(''.join(self.text).split())
+        self.text = []
+        return text
+
+    def _end_link(self):
+        attrs = self.link
+        self.link = None
+        name = self._end_capture()
+        url = (attrs.get('href') or '').strip()
+        if not url or url.startswith(SKIPPED_SCHEMES):
+            self.skipped += 1
+            return
+
+        icon = attrs.get('icon') if self.icon_data else None
+        icon = icon or attrs.get('icon_uri') or None
+        tags = [tag.strip() for tag in (attrs.get('tags') or '').split(',') if tag.strip()] or None
+        added = format_added(attrs.get('add_date'))
+        self.bookmark = Bookmark(name or url, url, icon, None, tags, extra={'added': added} if added else None)
+        self.category, self.subcategory = folder_location(self.path)
+
+    def _finish_bookmark(self):
+        """产出已读完的书签（连同其后的<DD>简介）"""
+        bookmark = self.bookmark
+        if bookmark is None:
+            return
+        if self.capture == 'dd':
+            bookmark.description = self._end_capture() or None
+        self.bookmark = None
+        self.entries.append((self.category, self.subcategory, bookmark))
+
+
+def iter_netscape_entries(html_file, keep_root_folders=False, icon_data=True):
+    """
+    流式读取Netscape格式书签文件，返回(一级分类, 二级分类, 书签)，书签为models.Bookmark
+
+    Args:
+        html_file: 以文本模式打开的书签文件
+        keep_root_folders (bool): 书签栏等容器文件夹也作为一层文件夹
+        icon_data (bool): 使用ICON属性中的data URI图标；为False时只使用ICON_URI
+    """
+    parser = NetscapeBookmarkParser(keep_root_folders, icon_data)
+    while True:
+        chunk = html_file.read(READ_SIZE)
+        if not chunk:
+            break
+        parser.feed(chunk)
+        yield from parser.entries
+        parser.entries.clear()
+    parser.close()
+    yield from parser.entries
+    parser.entries.clear()
+    profiling.count('skipped', parser.skipped)
+
+
+def _connect_places(db_path):
+    """以只读方式打开places.sqlite"""
+    uri = f"file:{quote(os.path.abspath(db_path))}?mode=ro"
+    return sqlite3.connect(uri, uri=True)
+
+
+def iter_places_entries(db_path, keep_root_folders=False):
+    """
+    读取Firefox的places.sqlite，返回(一级分类, 二级分类, 书签)，顺序与Firefox导出的HTML相同
+
+    按文件夹树逐层查询各文件夹的子项（moz_bookmarks以parent索引，网址以moz_places主键连接），
+    内存中只保存当前的文件夹路径和网址的标签。
+
+    Raises:
+        sqlite3.DatabaseError: 文件不是Firefox书签库
+    """
+    connection = _connect_places(db_path)
+    try:
+        guids = dict(connection.execute(
+            "SELECT guid, id FROM moz_bookmarks WHERE guid IN (?, ?, ?, ?, ?, ?)",
+            (FIREFOX_ROOT, FIREFOX_TAGS_ROOT, *FIREFOX_CONTAINERS)))
+        if FIREFOX_ROOT not in guids:
+            raise sqlite3.DatabaseError('不是Firefox书签库：缺少根文件夹')
+
+        tags = {}
+        if FIREFOX_TAGS_ROOT in guids:
+            for place_id, tag in connection.execute(PLACES_TAGS_QUERY, (guids[FIREFOX_TAGS_ROOT],)):
+                if tag:
+                    tags.setdefault(place_id, []).append(tag)
+
+        containers = {guids[guid]: name for guid, name in FIREFOX_CONTAINERS.items() if guid in guids}
+        for item_id, item_type, title, added, place_id, url, place_title in \
+                connection.execute(PLACES_CHILDREN_QUERY, (guids[FIREFOX_ROOT],)).fetchall():
+            if item_id == guids.get(FIREFOX_TAGS_ROOT):
+                continue
+            if item_type == FIREFOX_FOLDER:
+                path = [containers.get(item_id) or title or '未命名文件夹'] if keep_root_folders else []
+                yield from _walk_places(connection, item_id, path, tags)
+    finally:
+        connection.close()
+
+
+def _walk_places(connection, folder_id, path, tags):
+    """按位置顺序产出一个文件夹（及其子文件夹）中的书签"""
+    category, subcategory = folder_location(path)
+    for item_id, item_type, title, added, place_id, url, place_title in \
+            connection.execute(PLACES_CHILDREN_QUERY, (folder_id,)).fetchall():
+        if item_type == FIREFOX_FOLDER:
+            yield from _walk_places(connection, item_id, path + [title or '未命名文件夹'], tags)
+        elif item_type == FIREFOX_BOOKMARK and url and not url.startswith(SKIPPED_SCHEMES):
+            added = format_added(added)
+            # 书签没有标题时使用网页标题
+            yield category, subcategory, Bookmark(title or place_title or url, url, None, None, tags.get(place_id),
+                                                  extra={'added': added} if added else None)
+
+
+def format_chromium_time(value):
+    """把Chromium时间戳（1601-01-01起的微秒数，JSON中为字符串）转换为UTC时间字符串"""
+    try:
+        microseconds = int(value)
+    except (TypeError, ValueError):
+        return None
+    if microseconds <= 0:
+        return None
+    return format_added(microseconds // 1_000_000 - CHROMIUM_EPOCH_OFFSET)
+
+
+# 收集的节点字段
+CHROMIUM_FIELDS = ('name', 'type', 'url', 'date_added')
+
+
+def _iter_chromium_nodes(events):
+    """
+    由JSON事件序列依次产出Bookmarks中每个节点读完时的(节点序号, 祖先节点序号列表, 字段)
+
+    节点是roots下的各个根文件夹和所有children中的项，序号按节点开始的顺序编号；
+    字段只收集CHROMIUM_FIELDS，内存中只保存当前路径上的节点。
+    """
+    stack = []
+    count = 0
+    for prefix, event, value in events:
+        if event == 'start_map':
+            if prefix.endswith('.children.item') or prefix.startswith('roots.') and prefix.count('.') == 1:
+                stack.append((prefix, count, {}))
+                count += 1
+        elif event == 'end_map':
+            if stack and stack[-1][0] == prefix:
+                _, index, fields = stack.pop()
+                yield index, [parent for _, parent, _ in stack], fields
+        elif stack and event in ('string', 'number'):
+            node_prefix, _, fields = stack[-1]
+            key = prefix[len(node_prefix) + 1:]
+            if key in CHROMIUM_FIELDS:
+                fields[key] = value
+
+
+def iter_chromium_entries(json_path, keep_root_folders=False):
+    """
+    读取Chromium系浏览器的Bookmarks文件，返回(一级分类, 二级分类, 书签)，顺序与书签管理器中相同
+
+    安装了ijson时以流式JSON解析器读取，内存占用只与文件夹数有关：Chromium按键名排序写出JSON，
+    文件夹的children在name之前，因此分两遍读取，第一遍只记录各文件夹的名称，第二遍产出书签。
+    没有ijson时整体加载后遍历。
+
+    Raises:
+        ValueError: 文件不是有效的JSON
+    """
+    if ijson is None:
+        with open(json_path, 'r', encoding='utf-8-sig') as f:
+            data = json.load(f)
+        for root in (data.get('roots') or {}).values():
+            if isinstance(root, dict):
+                path = [root.get('name') or '未命名文件夹'] if keep_root_folders else []
+                yield from _walk_chromium(root.get('children') or (), path)
+        return
+
+    def events():
+        with open(json_path, 'rb') as f:
+            yield from ijson.parse(f)
+
+    names = {index: fields.get('name') or '未命名文件夹'
+             for index, _, fields in _iter_chromium_nodes(events()) if fields.get('type') == 'folder'}
+
+    for _, parents, fields in _iter_chromium_nodes(events()):
+        if fields.get('type') == 'url':
+            # 根文件夹（书签栏、其他书签等）是容器，默认不占一层
+            path = [names[parent] for parent in (parents if keep_root_folders else parents[1:])]
+            entry = _chromium_entry(fields, path)
+            if entry is not None:
+                yield entry
+
+
+def _walk_chromium(children, path):
+    """按顺序产出已加载的Bookmarks中一个文件夹（及其子文件夹）的书签"""
+    for node in children:
+        if node.get('type') == 'folder':
+            yield from _walk_chromium(node.get('children') or (), path + [node.get('name') or '未命名文件夹'])
+        elif node.get('type') == 'url':
+            entry = _chromium_entry(node, path)
+            if entry is not None:
+                yield entry
+
+
+def _chromium_entry(fields, path):
+    """由书签节点的字段构建(一级分类, 二级分类, 书签)，不是网页的书签返回None"""
+    url = fields.get('url')
+    if not url or url.startswith(SKIPPED_SCHEMES):
+        return None
+    category, subcategory = folder_location(path)
+    added = format_chromium_time(fields.get('date_added'))
+    return category, subcategory, Bookmark(fields.get('name') or url, url, extra={'added': added} if added else None)
+
+
+def detect_format(path):
+    """按文件内容判断输入格式（见INPUT_FORMATS）"""
+    with open(path, 'rb') as f:
+        head = f.read(64)
+    if head.startswith(b'SQLite format 3\0'):
+        return 'places'
+    if head.lstrip(b'\xef\xbb\xbf \t\r\n').startswith(b'{'):
+        return 'chromium'
+    return 'html'
+
+
+def iter_browser_entries(path, input_format=None, keep_root_folders=False, icon_data=True):
+    """
+    读取浏览器书签，返回(一级分类, 二级分类, 书签)
+
+    Args:
+        path (str): 书签HTML文件、places.sqlite或Bookmarks文件
+        input_format (str): 输入格式（见INPUT_FORMATS），为空时按文件内容判断
+        keep_root_folders, icon_data: 见iter_netscape_entries()；places.sqlite和Bookmarks中没有图标
+    """
+    if input_format is None:
+        input_format = detect_format(path)
+    if input_format == 'places':
+        yield from iter_places_entries(path, keep_root_folders)
+    elif input_format == 'chromium':
+        yield from iter_chromium_entries(path, keep_root_folders)
+    else:
+        with open(path, 'r', encoding='utf-8', errors='replace') as html_file:
+            yield from iter_netscape_entries(html_file, keep_root_folders, icon_data)
+
+
+def group_entries(entries):
+    """
+    把(一级分类, 二级分类, 书签)序列组织为Category列表（与generate_nav.load_bookmarks()的结果相同），
+    分类按首次出现的顺序排列，与write_bookmarks_yaml()写出的顺序一致
+    """
+    categories = {}
+    for category, subcategory, bookmark in entries:
+        subcategories = categories.get(category)
+        if subcategories is None:
+            categories[category] = subcategories = {}
+        bookmarks = subcategories.get(subcategory)
+        if bookmarks is None:
+            subcategories[subcategory] = bookmarks = []
+        bookmarks.append(bookmark)
+    return [
+        Category(category, [Subcategory(name, bookmarks) for name, bookmarks in subcategories.items()])
+        for category, subcategories in categories.items()
+    ]
+
+
+def load_browser_bookmarks(path, input_format=None, keep_root_folders=False, icon_data=True):
+    """读取浏览器书签为models.Category列表，参数见iter_browser_entries()"""
+    return group_entries(iter_browser_entries(path, input_format, keep_root_folders, icon_data))
+
+
+def write_bookmarks_csv(entries, csv_file_path):
+    """
+    把(一级分类, 二级分类, 书签)序列逐行写为CSV书签文件（列为models.CSV_FIELDNAMES，另加添加时间）
+
+    Returns:
+        dict: 统计信息 {'categories', 'subcategories', 'bookmarks'}；没有任何书签时返回None，且不写出文件
+    """
+    csv_file = None
+    categories = set()
+    subcategories = set()
+    total = 0
+    try:
+        for category, subcategory, bookmark in entries:
+            if csv_file is None:
+                csv_file = open(csv_file_path, 'w', newline='', encoding='utf-8-sig')
+                writer = csv.writer(csv_file)
+                writer.writerow(CSV_FIELDNAMES + [CSV_ADDED_FIELD])
+            writer.writerow(bookmark_row(category, subcategory, bookmark, with_added=True))
+            categories.add(category)
+            subcategories.add((category, subcategory))
+            total += 1
+    finally:
+        if csv_file is not None:
+            csv_file.close()
+    if not total:
+        return None
+    return {'categories': len(categories), 'subcategories': len(subcategories), 'bookmarks': total}
+
+
+def import_bookmarks(input_path, output_file_path, input_format=None, keep_root_folders=False, icon_data=True):
+    """
+    把浏览器书签转换为YAML或CSV书签文件（按输出文件扩展名，.csv为CSV，其余为YAML）
+
+    Args:
+        input_path (str): 书签HTML文件、places.sqlite或Bookmarks文件
+        output_file_path (str): 输出的YAML或CSV文件
+        input_format, keep_root_folders, icon_data: 见iter_browser_entries()
+    """
+    try:
+        entries = iter_browser_entries(input_path, input_format, keep_root_folders, icon_data)
+        if output_file_path.lower().endswith('.csv'):
+            with profiling.phase('read_write'):
+                stats = write_bookmarks_csv(entries, output_file_path)
+        else:
+            stats = write_bookmarks_yaml(entries, output_file_path)
+
+        if stats is None:
+            print("未找到书签")
+            return
+
+        profiling.count('bookmarks', stats['bookmarks'])
+        profiling.count('categories', stats['categories'])
+        profiling.count('subcategories', stats['subcategories'])
+        profiling.count('output_bytes', os.path.getsize(output_file_path))
+
+        print(f"导入完成！")
+        print(f"统计信息：")
+        print(f"  - 一级分类: {stats['categories']} 个")
+        print(f"  - 二级分类: {stats['subcategories']} 个")
+        print(f"  - 书签数量: {stats['bookmarks']} 个")
+        print(f"  - 输出文件: {output_file_path}")
+
+    except FileNotFoundError:
+        print(f"错误：找不到书签文件 {input_path}")
+    except sqlite3.DatabaseError as e:
+        print(f"书签库读取错误：{e}（Firefox运行时请先复制places.sqlite）")
+    except JSON_ERRORS as e:
+        print(f"书签文件格式错误：{e}")
+    except Exception as e:
+        print(f"发生未知错误：{e}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='导入浏览器书签：导出的bookmarks.html、Firefox的places.sqlite或Chromium的Bookmarks文件')
+    parser.add_argument('input_file', help='书签HTML文件、places.sqlite或Bookmarks文件（按内容自动识别）')
+    parser.add_argument('output_file', nargs='?', default='bookmarks.yaml',
+                        help='输出的YAML或CSV文件，按扩展名决定格式（默认: bookmarks.yaml）')
+    parser.add_argument('--format', choices=INPUT_FORMATS, help='指定输入格式（默认: 按文件内容识别）')
+    parser.add_argument('--keep-root-folders', action='store_true',
+                        help='书签栏、其他书签等容器文件夹也作为一层分类（默认: 忽略这一层）')
+    parser.add_argument('--no-icon-data', action='store_true',
+                        help='不导入HTML中内嵌的data URI图标，只保留图标地址（ICON_URI）')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
+    with profiling.profile_from_args('bookmark_import', args):
+        import_bookmarks(args.input_file, args.output_file, args.format, args.keep_root_folders,
+                         not args.no_icon_data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite书签库
+以带索引的SQLite数据库保存书签（一级分类、二级分类、书签和标签各为一张表），
+可作为YAML文件之外的另一种数据源：支持与YAML、CSV格式之间的批量导入导出，
+统计和按标签、分类查找都是索引查询，generate_nav.py可以直接以游标逐个分类读取生成页面
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from csv_to_yaml import iter_csv_entries, write_bookmarks_yaml
+from models import CSV_FIELDNAMES, Bookmark, Category, Subcategory, as_categories
+from yaml_cache import iter_yaml_bookmarks
+from yaml_to_csv import bookmark_row
+
+# 书签库文件的扩展名
+STORE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+# 数据库结构版本（保存在user_version中）
+SCHEMA_VERSION = 1
+
+# 批量导入时每批写入的书签数
+IMPORT_BATCH_SIZE = 5000
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_categories_position ON categories(position);
+CREATE INDEX IF NOT EXISTS idx_categories_name ON categories(name);
+
+CREATE TABLE IF NOT EXISTS subcategories (
+    id INTEGER PRIMARY KEY,
+    category_id INTEGER NOT NULL REFERENCES categories(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_subcategories_category ON subcategories(category_id, position);
+CREATE INDEX IF NOT EXISTS idx_subcategories_name ON subcategories(name);
+
+CREATE TABLE IF NOT EXISTS bookmarks (
+    id INTEGER PRIMARY KEY,
+    subcategory_id INTEGER NOT NULL REFERENCES subcategories(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT,
+    url TEXT,
+    icon TEXT,
+    tags TEXT,
+    description TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_bookmarks_subcategory ON bookmarks(subcategory_id, position);
+CREATE INDEX IF NOT EXISTS idx_bookmarks_url ON bookmarks(url);
+
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS bookmark_tags (
+    tag_id INTEGER NOT NULL REFERENCES tags(id) ON DELETE CASCADE,
+    bookmark_id INTEGER NOT NULL REFERENCES bookmarks(id) ON DELETE CASCADE,
+    PRIMARY KEY (tag_id, bookmark_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_bookmark_tags_bookmark ON bookmark_tags(bookmark_id);
+'''
+
+# 按页面顺序读取全部书签；没有二级分类的一级分类、没有书签的二级分类对应的列为NULL
+ORDERED_QUERY = '''
+SELECT c.id, c.name, s.id, s.name, b.id, b.name, b.url, b.icon, b.tags, b.description, b.extra
+FROM categories c
+LEFT JOIN subcategories s ON s.category_id = c.id
+LEFT JOIN bookmarks b ON b.subcategory_id = s.id
+ORDER BY c.position, s.position, b.position
+'''
+
+# 查找书签时返回的列（书签所在的一级分类、二级分类及书签字段）
+_BOOKMARK_SELECT = '''
+SELECT c.name, s.name, b.name, b.url, b.icon, b.tags, b.description, b.extra
+FROM bookmarks b
+JOIN subcategories s ON s.id = b.subcategory_id
+JOIN categories c ON c.id = s.category_id
+'''
+
+
+def is_store_file(path):
+    """按扩展名判断是否为书签库文件"""
+    return str(path).lower().endswith(STORE_SUFFIXES)
+
+
+def _bookmark_from_row(name, url, icon, tags, description, extra):
+    """由数据库行还原书签（models.Bookmark）"""
+    extra = json.loads(extra) if extra is not None else None
+    dead = bool(extra.pop('dead', False)) if extra else False
+    return Bookmark(name, url, icon, description, json.loads(tags) if tags is not None else None, dead, extra or None)
+
+
+def _bookmark_values(bookmark):
+    """把书签（models.Bookmark）拆成(name, url, icon, tags, description, extra)列值"""
+    tags = bookmark.tags
+    extra = dict(bookmark.extra or {})
+    if bookmark.dead:
+        extra['dead'] = True
+    return (
+        bookmark.name,
+        bookmark.url,
+        bookmark.icon,
+        json.dumps(tags, ensure_ascii=False) if tags is not None else None,
+        bookmark.description,
+        json.dumps(extra, ensure_ascii=False, default=str) if extra else None,
+    )
+
+
+class _Importer:
+    """
+    批量导入：分类按首次出现的顺序编号，书签攒够一批后用executemany写入
+
+    内存中只保存分类和标签的编号映射，与书签数量无关。
+    """
+
+    def __init__(self, conn, category_offset=0):
+        self.conn = conn
+        self.category_offset = category_offset
+        self.categories = {}
+        self.category_sizes = {}
+        self.subcategories = {}
+        self.subcategory_sizes = {}
+        self.tags = {}
+        self.pending = []
+        self.pending_tags = []
+        self.count = 0
+        self.next_bookmark_id = (conn.execute('SELECT MAX(id) FROM bookmarks').fetchone()[0] or 0) + 1
+        for tag_id, name in conn.execute('SELECT id, name FROM tags'):
+            self.tags[name] = tag_id
+
+    def category(self, name):
+        category_id = self.categories.get(name)
+        if category_id is None:
+            position = self.category_offset + len(self.categories)
+            category_id = self.conn.execute(
+                'INSERT INTO categories (position, name) VALUES (?, ?)', (position, name)).lastrowid
+            self.categories[name] = category_id
+            self.category_sizes[category_id] = 0
+        return category_id
+
+    def subcategory(self, category_name, name):
+        key = (category_name, name)
+        subcategory_id = self.subcategories.get(key)
+        if subcategory_id is None:
+            category_id = self.category(category_name)
+            position = self.category_sizes[category_id]
+            self.category_sizes[category_id] = position + 1
+            subcategory_id = self.conn.execute(
+                'INSERT INTO subcategories (category_id, position, name) VALUES (?, ?, ?)',
+                (category_id, position, name)).lastrowid
+            self.subcategories[key] = subcategory_id
+            self.subcategory_sizes[subcategory_id] = 0
+        return subcategory_id
+
+    def tag(self, name):
+        tag_id = self.tags.get(name)
+        if tag_id is None:
+            tag_id = self.conn.execute('INSERT INTO tags (name) VALUES (?)', (name,)).lastrowid
+            self.tags[name] = tag_id
+        return tag_id
+
+    def bookmark(self, category_name, subcategory_name, bookmark):
+        bookmark = Bookmark.from_dict(bookmark)
+        subcategory_id = self.subcategory(category_name, subcategory_name)
+        position = self.subcategory_sizes[subcategory_id]
+        self.subcategory_sizes[subcategory_id] = position + 1
+
+        bookmark_id = self.next_bookmark_id
+        self.next_bookmark_id += 1
+        self.pending.append((bookmark_id, subcategory_id, position) + _bookmark_values(bookmark))
+        for tag in dict.fromkeys(bookmark.tags or ()):
+            self.pending_tags.append((self.tag(str(tag)), bookmark_id))
+        self.count += 1
+        if len(self.pending) >= IMPORT_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        self.conn.executemany(
+            'INSERT INTO bookmarks (id, subcategory_id, position, name, url, icon, tags, description, extra) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', self.pending)
+        self.conn.executemany('INSERT OR IGNORE INTO bookmark_tags (tag_id, bookmark_id) VALUES (?, ?)',
+                              self.pending_tags)
+        self.pending = []
+        self.pending_tags = []
+
+
+class StoreCategories:
+    """
+    书签库中一级分类的只读序列，可直接作为generate_html()等函数的bookmarks_data
+
+    每次迭代执行一次按位置排序的查询，以游标逐行读取，每次只在内存中构建一个一级分类；
+    长度和统计信息由索引上的计数查询得到，不遍历书签。
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __iter__(self):
+        return self.store.iter_categories()
+
+    def __len__(self):
+        return self.store.stats()['total_categories']
+
+    def stats(self):
+        """与generate_nav.collect_stats()格式相同的统计信息"""
+        return self.store.stats()
+
+
+class BookmarkStore:
+    """
+    SQLite书签库
+
+    一级分类、二级分类和书签都带有position列，按此列排序即为页面顺序；
+    标签另有tags表和bookmark_tags关联表，按标签查找时走索引。书签的标签列表同时以JSON
+    保存在bookmarks.tags中，读取书签时无需关联查询。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            self.conn.close()
+            raise ValueError(f"书签库版本不受支持: {version}")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    # ---- 导入 ----
+
+    def clear(self):
+        """删除全部书签和分类"""
+        with self.conn:
+            for table in ('bookmark_tags', 'tags', 'bookmarks', 'subcategories', 'categories'):
+                self.conn.execute(f'DELETE FROM {table}')
+
+    def _importer(self):
+        offset = self.conn.execute('SELECT COALESCE(MAX(position) + 1, 0) FROM categories').fetchone()[0]
+        return _Importer(self.conn, offset)
+
+    def import_entries(self, entries, replace=True):
+        """
+        从(一级分类, 二级分类, 书签)序列批量导入，适合流式来源（CSV、iter_yaml_bookmarks）
+
+        Args:
+            entries (iterable): (一级分类, 二级分类, 书签)序列
+            replace (bool): 先清空书签库；为False时接在已有书签之后（同名分类不合并）
+
+        Returns:
+            int: 导入的书签数
+        """
+        if replace:
+            self.clear()
+        with self.conn:
+            importer = self._importer()
+            for category_name, subcategory_name, bookmark in entries:
+                importer.bookmark(category_name, subcategory_name, bookmark)
+            importer.flush()
+        return importer.count
+
+    def import_data(self, bookmarks_data, replace=True):
+        """从已加载的书签数据导入，没有书签的分类也会保留"""
+
+        def entries():
+            for category in as_categories(bookmarks_data):
+                category_name = category.name if category.name is not None else '未分类'
+                importer.category(category_name)
+                for subcategory in category.subcategories or ():
+                    subcategory_name = subcategory.name if subcategory.name is not None else '未命名'
+                    importer.subcategory(category_name, subcategory_name)
+                    for bookmark in subcategory.bookmarks or ():
+                        yield category_name, subcategory_name, bookmark
+
+        if replace:
+            self.clear()
+        with self.conn:
+            importer = self._importer()
+            for category_name, subcategory_name, bookmark in entries():
+                importer.bookmark(category_name, subcategory_name, bookmark)
+            importer.flush()
+        return importer.count
+
+    def import_file(self, path, replace=True):
+        """按扩展名从YAML（流式解析）或CSV文件导入，返回导入的书签数"""
+        if path.lower().endswith('.csv'):
+            with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+                return self.import_entries(iter_csv_entries(f), replace)
+        return self.import_entries(iter_yaml_bookmarks(path), replace)
+
+    # ---- 读取 ----
+
+    def iter_categories(self):
+        """按页面顺序逐个返回一级分类（models.Category，与load_categories()的结果相同）"""
+        category = subcategory = None
+        category_id = subcategory_id = None
+        for row in self.conn.execute(ORDERED_QUERY):
+            if row[0] != category_id:
+                if category is not None:
+                    yield category
+                category_id = row[0]
+                category = Category(row[1], [])
+                subcategory_id = None
+            if row[2] is None:
+                continue
+            if row[2] != subcategory_id:
+                subcategory_id = row[2]
+                subcategory = Subcategory(row[3], [])
+                category.subcategories.append(subcategory)
+            if row[4] is not None:
+                subcategory.bookmarks.append(_bookmark_from_row(*row[5:]))
+        if category is not None:
+            yield category
+
+    def categories(self):
+        """返回可反复迭代的一级分类序列（见StoreCategories）"""
+        return StoreCategories(self)
+
+    def iter_entries(self):
+        """按页面顺序逐个返回(一级分类, 二级分类, 书签)"""
+        for row in self.conn.execute(_BOOKMARK_SELECT + 'ORDER BY c.position, s.position, b.position'):
+            yield row[0], row[1], _bookmark_from_row(*row[2:])
+
+    def count_bookmarks(self):
+        """书签总数"""
+        return self.conn.execute('SELECT COUNT(*) FROM bookmarks').fetchone()[0]
+
+    def stats(self):
+        """与generate_nav.collect_stats()格式相同的统计信息"""
+        return {
+            'total_bookmarks': self.count_bookmarks(),
+            'total_categories': self.conn.execute('SELECT COUNT(*) FROM categories').fetchone()[0],
+            'total_subcategories': self.conn.execute('SELECT COUNT(*) FROM subcategories').fetchone()[0],
+        }
+
+    def bookmarks_by_tag(self, tag):
+        """返回带有指定标签的全部书签，按页面顺序排列，元素为(一级分类, 二级分类, 书签)"""
+        query = _BOOKMARK_SELECT + '''
+            JOIN bookmark_tags bt ON bt.bookmark_id = b.id
+            WHERE bt.tag_id = (SELECT id FROM tags WHERE name = ?)
+            ORDER BY c.position, s.position, b.position
+        '''
+        return [(row[0], row[1], _bookmark_from_row(*row[2:])) for row in self.conn.execute(query, (tag,))]
+
+    def bookmarks_in_category(self, category, subcategory=None):
+        """返回一级分类（或其中某个二级分类）的全部书签，元素为(一级分类, 二级分类, 书签)"""
+        query = _BOOKMARK_SELECT + 'WHERE c.name = ?'
+        params = [category]
+        if subcategory is not None:
+            query += ' AND s.name = ?'
+            params.append(subcategory)
+        query += ' ORDER BY c.position, s.position, b.position'
+        return [(row[0], row[1], _bookmark_from_row(*row[2:])) for row in self.conn.execute(query, params)]
+
+    def bookmarks_by_url(self, url):
+        """返回网址相同的全部书签，元素为(一级分类, 二级分类, 书签)"""
+        query = _BOOKMARK_SELECT + 'WHERE b.url = ? ORDER BY c.position, s.position, b.position'
+        return [(row[0], row[1], _bookmark_from_row(*row[2:])) for row in self.conn.execute(query, (url,))]
+
+    def tag_counts(self):
+        """各标签的书签数，按数量从多到少排列"""
+        return self.conn.execute('''
+            SELECT t.name, COUNT(*) AS n FROM bookmark_tags bt JOIN tags t ON t.id = bt.tag_id
+            GROUP BY bt.tag_id ORDER BY n DESC, t.name
+        ''').fetchall()
+
+    # ---- 导出 ----
+
+    def export_yaml(self, path):
+        """流式导出为YAML书签文件，返回统计信息（没有书签时返回None）"""
+        return write_bookmarks_yaml(self.iter_entries(), path)
+
+    def export_csv(self, path):
+        """流式导出为CSV书签文件，返回导出的书签数"""
+        count = 0
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_FIELDNAMES)
+            for category_name, subcategory_name, bookmark in self.iter_entries():
+                writer.writerow(bookmark_row(category_name, subcategory_name, bookmark))
+                count += 1
+        return count
+
+    def export_file(self, path):
+        """按扩展名导出为YAML或CSV文件，返回导出的书签数"""
+        if path.lower().endswith('.csv'):
+            return self.export_csv(path)
+        stats = self.export_yaml(path)
+        return stats['bookmarks'] if stats else 0
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='SQLite书签库：与YAML/CSV互相导入导出，按标签或分类查询')
+    parser.add_argument('-d', '--db', default='bookmarks.db', help='书签库文件（默认: bookmarks.db）')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help='从YAML或CSV文件导入（默认替换书签库中的全部内容）')
+    import_parser.add_argument('source', help='YAML或CSV书签文件')
+    import_parser.add_argument('--append', action='store_true', help='追加到已有书签之后')
+
+    export_parser = commands.add_parser('export', help='导出为YAML或CSV文件（按扩展名）')
+    export_parser.add_argument('target', help='输出文件')
+
+    commands.add_parser('stats', help='显示统计信息和最常用的标签')
+
+    query_parser = commands.add_parser('query', help='查找书签')
+    query_group = query_parser.add_mutually_exclusive_group(required=True)
+    query_group.add_argument('--tag', help='按标签查找')
+    query_group.add_argument('--category', help='按一级分类查找')
+    query_group.add_argument('--url', help='按网址查找')
+    query_parser.add_argument('--subcategory', help='与--category一起使用，限定二级分类')
+    args = parser.parse_args()
+
+    if args.command == 'import' and not Path(args.source).exists():
+        print(f"❌ 错误: 找不到文件 {args.source}")
+        return
+    if args.command != 'import' and not Path(args.db).exists():
+        print(f"❌ 错误: 找不到书签库 {args.db}")
+        return
+
+    with BookmarkStore(args.db) as store:
+        if args.command == 'import':
+            start = time.perf_counter()
+            count = store.import_file(args.source, replace=not args.append)
+            print(f"✅ 已从 {args.source} 导入 {count} 条书签到 {args.db}，用时 {time.perf_counter() - start:.1f} 秒")
+        elif args.command == 'export':
+            os.makedirs(os.path.dirname(os.path.abspath(args.target)), exist_ok=True)
+            count = store.export_file(args.target)
+            print(f"✅ 已导出 {count} 条书签到 {args.target}")
+        elif args.command == 'stats':
+            stats = store.stats()
+            print(f"📊 统计信息:")
+            print(f"   - 书签总数: {stats['total_bookmarks']}")
+            print(f"   - 一级分类: {stats['total_categories']}")
+            print(f"   - 二级分类: {stats['total_subcategories']}")
+            tags = store.tag_counts()
+            if tags:
+                print(f"   - 常用标签: {', '.join(f'{name}({n})' for name, n in tags[:10])}")
+        else:
+            if args.tag is not None:
+                results = store.bookmarks_by_tag(args.tag)
+            elif args.category is not None:
+                results = store.bookmarks_in_category(args.category, args.subcategory)
+            else:
+                results = store.bookmarks_by_url(args.url)
+            for category_name, subcategory_name, bookmark in results:
+                print(f"{category_name} / {subcategory_name}: {bookmark.name or ''} <{bookmark.url or ''}>")
+            print(f"共 {len(results)} 条")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,95 +1,261 @@
+import argparse
 import csv
-from collections import defaultdict
+import json
+import os
+import struct
+import sys
+import tempfile
+
+import yaml
+
+from models import CSV_ADDED_FIELD, Bookmark, as_categories
+import profiling
+
+# 暂存书签文本时内存缓冲的上限（字符数），超过后写入临时文件
+SPOOL_BUFFER_SIZE = 4 << 20
+
+# 写出YAML时读取暂存文件的块大小
+SPOOL_READ_SIZE = 1 << 20
+
+# 以这些字符开头的值不能作为YAML普通标量
+YAML_INDICATORS = set('-?:,[]{}#&*!|>\'"%@`')
+
+# 判断普通标量会被解析成什么类型（字符串、数字、布尔值等）
+_resolver = yaml.resolver.Resolver()
+_implicit_first_chars = set(yaml.resolver.Resolver.yaml_implicit_resolvers) - {''}
+
+def yaml_scalar(value, flow=False):
+    """
+    把字符串格式化为YAML标量
+
+    能按原样作为普通标量解析回同一字符串时原样输出，否则输出为双引号字符串。
+
+    Args:
+        value (str): 字符串
+        flow (bool): 是否位于流式序列（如标签的[a, b]）中，此时逗号和括号也需要引号
+    """
+    plain = (
+        value
+        and value == value.strip()
+        and value[0] not in YAML_INDICATORS
+        and ': ' not in value and ' #' not in value and not value.endswith(':')
+        and value.isprintable()
+        and not (flow and any(char in value for char in ',[]{}'))
+        and (value[0] not in _implicit_first_chars
+             or _resolver.resolve(yaml.ScalarNode, value, (True, False)) == 'tag:yaml.org,2002:str')
+    )
+    if plain:
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+def format_bookmark(bookmark):
+    """
+    生成单个书签（models.Bookmark）的YAML文本，每行以换行符开头
+
+    Raises:
+        KeyError: 书签缺少name或url
+    """
+    name = bookmark.name
+    url = bookmark.url
+    if name is None or url is None:
+        raise KeyError('name' if name is None else 'url')
+    lines = [
+        f"\n        - name: {yaml_scalar(name)}",
+        f"\n          url: {yaml_scalar(url)}",
+    ]
+    if bookmark.icon:
+        lines.append(f"\n          icon: {yaml_scalar(bookmark.icon)}")
+    if bookmark.tags:
+        # 格式化标签为数组格式
+        tags_str = ", ".join(yaml_scalar(tag, flow=True) for tag in bookmark.tags)
+        lines.append(f"\n          tags: [{tags_str}]")
+    if bookmark.description:
+        lines.append(f"\n          description: {yaml_scalar(bookmark.description)}")
+    added = bookmark.extra.get('added') if bookmark.extra else None
+    if added:
+        lines.append(f"\n          added: {yaml_scalar(str(added))}")
+    return ''.join(lines)
+
+def format_category_header(category, first):
+    """生成一级分类的开头，分类之间空一行"""
+    separator = '' if first else '\n'
+    return f"{separator}\n- category: {yaml_scalar(category)}\n  subcategories:"
+
+def format_subcategory_header(subcategory, first):
+    """生成二级分类的开头，二级分类之间空一行"""
+    separator = '' if first else '\n'
+    return f"{separator}\n    - name: {yaml_scalar(subcategory)}\n      bookmarks:"
+
+class GroupSpool:
+    """
+    按(一级分类, 二级分类)分组暂存书签文本的临时文件
+
+    每个分组的文本先在内存中缓冲，缓冲总量超过SPOOL_BUFFER_SIZE时整段写入临时文件。
+    段头记录该分组下一段的位置和段长，同一分组的各段以链表相连；内存中只保存缓冲和每个分组首段、末段的位置，
+    占用与分组数成正比，与书签数无关。输入已按分组排序时每个分组只有少数几段，写出时基本是顺序读。
+    """
+
+    SEGMENT_HEADER = struct.Struct('<qq')  # 下一段的位置（-1表示没有）, 段长
+    NEXT_POINTER = struct.Struct('<q')
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile()
+        # 分组 -> [首段位置, 末段位置]，尚未写入任何段时为-1
+        self.groups = {}
+        # 一级分类 -> 按首次出现顺序排列的二级分类
+        self.categories = {}
+        self.buffers = {}
+        self.buffered = 0
+        self.end = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.file.close()
+
+    def append(self, category, subcategory, text, separator=''):
+        """追加一个分组中的文本，分组中已有文本时先写入separator"""
+        key = (category, subcategory)
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            if key in self.groups:
+                text = separator + text
+            else:
+                self.groups[key] = [-1, -1]
+                self.categories.setdefault(category, []).append(subcategory)
+            self.buffers[key] = buffer = []
+        else:
+            text = separator + text
+        buffer.append(text)
+        self.buffered += len(text)
+        if self.buffered >= SPOOL_BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        """把所有分组的缓冲各写成一段"""
+        patches = []
+        self.file.seek(self.end)
+        for key, buffer in self.buffers.items():
+            data = ''.join(buffer).encode('utf-8')
+            group = self.groups[key]
+            if group[0] == -1:
+                group[0] = self.end
+            else:
+                # 该分组上一段的"下一段"指向新段
+                patches.append((group[1], self.end))
+            group[1] = self.end
+            self.file.write(self.SEGMENT_HEADER.pack(-1, len(data)))
+            self.file.write(data)
+            self.end += self.SEGMENT_HEADER.size + len(data)
+        for offset, target in patches:
+            self.file.seek(offset)
+            self.file.write(self.NEXT_POINTER.pack(target))
+        self.buffers.clear()
+        self.buffered = 0
+
+    def read_group(self, category, subcategory):
+        """按追加顺序逐块读出一个分组的文本"""
+        offset = self.groups[(category, subcategory)][0]
+        while offset != -1:
+            self.file.seek(offset)
+            offset, length = self.SEGMENT_HEADER.unpack(self.file.read(self.SEGMENT_HEADER.size))
+            while length > 0:
+                chunk = self.file.read(min(length, SPOOL_READ_SIZE))
+                length -= len(chunk)
+                yield chunk.decode('utf-8')
+
+def write_bookmarks_yaml(entries, yaml_file_path):
+    """
+    把(一级分类, 二级分类, 书签)序列流式写为YAML书签文件
+
+    一级分类和二级分类按首次出现的顺序排列，同一分组的书签保持原有顺序。
+    书签文本先暂存到临时文件，内存占用只与分组数有关，耗时与书签数成线性关系。
+    书签为models.Bookmark，也可以是书签字典。
+
+    Returns:
+        dict: 统计信息 {'categories', 'subcategories', 'bookmarks'}；没有任何书签时返回None，且不写出文件
+    """
+    total = 0
+    with GroupSpool() as spool:
+        # 读取来源并格式化书签（流式来源的读取和解析耗时也计入此阶段）
+        with profiling.phase('read_format'):
+            from_dict = Bookmark.from_dict
+            for category, subcategory, bookmark in entries:
+                # 同一二级分类中的书签之间空一行
+                spool.append(category, subcategory, format_bookmark(from_dict(bookmark)), separator='\n')
+                total += 1
+            if not total:
+                return None
+            spool.flush()
+
+        with profiling.phase('write'), open(yaml_file_path, 'w', encoding='utf-8') as yaml_file:
+            # 每行以换行符开头，去掉整个文件开头的那一个
+            for i, (category, subcategories) in enumerate(spool.categories.items()):
+                header = format_category_header(category, i == 0)
+                yaml_file.write(header[1:] if i == 0 else header)
+                for j, subcategory in enumerate(subcategories):
+                    yaml_file.write(format_subcategory_header(subcategory, j == 0))
+                    yaml_file.writelines(spool.read_group(category, subcategory))
+
+        return {
+            'categories': len(spool.categories),
+            'subcategories': len(spool.groups),
+            'bookmarks': total,
+        }
+
+def iter_csv_entries(csv_file):
+    """逐行读取CSV书签，返回(一级分类, 二级分类, 书签)，书签为models.Bookmark，分类名已驻留"""
+    for row in csv.DictReader(csv_file):
+        category = sys.intern(row['一级分类'].strip())
+        subcategory = sys.intern(row['二级分类'].strip())
+
+        # 图标URL、标签和简介只在非空时设置
+        icon_url = (row.get('图标URL') or '').strip() or None
+
+        tags_str = (row.get('标签') or '').strip()
+        # 处理标签字符串，分割成列表并去除空格
+        tags = [tag.strip() for tag in tags_str.split(',')] if tags_str else None
+
+        description = (row.get('简介') or '').strip() or None
+
+        # 可选的添加时间列
+        added = (row.get(CSV_ADDED_FIELD) or '').strip()
+
+        yield category, subcategory, Bookmark(row['网站名称'].strip(), row['网址'].strip(), icon_url, description, tags,
+                                              extra={'added': added} if added else None)
 
 def csv_to_yaml(csv_file_path, yaml_file_path):
     """
     将CSV书签文件转换为YAML格式
-    
+
+    逐行读取CSV并流式写出，不把整个文件读入内存；同一分类的行不必相邻。
+
     Args:
         csv_file_path (str): 输入的CSV文件路径
         yaml_file_path (str): 输出的YAML文件路径
     """
-    
+
     try:
-        # 读取CSV文件
-        with open(csv_file_path, 'r', encoding='utf-8-sig') as csv_file:
-            reader = csv.DictReader(csv_file)
-            csv_data = list(reader)
-        
-        if not csv_data:
+        with open(csv_file_path, 'r', encoding='utf-8-sig', newline='') as csv_file:
+            stats = write_bookmarks_yaml(iter_csv_entries(csv_file), yaml_file_path)
+
+        if stats is None:
             print("CSV文件为空")
             return
-        
-        # 构建层级数据结构
-        yaml_data = []
-        
-        # 使用嵌套的defaultdict来组织数据
-        category_structure = defaultdict(lambda: defaultdict(list))
-        
-        for row in csv_data:
-            category = row['一级分类'].strip()
-            subcategory = row['二级分类'].strip()
-            
-            # 构建书签对象
-            bookmark = {
-                'name': row['网站名称'].strip(),
-                'url': row['网址'].strip()
-            }
-            
-            # 添加图标URL（如果存在且非空）
-            icon_url = row.get('图标URL', '').strip()
-            if icon_url:
-                bookmark['icon'] = icon_url
-            
-            # 添加标签（如果存在且非空）
-            tags_str = row.get('标签', '').strip()
-            if tags_str:
-                # 处理标签字符串，分割成列表并去除空格
-                tags = [tag.strip() for tag in tags_str.split(',')]
-                bookmark['tags'] = tags
-            
-            # 添加简介（如果存在且非空）
-            description = row.get('简介', '').strip()
-            if description:
-                bookmark['description'] = description
-            
-            # 添加到数据结构中
-            category_structure[category][subcategory].append(bookmark)
-        
-        # 转换为YAML所需的格式
-        for category, subcategories in category_structure.items():
-            category_data = {
-                'category': category,
-                'subcategories': []
-            }
-            
-            for subcategory_name, bookmarks in subcategories.items():
-                subcategory_data = {
-                    'name': subcategory_name,
-                    'bookmarks': bookmarks
-                }
-                category_data['subcategories'].append(subcategory_data)
-            
-            yaml_data.append(category_data)
-        
-        # 写入YAML文件，使用自定义格式器来获得更好的输出格式
-        with open(yaml_file_path, 'w', encoding='utf-8') as yaml_file:
-            yaml_file.write(generate_formatted_yaml(yaml_data))
-        
-        # 统计信息
-        stats = {
-            'categories': len(yaml_data),
-            'subcategories': sum(len(cat['subcategories']) for cat in yaml_data),
-            'bookmarks': sum(len(sub['bookmarks']) for cat in yaml_data for sub in cat['subcategories'])
-        }
-        
+
+        profiling.count('bookmarks', stats['bookmarks'])
+        profiling.count('categories', stats['categories'])
+        profiling.count('subcategories', stats['subcategories'])
+        profiling.count('output_bytes', os.path.getsize(yaml_file_path))
+
         print(f"转换完成！")
         print(f"统计信息：")
         print(f"  - 一级分类: {stats['categories']} 个")
         print(f"  - 二级分类: {stats['subcategories']} 个")
         print(f"  - 书签数量: {stats['bookmarks']} 个")
         print(f"  - 输出文件: {yaml_file_path}")
-        
+
     except FileNotFoundError:
         print(f"错误：找不到CSV文件 {csv_file_path}")
     except KeyError as e:
@@ -98,54 +264,34 @@ def csv_to_yaml(csv_file_path, yaml_file_path):
         print(f"发生未知错误：{e}")
 
 def generate_formatted_yaml(data):
-    """生成格式化的YAML内容"""
-    lines = []
-    
-    for category in data:
-        lines.append(f"- category: {category['category']}")
-        lines.append("  subcategories:")
-        
-        for subcategory in category['subcategories']:
-            lines.append(f"    - name: {subcategory['name']}")
-            lines.append("      bookmarks:")
-            
-            for bookmark in subcategory['bookmarks']:
-                lines.append(f"        - name: {bookmark['name']}")
-                lines.append(f"          url: {bookmark['url']}")
-                
-                if 'icon' in bookmark:
-                    lines.append(f"          icon: {bookmark['icon']}")
-                
-                if 'tags' in bookmark and bookmark['tags']:
-                    # 格式化标签为数组格式
-                    tags_str = ", ".join(bookmark['tags'])
-                    lines.append(f"          tags: [{tags_str}]")
-                
-                if 'description' in bookmark:
-                    lines.append(f"          description: {bookmark['description']}")
-                
-                # 在每个书签之间添加空行（除了最后一个）
-                if bookmark != subcategory['bookmarks'][-1]:
-                    lines.append("")
-            
-            # 在每个二级分类之间添加空行（除了最后一个）
-            if subcategory != category['subcategories'][-1]:
-                lines.append("")
-        
-        # 在每个一级分类之间添加空行（除了最后一个）
-        if category != data[-1]:
-            lines.append("")
-    
-    return "\n".join(lines)
+    """生成格式化的YAML内容（数据已在内存中时使用，格式与write_bookmarks_yaml相同）"""
+    parts = []
+
+    for i, category in enumerate(as_categories(data)):
+        parts.append(format_category_header(category.name, i == 0))
+
+        for j, subcategory in enumerate(category.subcategories):
+            parts.append(format_subcategory_header(subcategory.name, j == 0))
+
+            for k, bookmark in enumerate(subcategory.bookmarks):
+                # 在每个书签之间添加空行
+                if k:
+                    parts.append("\n")
+                parts.append(format_bookmark(bookmark))
+
+    return "".join(parts)[1:]
 
 def main():
     """主函数"""
-    # 文件路径配置
-    csv_file = 'bookmarks.csv'    # 输入的CSV文件
-    yaml_file = 'bookmarks.yaml'  # 输出的YAML文件
-    
+    parser = argparse.ArgumentParser(description='将CSV书签文件转换为YAML格式')
+    parser.add_argument('csv_file', nargs='?', default='bookmarks.csv', help='输入的CSV文件（默认: bookmarks.csv）')
+    parser.add_argument('yaml_file', nargs='?', default='bookmarks.yaml', help='输出的YAML文件（默认: bookmarks.yaml）')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
     # 执行转换
-    csv_to_yaml(csv_file, yaml_file)
+    with profiling.profile_from_args('csv_to_yaml', args):
+        csv_to_yaml(args.csv_file, args.yaml_file)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+书签去重
+把网址规范化后在一次哈希表遍历中找出重复的书签（如https://github.com与http://github.com/），
+并用MinHash/LSH找出名称和简介相近的书签；生成合并报告，或直接写出合并后的书签文件。
+耗时与书签数近似成线性关系，不做两两比较
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import time
+import unicodedata
+import zlib
+from array import array
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from bookmark_store import BookmarkStore, is_store_file
+from csv_to_yaml import iter_csv_entries, write_bookmarks_yaml
+from yaml_cache import iter_yaml_bookmarks
+
+# 视为相同的协议（规范化后省略）
+WEB_SCHEMES = {'', 'http', 'https'}
+
+# 默认端口（规范化后省略）
+DEFAULT_PORTS = {80, 443}
+
+# 跟踪参数，规范化时去掉
+TRACKING_PARAMS = {'fbclid', 'gclid', 'msclkid', 'spm', 'yclid', '_hsenc', '_hsmi'}
+TRACKING_PREFIXES = ('utm_',)
+
+# MinHash签名长度（分桶数，须为2的幂）和LSH的分段方式：BANDS段，每段ROWS个值
+NUM_HASHES = 32
+BANDS = 8
+ROWS = NUM_HASHES // BANDS
+
+# 每个书签与同一LSH桶中之前的至多这么多个书签比较：成员不超过BUCKET_WINDOW + 1个的桶即两两比较，
+# 更大的桶（名称、简介套用同一格式的大量书签）比较次数仍与成员数成线性关系
+BUCKET_WINDOW = 8
+
+# 签名中相同值的比例达到此值时视为相近
+DEFAULT_THRESHOLD = 0.7
+
+# 文本切分为此长度的字符片段（对中文和英文都适用）
+SHINGLE_SIZE = 3
+
+# 32位哈希值的高位为桶号
+_VALUE_BITS = 32 - (NUM_HASHES.bit_length() - 1)
+
+# 打包的签名中每个值的最低位，以及一段（ROWS个值）所占的位
+_LANE_MASK = sum(1 << (32 * i) for i in range(NUM_HASHES))
+_BAND_MASK = (1 << (32 * ROWS)) - 1
+
+# 统计整数中为1的位数（Python 3.10起有int.bit_count）
+_bit_count = getattr(int, 'bit_count', None) or (lambda value: bin(value).count('1'))
+
+# 不带"//"的协议前缀（如mailto:、data:），冒号后是数字时为端口而非协议
+_SCHEME_RE = re.compile(r'([a-z][a-z0-9+.-]*):(?!\d)', re.I)
+
+# 规范化文本时去掉的字符：空白和标点
+_NOISE_RE = re.compile(r'[\W_]+')
+
+# 报告字段
+REPORT_FIELDS = ['group', 'kind', 'similarity', 'category', 'subcategory', 'name', 'url', 'canonical_url']
+
+
+def canonical_url(url):
+    """
+    规范化网址：http与https视为相同，主机名小写并去掉www.前缀和默认端口，
+    去掉路径末尾的"/"、跟踪参数和普通锚点（保留"#/"、"#!"形式的前端路由），其余查询参数按名称排序
+
+    非网页协议（如mailto:、data:）的网址原样返回（协议名小写）。
+    """
+    url = (url or '').strip()
+    if not url:
+        return ''
+    if '://' not in url and not url.startswith('//'):
+        match = _SCHEME_RE.match(url)
+        if match:
+            return f"{match.group(1).lower()}:{url[match.end():]}"
+        # 省略了协议的网址，如github.com
+        url = f"//{url}"
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in WEB_SCHEMES:
+        return f"{scheme}:{url.split(':', 1)[1]}"
+
+    host = (parts.hostname or '').rstrip('.')
+    try:
+        host = host.encode('idna').decode('ascii')
+    except UnicodeError:
+        pass
+    if host.startswith('www.'):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port is None or port in DEFAULT_PORTS else f"{host}:{port}"
+
+    path = parts.path.rstrip('/')
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PREFIXES)
+    )
+    canonical = netloc + path
+    if query:
+        canonical += '?' + urlencode(query)
+    if parts.fragment.startswith(('/', '!')):
+        canonical += '#' + parts.fragment
+    return canonical
+
+
+def normalize_text(text):
+    """用于相似度比较的文本：NFKC规范化、小写，去掉空白和标点"""
+    return _NOISE_RE.sub('', unicodedata.normalize('NFKC', text).lower())
+
+
+def bookmark_text(bookmark):
+    """书签（models.Bookmark）参与相近比较的文本（名称和简介）"""
+    return normalize_text(f"{bookmark.name or ''} {bookmark.description or ''}")
+
+
+def minhash(text):
+    """
+    计算文本的MinHash签名（单次哈希的分桶MinHash）
+
+    每个字符片段只哈希一次：高位决定落入哪个桶，桶内取最小的哈希值，一次遍历得到NUM_HASHES个值；
+    空桶依次借用后面第一个非空桶的值（加上距离以示区别）。
+
+    Returns:
+        array: NUM_HASHES个无符号整数，文本为空时返回None
+    """
+    if not text:
+        return None
+    # 以定宽编码切片，每个片段不必单独编码
+    data = text.encode('utf-32-le')
+    width = 4 * SHINGLE_SIZE
+    if len(data) <= width:
+        shingles = {data}
+    else:
+        shingles = {data[i:i + width] for i in range(0, len(data) - width + 4, 4)}
+
+    hashes = sorted([(zlib.crc32(shingle) * 0x9E3779B1) & 0xFFFFFFFF for shingle in shingles], reverse=True)
+    # 从大到小写入，每个桶最终留下最小的哈希值
+    lowest = {h >> _VALUE_BITS: h for h in hashes}
+    if len(lowest) == NUM_HASHES:
+        return array('I', [lowest[i] for i in range(NUM_HASHES)])
+
+    signature = array('I', bytes(4 * NUM_HASHES))
+    for i in range(NUM_HASHES):
+        h = lowest.get(i)
+        if h is None:
+            for distance in range(1, NUM_HASHES):
+                h = lowest.get((i + distance) % NUM_HASHES)
+                if h is not None:
+                    h = (h + (distance << _VALUE_BITS)) & 0xFFFFFFFF
+                    break
+        signature[i] = h
+    return signature
+
+
+def similarity(a, b):
+    """两个签名中相同值的比例（Jaccard相似度的估计）"""
+    return sum(x == y for x, y in zip(a, b)) / NUM_HASHES
+
+
+def pack_signature(signature):
+    """把签名打包为一个整数（每个值占32位），用于packed_similarity()"""
+    return int.from_bytes(signature.tobytes(), 'little')
+
+
+def packed_similarity(a, b):
+    """
+    同similarity()，签名为pack_signature()的结果
+
+    两个整数按位异或后，相同的值对应的32位段为0；把每段的各位或到段的最低位，数出非0的段。
+    """
+    diff = a ^ b
+    for shift in (1, 2, 4, 8, 16):
+        diff |= diff >> shift
+    return (NUM_HASHES - _bit_count(diff & _LANE_MASK)) / NUM_HASHES
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        parent = self.parent
+        root = item
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while item != root:
+            parent[item], item = root, parent.get(item, item)
+        return root
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            if b < a:
+                a, b = b, a
+            self.parent[b] = a
+
+
+def find_exact_duplicates(entries):
+    """
+    一次遍历按规范化网址分组
+
+    Args:
+        entries (list): (一级分类, 二级分类, 书签)列表
+
+    Returns:
+        list: 重复组，每组为按出现顺序排列的编号列表（至少两个），组按首个编号排序
+    """
+    groups = {}
+    for i, (_, _, bookmark) in enumerate(entries):
+        key = canonical_url(bookmark.url)
+        if key:
+            groups.setdefault(key, []).append(i)
+    return [ids for ids in groups.values() if len(ids) > 1]
+
+
+def find_near_duplicates(entries, threshold=DEFAULT_THRESHOLD, exact_groups=()):
+    """
+    用MinHash/LSH找出名称和简介相近的书签
+
+    签名分为BANDS段，任一段完全相同的书签进入同一个桶；新成员与桶中之前的成员（大桶中为最近的
+    BUCKET_WINDOW个）逐个比较，已在同一组中的不再比较，相近的书签用并查集合并成组。
+    比较次数与书签数成线性关系。网址规范化后相同的书签已由find_exact_duplicates()处理，这里不再报告。
+
+    Returns:
+        list: 相近组，每组为(编号列表, 组内相近书签对的最低相似度)
+    """
+    url_group = {}
+    for group_id, ids in enumerate(exact_groups):
+        for i in ids:
+            url_group[i] = group_id
+
+    signatures = []
+    for _, _, bookmark in entries:
+        signature = minhash(bookmark_text(bookmark))
+        signatures.append(None if signature is None else pack_signature(signature))
+
+    # 逐段建桶，同一时刻只保留一段的桶；候选对立即验证，已在同一组中的书签不再比较
+    union_find = _UnionFind()
+    scores = {}
+    for band in range(BANDS):
+        buckets = {}
+        shift = band * ROWS * 32
+        for i, signature in enumerate(signatures):
+            if signature is None:
+                continue
+            members = buckets.setdefault(signature >> shift & _BAND_MASK, [])
+            root = union_find.find(i)
+            group = url_group.get(i)
+            for j in members[-BUCKET_WINDOW:]:
+                if union_find.find(j) == root:
+                    continue
+                if group is not None and url_group.get(j) == group:
+                    continue
+                score = packed_similarity(signatures[j], signature)
+                if score >= threshold:
+                    union_find.union(j, i)
+                    root = union_find.find(i)
+                    scores[(j, i)] = score
+            members.append(i)
+
+    groups = {}
+    for (a, b), score in scores.items():
+        root = union_find.find(a)
+        ids, low = groups.get(root, (set(), 1.0))
+        ids.update((a, b))
+        groups[root] = (ids, min(low, score))
+    return sorted(((sorted(ids), low) for ids, low in groups.values()), key=lambda group: group[0][0])
+
+
+def load_entries(source):
+    """按扩展名从YAML（流式解析）、CSV或SQLite书签库读取(一级分类, 二级分类, 书签)列表，书签为models.Bookmark"""
+    if is_store_file(source):
+        with BookmarkStore(source) as store:
+            return list(store.iter_entries())
+    if source.lower().endswith('.csv'):
+        with open(source, 'r', encoding='utf-8-sig', newline='') as f:
+            return list(iter_csv_entries(f))
+    return list(iter_yaml_bookmarks(source))
+
+
+def build_report(entries, exact_groups, near_groups):
+    """把重复组展开为报告行，同组的行带有相同的组号"""
+    rows = []
+    groups = [('exact', ids, 1.0) for ids in exact_groups] + [('near', ids, low) for ids, low in near_groups]
+    for group, (kind, ids, score) in enumerate(groups, 1):
+        for i in ids:
+            category_name, subcategory_name, bookmark = entries[i]
+            rows.append({
+                'group': group,
+                'kind': kind,
+                'similarity': round(score, 3),
+                'category': category_name,
+                'subcategory': subcategory_name,
+                'name': bookmark.name,
+                'url': bookmark.url,
+                'canonical_url': canonical_url(bookmark.url),
+            })
+    return rows
+
+
+def write_report(rows, report_file):
+    """按扩展名把报告写成CSV或JSON"""
+    if report_file.lower().endswith('.csv'):
+        with open(report_file, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        groups = {}
+        for row in rows:
+            groups.setdefault(row['group'], []).append(row)
+        summary = {
+            'exact_groups': sum(1 for members in groups.values() if members[0]['kind'] == 'exact'),
+            'near_groups': sum(1 for members in groups.values() if members[0]['kind'] == 'near'),
+        }
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'groups': [
+                {'kind': members[0]['kind'], 'similarity': members[0]['similarity'], 'bookmarks': [
+                    {key: row[key] for key in ('category', 'subcategory', 'name', 'url', 'canonical_url')}
+                    for row in members
+                ]}
+                for members in groups.values()
+            ]}, f, ensure_ascii=False, indent=2)
+
+
+def merge_bookmarks(first, other):
+    """把重复书签合并到第一次出现的书签：标签取并集，缺少的字段从后者补全，返回新的models.Bookmark"""
+    changes = {
+        attr: getattr(other, attr) for attr in ('name', 'url', 'icon', 'description')
+        if not getattr(first, attr) and getattr(other, attr)
+    }
+    if other.tags is not None:
+        changes['tags'] = tuple(dict.fromkeys(tuple(first.tags or ()) + tuple(other.tags)))
+    if other.dead:
+        changes['dead'] = True
+    if other.extra:
+        extra = dict(first.extra or {})
+        for key, value in other.extra.items():
+            if not extra.get(key) and value:
+                extra[key] = value
+        changes['extra'] = extra or None
+    return first.replace(**changes)
+
+
+def merge_exact_duplicates(entries, exact_groups):
+    """
+    合并网址重复的书签：保留第一次出现的位置，其余删除
+
+    Returns:
+        list: 合并后的(一级分类, 二级分类, 书签)列表
+    """
+    merged = {}
+    removed = set()
+    for ids in exact_groups:
+        first = ids[0]
+        bookmark = entries[first][2]
+        for i in ids[1:]:
+            bookmark = merge_bookmarks(bookmark, entries[i][2])
+            removed.add(i)
+        merged[first] = bookmark
+    return [
+        (category_name, subcategory_name, merged.get(i, bookmark))
+        for i, (category_name, subcategory_name, bookmark) in enumerate(entries)
+        if i not in removed
+    ]
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='找出网址重复和名称、简介相近的书签，生成合并报告或合并后的书签文件')
+    parser.add_argument('source', nargs='?', default='bookmarks.yaml',
+                        help='YAML、CSV书签文件或SQLite书签库（默认: bookmarks.yaml）')
+    parser.add_argument('-o', '--report', default='dedup_report.json',
+                        help='合并报告，扩展名为.csv时输出CSV，否则输出JSON（默认: dedup_report.json）')
+    parser.add_argument('--merge', metavar='YAML', help='把网址重复的书签合并后写出到此YAML文件（相近书签只在报告中列出）')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'相近书签的相似度阈值（默认: {DEFAULT_THRESHOLD}）')
+    parser.add_argument('--no-near', action='store_true', help='只查找网址重复的书签')
+    args = parser.parse_args()
+
+    if not Path(args.source).exists():
+        print(f"❌ 错误: 找不到文件 {args.source}")
+        return
+
+    start = time.perf_counter()
+    entries = load_entries(args.source)
+    exact_groups = find_exact_duplicates(entries)
+    near_groups = [] if args.no_near else find_near_duplicates(entries, args.threshold, exact_groups)
+    elapsed = time.perf_counter() - start
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+    write_report(build_report(entries, exact_groups, near_groups), args.report)
+    print(f"✅ 检查了 {len(entries)} 条书签，用时 {elapsed:.1f} 秒，报告已写入: {args.report}")
+    print(f"   - 网址重复: {len(exact_groups)} 组，{sum(len(ids) - 1 for ids in exact_groups)} 条可合并")
+    print(f"   - 内容相近: {len(near_groups)} 组")
+
+    if args.merge:
+        stats = write_bookmarks_yaml(merge_exact_duplicates(entries, exact_groups), args.merge)
+        print(f"🔀 合并后的书签已写入: {args.merge}（{stats['bookmarks'] if stats else 0} 条）")
+
+
+if __name__ == '__main__':
+    main()
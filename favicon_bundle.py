@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线图标打包
+从本地图标缓存目录读取每个书签的图标，按内容哈希去重后生成共享的CSS类（data URI），
+页面加载图标时不再向第三方站点发起任何请求
+"""
+
+import base64
+import binascii
+import hashlib
+import os
+from urllib.parse import unquote_to_bytes, urlsplit
+
+from models import as_categories, iter_bookmarks
+
+# 默认图标缓存目录
+ICON_CACHE_DIR = 'icon_cache'
+
+# 图标CSS类名前缀
+ICON_CLASS_PREFIX = 'fi-'
+
+# 超过此大小的图标不内嵌，避免页面体积膨胀
+MAX_ICON_BYTES = 64 * 1024
+
+
+def icon_cache_file(cache_dir, icon_url):
+    """返回图标URL在缓存目录中对应的文件路径"""
+    name = hashlib.sha256(icon_url.encode('utf-8')).hexdigest()[:32]
+    return os.path.join(cache_dir, name)
+
+
+def favicon_url(page_url):
+    """由网页地址推导站点根目录下的/favicon.ico地址，非http(s)地址返回None"""
+    parts = urlsplit(page_url)
+    if parts.scheme not in ('http', 'https') or not parts.netloc:
+        return None
+    return f"{parts.scheme}://{parts.netloc}/favicon.ico"
+
+
+def icon_url_for(bookmark):
+    """书签的图标地址：优先使用icon字段，没有时使用由url推导的/favicon.ico"""
+    return bookmark.icon or favicon_url(bookmark.url or '')
+
+
+def sniff_mime(content):
+    """根据文件头判断图片类型，无法识别时返回None"""
+    if content.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if content.startswith(b'\x00\x00\x01\x00'):
+        return 'image/x-icon'
+    if content.startswith((b'GIF87a', b'GIF89a')):
+        return 'image/gif'
+    if content.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if content.startswith(b'RIFF') and content[8:12] == b'WEBP':
+        return 'image/webp'
+    head = content[:512].lstrip().lower()
+    if head.startswith(b'<svg') or (head.startswith(b'<?xml') and b'<svg' in head):
+        return 'image/svg+xml'
+    return None
+
+
+def decode_data_uri(uri):
+    """解析data URI，返回内容字节；格式不正确时返回None"""
+    header, sep, payload = uri.partition(',')
+    if not sep:
+        return None
+    try:
+        if header.endswith(';base64'):
+            return base64.b64decode(payload)
+        return unquote_to_bytes(payload)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def read_icon(cache_dir, icon_url):
+    """
+    读取图标内容
+
+    data URI直接解码，其他URL从缓存目录读取。
+
+    Returns:
+        tuple: (MIME类型, 内容字节)，图标不可用时返回None
+    """
+    if icon_url.startswith('data:'):
+        content = decode_data_uri(icon_url)
+    else:
+        try:
+            with open(icon_cache_file(cache_dir, icon_url), 'rb') as f:
+                content = f.read(MAX_ICON_BYTES + 1)
+        except OSError:
+            return None
+
+    if not content or len(content) > MAX_ICON_BYTES:
+        return None
+    mime = sniff_mime(content)
+    if mime is None:
+        return None
+    return mime, content
+
+
+class IconBundle:
+    """
+    去重后的内嵌图标集合
+
+    classes把图标URL（见icon_url_for）映射到CSS类名，内容相同的图标共用同一个类；
+    missing记录缓存中没有可用图片的图标URL。
+    """
+
+    def __init__(self):
+        self.classes = {}
+        self.missing = set()
+        self._styles = {}
+
+    def add(self, icon_url, mime, content):
+        """加入一个图标，返回其CSS类名"""
+        digest = hashlib.sha256(content).hexdigest()
+        class_name = f"{ICON_CLASS_PREFIX}{digest[:10]}"
+        if class_name not in self._styles:
+            encoded = base64.b64encode(content).decode('ascii')
+            self._styles[class_name] = f"data:{mime};base64,{encoded}"
+        self.classes[icon_url] = class_name
+        return class_name
+
+    @property
+    def unique_count(self):
+        """去重后的图标数量"""
+        return len(self._styles)
+
+    def fingerprint(self):
+        """图标映射的指纹，映射变化时已缓存的页面片段随之失效"""
+        items = sorted(self.classes.items())
+        return hashlib.blake2b(repr(items).encode('utf-8'), digest_size=16).hexdigest()
+
+    def css(self):
+        """生成所有图标类的CSS规则"""
+        return '\n'.join(
+            f'        .{class_name} {{ background-image: url("{uri}"); }}'
+            for class_name, uri in sorted(self._styles.items())
+        )
+
+
+def build_icon_bundle(bookmarks_data, cache_dir=ICON_CACHE_DIR):
+    """
+    为所有书签的图标构建内嵌图标集合
+
+    Args:
+        bookmarks_data (list): 书签数据
+        cache_dir (str): 图标缓存目录，文件名为图标URL的SHA-256前缀（见icon_cache_file）
+    """
+    bundle = IconBundle()
+    for bookmark in iter_bookmarks(as_categories(bookmarks_data)):
+        icon_url = icon_url_for(bookmark)
+        if not icon_url or icon_url in bundle.classes or icon_url in bundle.missing:
+            continue
+        icon = read_icon(cache_dir, icon_url)
+        if icon is None:
+            bundle.missing.add(icon_url)
+        else:
+            bundle.add(icon_url, *icon)
+    return bundle
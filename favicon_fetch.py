@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并发图标抓取
+为每个书签下载图标（icon字段，或由url推导的/favicon.ico）到本地图标缓存目录，
+供generate_nav.py --bundle-icons内嵌使用。
+
+缓存带有ETag/Last-Modified，过期后以条件请求重新验证，未变化的图标只需一次304响应；
+长期未被验证的缓存条目会被淘汰。
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from favicon_bundle import ICON_CACHE_DIR, MAX_ICON_BYTES, icon_cache_file, icon_url_for, sniff_mime
+from http_pool import REQUEST_ERRORS, HttpClient, interleave_by_host
+from models import as_categories, iter_bookmarks
+from yaml_cache import load_categories
+
+# 缓存的图标在此时间内视为新鲜，不发起任何请求
+DEFAULT_TTL = 7 * 24 * 3600
+
+# 抓取失败的结果在此时间内不再重试
+DEFAULT_ERROR_TTL = 24 * 3600
+
+# 超过此时间未被验证的缓存条目会被淘汰
+DEFAULT_EVICT_AGE = 30 * 24 * 3600
+
+# 元数据文件后缀（与图标内容文件同名）
+META_SUFFIX = '.json'
+
+
+def read_meta(meta_file):
+    """读取缓存条目的元数据，不存在或已损坏时返回None"""
+    try:
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path, data, mode='wb'):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    encoding = None if 'b' in mode else 'utf-8'
+    with open(tmp_path, mode, encoding=encoding) as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_meta(meta_file, meta):
+    """原子地写入缓存条目的元数据"""
+    _write_atomic(meta_file, json.dumps(meta, ensure_ascii=False), mode='w')
+
+
+def fetch_icon(client, cache_dir, icon_url, ttl=DEFAULT_TTL, error_ttl=DEFAULT_ERROR_TTL, now=None):
+    """
+    抓取单个图标并更新缓存
+
+    Returns:
+        str: 'fresh'（缓存未过期，未请求）、'not_modified'（304）、'fetched'（下载了新内容）或'failed'
+    """
+    now = time.time() if now is None else now
+    content_file = icon_cache_file(cache_dir, icon_url)
+    meta_file = content_file + META_SUFFIX
+    meta = read_meta(meta_file)
+
+    if meta and now - meta.get('checked_at', 0) < (ttl if meta.get('ok') else error_ttl):
+        return 'fresh'
+
+    headers = {}
+    if meta and meta.get('ok') and os.path.exists(content_file):
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    try:
+        response = client.request('GET', icon_url, headers, max_bytes=MAX_ICON_BYTES)
+    except REQUEST_ERRORS as e:
+        write_meta(meta_file, {'url': icon_url, 'ok': False, 'error': str(e) or type(e).__name__, 'checked_at': now})
+        return 'failed'
+
+    if response.status == 304 and headers:
+        meta['checked_at'] = now
+        write_meta(meta_file, meta)
+        return 'not_modified'
+
+    body = response.body
+    if response.status == 200 and body and len(body) <= MAX_ICON_BYTES and sniff_mime(body):
+        _write_atomic(content_file, body)
+        write_meta(meta_file, {
+            'url': icon_url,
+            'ok': True,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'checked_at': now,
+        })
+        return 'fetched'
+
+    # 非图片内容（常见于返回HTML错误页的/favicon.ico）、过大或状态码异常
+    if response.status != 200:
+        error = f"HTTP {response.status}"
+    elif len(body) > MAX_ICON_BYTES:
+        error = '图标过大'
+    else:
+        error = '不是图片'
+    if os.path.exists(content_file):
+        os.remove(content_file)
+    write_meta(meta_file, {'url': icon_url, 'ok': False, 'error': error, 'checked_at': now})
+    return 'failed'
+
+
+def evict_cache(cache_dir, max_age=DEFAULT_EVICT_AGE, now=None):
+    """淘汰超过max_age未被验证的缓存条目，返回淘汰的条目数"""
+    now = time.time() if now is None else now
+    evicted = 0
+    if not os.path.isdir(cache_dir):
+        return evicted
+    for name in os.listdir(cache_dir):
+        if not name.endswith(META_SUFFIX):
+            continue
+        meta_file = os.path.join(cache_dir, name)
+        meta = read_meta(meta_file)
+        if meta is not None and now - meta.get('checked_at', 0) <= max_age:
+            continue
+        content_file = meta_file[:-len(META_SUFFIX)]
+        for path in (content_file, meta_file):
+            if os.path.exists(path):
+                os.remove(path)
+        evicted += 1
+    return evicted
+
+
+def fetch_icons(bookmarks_data, cache_dir=ICON_CACHE_DIR, workers=32, per_host=4, timeout=10,
+                ttl=DEFAULT_TTL, error_ttl=DEFAULT_ERROR_TTL):
+    """
+    并发抓取所有书签的图标
+
+    Args:
+        bookmarks_data (list): 书签数据
+        cache_dir (str): 图标缓存目录
+        workers (int): 并发线程数
+        per_host (int): 每个站点同时进行的请求数上限
+        timeout (float): 单次请求超时（秒）
+        ttl (float): 成功结果的新鲜期（秒）
+        error_ttl (float): 失败结果的重试间隔（秒）
+
+    Returns:
+        Counter: 各结果（见fetch_icon）的数量，另含连接数'connections'
+    """
+    urls = {icon_url_for(bookmark) for bookmark in iter_bookmarks(as_categories(bookmarks_data))}
+    urls = interleave_by_host(sorted(url for url in urls if url and not url.startswith('data:')))
+    os.makedirs(cache_dir, exist_ok=True)
+
+    now = time.time()
+    results = Counter()
+    with HttpClient(per_host=per_host, timeout=timeout) as client:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for result in executor.map(lambda url: fetch_icon(client, cache_dir, url, ttl, error_ttl, now), urls):
+                results[result] += 1
+        results['connections'] = client.connections_opened
+    return results
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='并发下载书签图标到本地图标缓存目录')
+    parser.add_argument('yaml_file', nargs='?', default='bookmarks.yaml', help='书签YAML文件（默认: bookmarks.yaml）')
+    parser.add_argument('--cache-dir', default=ICON_CACHE_DIR, help=f'图标缓存目录（默认: {ICON_CACHE_DIR}）')
+    parser.add_argument('--workers', type=int, default=32, help='并发线程数（默认: 32）')
+    parser.add_argument('--per-host', type=int, default=4, help='每个站点的并发请求上限（默认: 4）')
+    parser.add_argument('--timeout', type=float, default=10, help='请求超时秒数（默认: 10）')
+    parser.add_argument('--ttl-days', type=float, default=DEFAULT_TTL / 86400, help='缓存新鲜期天数（默认: 7）')
+    parser.add_argument('--evict-days', type=float, default=DEFAULT_EVICT_AGE / 86400,
+                        help='淘汰超过此天数未验证的缓存条目（默认: 30）')
+    args = parser.parse_args()
+
+    if not Path(args.yaml_file).exists():
+        print(f"❌ 错误: 找不到文件 {args.yaml_file}")
+        return
+
+    bookmarks_data = load_categories(args.yaml_file)
+    print(f"🌐 正在抓取图标到 {args.cache_dir} ...")
+    start = time.perf_counter()
+    results = fetch_icons(bookmarks_data, args.cache_dir, args.workers, args.per_host, args.timeout,
+                          ttl=args.ttl_days * 86400)
+    evicted = evict_cache(args.cache_dir, args.evict_days * 86400)
+    elapsed = time.perf_counter() - start
+
+    print(f"✅ 完成，用时 {elapsed:.1f} 秒")
+    print(f"   - 新下载: {results['fetched']}")
+    print(f"   - 未变化(304): {results['not_modified']}")
+    print(f"   - 缓存未过期: {results['fresh']}")
+    print(f"   - 失败: {results['failed']}")
+    print(f"   - 建立连接: {results['connections']}")
+    print(f"   - 淘汰缓存: {evicted}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,47 +5,195 @@
 读取YAML格式的书签文件,生成van-nav风格的导航网站
 """
 
-import yaml
+import argparse
+import hashlib
+import json
+import os
+import pickle
+from contextlib import nullcontext
 from pathlib import Path
 from datetime import datetime
 
+from assets import ASSET_DIR, minify_css, minify_js, precompress, remove_stale, write_asset
+from bookmark_store import BookmarkStore, is_store_file
+from favicon_bundle import ICON_CACHE_DIR, build_icon_bundle, icon_url_for
+from link_check import load_dead_urls, mark_dead_links
+from models import as_categories, iter_bookmarks
+from page_template import PageTemplate, load_template
+import profiling
+from search_index import CJK_CHARS, build_fuzzy_index, build_search_index, dump_index
+from tag_index import build_tag_index, dump_tag_index
+from yaml_cache import CACHE_VERSION, cache_path, load_categories, read_cache_data, read_cache_meta, write_cache
 
-def load_bookmarks(yaml_file):
-    """加载YAML书签文件"""
-    with open(yaml_file, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
+# 输出文件的写缓冲区大小
+WRITE_BUFFER_SIZE = 1 << 16
+
+# 分片模式下分类分片所在的子目录
+SHARD_DIR = 'shards'
+
+# 标签栏默认显示的标签数，其余标签点击"更多"后展开
+TAG_BAR_LIMIT = 30
+
+# 模糊搜索：结果区最多显示的书签数（按相关度取前N个），以及候选书签至少命中的查询键比例
+FUZZY_RESULT_LIMIT = 200
+FUZZY_MIN_MATCH = 0.4
+
+# 参与渲染的本地模块：本文件（模板和渲染逻辑）以及页面内容所依赖的模块
+RENDERER_MODULES = (
+    'generate_nav.py', 'page_template.py', 'models.py', 'parallel_render.py', 'search_index.py',
+    'tag_index.py', 'favicon_bundle.py', 'assets.py', 'link_check.py',
+)
+
+
+def renderer_fingerprint():
+    """返回渲染器指纹：RENDERER_MODULES中任一文件内容变化时，已缓存的片段全部失效"""
+    hasher = hashlib.blake2b(digest_size=16)
+    for name in RENDERER_MODULES:
+        hasher.update(name.encode('utf-8'))
+        hasher.update(Path(__file__).with_name(name).read_bytes())
+    return hasher.hexdigest()
+
+
+RENDERER_FINGERPRINT = renderer_fingerprint()
+
+
+def yaml_files(path):
+    """返回书签来源包含的YAML文件：单个文件，或目录下按文件名排序的全部.yaml/.yml文件"""
+    if not os.path.isdir(path):
+        return [path]
+    return sorted(
+        os.path.join(path, name) for name in os.listdir(path)
+        if name.endswith(('.yaml', '.yml')) and os.path.isfile(os.path.join(path, name))
+    )
+
+
+def load_bookmarks(yaml_file, use_cache=True):
+    """
+    加载YAML书签文件为models.Category列表（优先使用libyaml解析，文件未变化时读取解析缓存）
+
+    yaml_file为目录时依次加载其中的全部YAML文件（见yaml_files），一级分类按文件名顺序合并；
+    为SQLite书签库（.db/.sqlite）时返回以游标逐个读取分类的序列（见bookmark_store.StoreCategories）。
+    """
+    if is_store_file(yaml_file):
+        return BookmarkStore(yaml_file).categories()
+    if not os.path.isdir(yaml_file):
+        return load_categories(yaml_file, use_cache=use_cache)
+    bookmarks_data = []
+    for path in yaml_files(yaml_file):
+        bookmarks_data.extend(load_categories(path, use_cache=use_cache))
+    return bookmarks_data
 
 
 def count_bookmarks(data):
-    """统计书签总数"""
+    """统计书签总数（书签库序列直接使用计数查询）"""
+    if hasattr(data, 'stats'):
+        return data.stats()['total_bookmarks']
     total = 0
     for category in data:
-        for subcategory in category.get('subcategories', []):
-            total += len(subcategory.get('bookmarks', []))
+        for subcategory in category.subcategories or ():
+            total += len(subcategory.bookmarks or ())
     return total
 
 
-def generate_html(bookmarks_data, output_file='index.html'):
-    """生成HTML导航页面"""
-    
-    total_bookmarks = count_bookmarks(bookmarks_data)
-    total_categories = len(bookmarks_data)
-    total_subcategories = sum(len(cat.get('subcategories', [])) for cat in bookmarks_data)
-    
-    html = f'''<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>我的书签导航</title>
-    <style>
-        * {{
+def collect_stats(bookmarks_data):
+    """统计书签、一级分类和二级分类数量（书签库序列直接使用计数查询）"""
+    if hasattr(bookmarks_data, 'stats'):
+        return bookmarks_data.stats()
+    return {
+        'total_bookmarks': count_bookmarks(bookmarks_data),
+        'total_categories': len(bookmarks_data),
+        'total_subcategories': sum(len(cat.subcategories or ()) for cat in bookmarks_data),
+    }
+
+
+def content_hash(obj):
+    """计算书签数据（模型、字典、列表和字符串，见models模块中的__repr__）的内容哈希"""
+    return hashlib.blake2b(repr(obj).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class FragmentCache:
+    """
+    已渲染HTML片段的缓存，以一级分类和二级分类的内容哈希为键
+
+    构建时从上一次的片段中查找，命中则直接复用；本次构建用到的片段记录在fragments中，
+    供保存到构建清单，未再使用的旧片段随之淘汰。icons为内嵌图标的类名映射，
+    其指纹是键的一部分，图标变化时片段随之失效。
+    """
+
+    def __init__(self, fragments=None, icons=None, icons_key=None):
+        self.previous = fragments or {}
+        self.fragments = {}
+        self.icons = icons
+        self.icons_key = icons_key
+        self.rendered = 0
+        self.reused = 0
+
+    def _get(self, key, render):
+        fragment = self.fragments.get(key)
+        if fragment is None:
+            fragment = self.previous.get(key)
+            if fragment is None:
+                fragment = ''.join(render())
+            self.fragments[key] = fragment
+        return fragment
+
+    def section(self, category, key=None):
+        """返回一级分类内容区的片段，未变化时复用缓存"""
+        key = ('section', key or content_hash(category), self.icons_key)
+        if key in self.fragments or key in self.previous:
+            self.reused += 1
+        else:
+            self.rendered += 1
+        return self._get(key, lambda: render_category_section(category, self, self.icons))
+
+    def subcategory(self, subcategory):
+        """返回二级分类区块的片段，未变化时复用缓存"""
+        key = ('subcategory', content_hash(subcategory), self.icons_key)
+        return self._get(key, lambda: render_subcategory(subcategory, self.icons))
+
+    def pending_subcategories(self, bookmarks_data, section_keys):
+        """
+        返回本次构建需要渲染的二级分类：所在一级分类和自身的片段都不在缓存中（内容相同的只返回一次）
+
+        Returns:
+            tuple: (片段键列表, 二级分类列表)
+        """
+        keys, subcategories = [], []
+        seen = set()
+        for category, section_key in zip(bookmarks_data, section_keys):
+            key = ('section', section_key, self.icons_key)
+            if key in self.fragments or key in self.previous:
+                continue
+            for subcategory in category.subcategories or ():
+                key = ('subcategory', content_hash(subcategory), self.icons_key)
+                if key not in seen and key not in self.fragments and key not in self.previous:
+                    seen.add(key)
+                    keys.append(key)
+                    subcategories.append(subcategory)
+        return keys, subcategories
+
+    def add_rendered(self, keys, rendered):
+        """放入在别处渲染好的二级分类片段（见parallel_render），渲染所在的一级分类时直接取用"""
+        for key, (_, fragment) in zip(keys, rendered):
+            self.fragments[key] = fragment
+
+    def next_build(self):
+        """开始新一轮构建：本轮片段成为下一轮的复用来源"""
+        self.previous = self.fragments
+        self.fragments = {}
+        self.rendered = 0
+        self.reused = 0
+
+
+# 页面样式
+PAGE_STYLE = '''
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
 
-        :root {{
+        :root {
             --bg-primary: #f5f7fa;
             --bg-secondary: #ffffff;
             --bg-card: #ffffff;
@@ -60,9 +208,9 @@ def generate_html(bookmarks_data, output_file='index.html'):
             --shadow-sm: 0 2px 4px rgba(0, 0, 0, 0.05);
             --shadow-md: 0 4px 12px rgba(0, 0, 0, 0.08);
             --shadow-lg: 0 8px 24px rgba(0, 0, 0, 0.12);
-        }}
+        }
 
-        [data-theme="dark"] {{
+        [data-theme="dark"] {
             --bg-primary: #1a1a1a;
             --bg-secondary: #2d2d2d;
             --bg-card: #2d2d2d;
@@ -77,17 +225,17 @@ def generate_html(bookmarks_data, output_file='index.html'):
             --shadow-sm: 0 2px 4px rgba(0, 0, 0, 0.3);
             --shadow-md: 0 4px 12px rgba(0, 0, 0, 0.4);
             --shadow-lg: 0 8px 24px rgba(0, 0, 0, 0.5);
-        }}
+        }
 
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
             background: var(--bg-primary);
             color: var(--text-primary);
             line-height: 1.6;
             transition: background 0.3s ease, color 0.3s ease;
-        }}
+        }
 
-        .header {{
+        .header {
             background: var(--bg-secondary);
             padding: 1.25rem 0;
             box-shadow: var(--shadow-sm);
@@ -95,49 +243,49 @@ def generate_html(bookmarks_data, output_file='index.html'):
             top: 0;
             z-index: 100;
             transition: background 0.3s ease;
-        }}
+        }
 
-        .container {{
+        .container {
             max-width: 1400px;
             margin: 0 auto;
             padding: 0 2rem;
-        }}
+        }
 
-        .header-content {{
+        .header-content {
             display: flex;
             justify-content: space-between;
             align-items: center;
-        }}
+        }
 
-        .header h1 {{
+        .header h1 {
             font-size: 1.5rem;
             font-weight: 600;
             color: var(--text-primary);
-        }}
+        }
 
-        .header-stats {{
+        .header-stats {
             display: flex;
             gap: 1.5rem;
             align-items: center;
-        }}
+        }
 
-        .stat-item {{
+        .stat-item {
             text-align: center;
-        }}
+        }
 
-        .stat-value {{
+        .stat-value {
             font-size: 1.125rem;
             font-weight: 600;
             color: var(--accent-color);
-        }}
+        }
 
-        .stat-label {{
+        .stat-label {
             font-size: 0.75rem;
             color: var(--text-muted);
             margin-top: 0.25rem;
-        }}
+        }
 
-        .theme-toggle {{
+        .theme-toggle {
             background: var(--bg-card);
             border: 1px solid var(--border-color);
             border-radius: 8px;
@@ -145,20 +293,20 @@ def generate_html(bookmarks_data, output_file='index.html'):
             cursor: pointer;
             font-size: 1.5rem;
             transition: all 0.3s ease;
-        }}
+        }
 
-        .theme-toggle:hover {{
+        .theme-toggle:hover {
             transform: translateY(-2px);
             box-shadow: var(--shadow-md);
-        }}
+        }
 
-        .search-bar {{
+        .search-bar {
             background: var(--bg-secondary);
             padding: 1rem 0;
             border-bottom: 1px solid var(--border-color);
-        }}
+        }
 
-        .search-input {{
+        .search-input {
             width: 100%;
             padding: 0.625rem 1rem;
             font-size: 0.875rem;
@@ -167,28 +315,28 @@ def generate_html(bookmarks_data, output_file='index.html'):
             background: var(--bg-card);
             color: var(--text-primary);
             transition: all 0.3s ease;
-        }}
+        }
 
-        .search-input:focus {{
+        .search-input:focus {
             outline: none;
             border-color: var(--accent-color);
             box-shadow: 0 0 0 3px rgba(64, 158, 255, 0.1);
-        }}
+        }
 
-        .category-nav {{
+        .category-nav {
             background: var(--bg-secondary);
             padding: 1rem 0;
             border-bottom: 1px solid var(--border-color);
-        }}
+        }
 
-        .category-tabs {{
+        .category-tabs {
             display: flex;
             gap: 0.5rem;
             flex-wrap: wrap;
             margin-bottom: 0;
-        }}
+        }
 
-        .category-tab {{
+        .category-tab {
             background: var(--bg-card);
             border: 1px solid var(--border-color);
             border-radius: 16px;
@@ -199,34 +347,34 @@ def generate_html(bookmarks_data, output_file='index.html'):
             color: var(--text-secondary);
             transition: all 0.2s ease;
             white-space: nowrap;
-        }}
+        }
 
-        .category-tab:hover {{
+        .category-tab:hover {
             background: var(--tag-bg);
             color: var(--accent-color);
             border-color: var(--accent-color);
-        }}
+        }
 
-        .category-tab.active {{
+        .category-tab.active {
             background: var(--accent-color);
             color: white;
             border-color: var(--accent-color);
-        }}
+        }
 
-        .subcategory-tabs {{
+        .subcategory-tabs {
             display: none;
             gap: 0.5rem;
             flex-wrap: wrap;
             margin-top: 0.75rem;
             padding-top: 0.75rem;
             border-top: 1px solid var(--border-color);
-        }}
+        }
 
-        .subcategory-tabs.active {{
+        .subcategory-tabs.active {
             display: flex;
-        }}
+        }
 
-        .subcategory-tab {{
+        .subcategory-tab {
             background: var(--bg-card);
             border: 1px solid var(--border-color);
             border-radius: 12px;
@@ -236,67 +384,121 @@ def generate_html(bookmarks_data, output_file='index.html'):
             color: var(--text-secondary);
             transition: all 0.2s ease;
             white-space: nowrap;
-        }}
+        }
 
-        .subcategory-tab:hover {{
+        .subcategory-tab:hover {
             background: var(--tag-bg);
             color: var(--accent-color);
             border-color: var(--accent-color);
-        }}
+        }
 
-        .subcategory-tab.active {{
+        .subcategory-tab.active {
             background: var(--tag-bg);
             color: var(--accent-color);
             border-color: var(--accent-color);
             font-weight: 500;
-        }}
+        }
 
-        .main-content {{
+        .tag-nav {
+            background: var(--bg-secondary);
+            padding: 0.75rem 0;
+            border-bottom: 1px solid var(--border-color);
+        }
+
+        .tag-bar {
+            display: flex;
+            gap: 0.375rem;
+            flex-wrap: wrap;
+        }
+
+        .tag-chip,
+        .tag-more {
+            display: inline-flex;
+            align-items: center;
+            gap: 0.25rem;
+            background: var(--bg-card);
+            border: 1px solid var(--border-color);
+            border-radius: 12px;
+            padding: 0.2rem 0.625rem;
+            cursor: pointer;
+            font-size: 0.75rem;
+            color: var(--text-secondary);
+            transition: all 0.2s ease;
+            white-space: nowrap;
+        }
+
+        .tag-chip:hover,
+        .tag-more:hover {
+            background: var(--tag-bg);
+            color: var(--accent-color);
+            border-color: var(--accent-color);
+        }
+
+        .tag-chip.active {
+            background: var(--accent-color);
+            color: white;
+            border-color: var(--accent-color);
+        }
+
+        .tag-count {
+            font-size: 0.6875rem;
+            opacity: 0.7;
+        }
+
+        .tag-chip-extra {
+            display: none;
+        }
+
+        .tag-bar.expanded .tag-chip-extra {
+            display: inline-flex;
+        }
+
+        .main-content {
             padding: 1.5rem 0;
-        }}
+        }
 
-        .category {{
+        .category {
             margin-bottom: 2rem;
-        }}
+        }
 
-        .category-title {{
+        .category-title {
             font-size: 1.25rem;
             font-weight: 600;
             margin-bottom: 1rem;
             padding-bottom: 0.5rem;
             border-bottom: 2px solid var(--accent-color);
             color: var(--text-primary);
-        }}
+        }
 
-        .subcategory {{
+        .subcategory {
             margin-bottom: 1.5rem;
-        }}
+        }
 
-        .subcategory-title {{
+        .subcategory-title {
             font-size: 1rem;
             font-weight: 500;
             margin-bottom: 0.75rem;
             color: var(--text-secondary);
             display: flex;
             align-items: center;
-        }}
+        }
 
-        .subcategory-title::before {{
+        .subcategory-title::before {
             content: "";
             width: 3px;
             height: 1rem;
             background: var(--accent-color);
             margin-right: 0.5rem;
             border-radius: 2px;
-        }}
+        }
 
-        .bookmarks-grid {{
+        .bookmarks-grid {
             display: grid;
             grid-template-columns: repeat(auto-fill, minmax(280px, 1fr));
             gap: 1rem;
-        }}
+        }
 
-        .bookmark-card {{
+        .bookmark-card {
             background: var(--bg-card);
             border: 1px solid var(--border-color);
             border-radius: 8px;
@@ -306,21 +508,30 @@ def generate_html(bookmarks_data, output_file='index.html'):
             text-decoration: none;
             display: block;
             height: 100%;
-        }}
+        }
 
-        .bookmark-card:hover {{
+        .bookmark-card:hover {
             transform: translateY(-4px);
             box-shadow: var(--shadow-lg);
             border-color: var(--accent-color);
-        }}
+        }
+
+        .bookmark-card-dead {
+            opacity: 0.55;
+            border-style: dashed;
+        }
 
-        .bookmark-header {{
+        .bookmark-card-dead .bookmark-name {
+            text-decoration: line-through;
+        }
+
+        .bookmark-header {
             display: flex;
             align-items: center;
             margin-bottom: 0.75rem;
-        }}
+        }
 
-        .bookmark-icon {{
+        .bookmark-icon {
             width: 32px;
             height: 32px;
             border-radius: 6px;
@@ -328,9 +539,17 @@ def generate_html(bookmarks_data, output_file='index.html'):
             object-fit: cover;
             background: var(--bg-primary);
             padding: 0.375rem;
-        }}
+        }
+
+        .bookmark-icon-bundled {
+            flex-shrink: 0;
+            background-origin: content-box;
+            background-size: contain;
+            background-repeat: no-repeat;
+            background-position: center;
+        }
 
-        .bookmark-icon-fallback {{
+        .bookmark-icon-fallback {
             width: 32px;
             height: 32px;
             border-radius: 6px;
@@ -342,247 +561,110 @@ def generate_html(bookmarks_data, output_file='index.html'):
             font-size: 1rem;
             font-weight: 600;
             color: white;
-        }}
+        }
 
-        .bookmark-name {{
+        .bookmark-name {
             font-size: 0.9375rem;
             font-weight: 600;
             color: var(--text-primary);
             margin: 0;
-        }}
+        }
 
-        .bookmark-description {{
+        .bookmark-description {
             font-size: 0.8125rem;
             color: var(--text-secondary);
             margin-bottom: 0.75rem;
             line-height: 1.4;
-        }}
+        }
 
-        .bookmark-tags {{
+        .bookmark-tags {
             display: flex;
             flex-wrap: wrap;
             gap: 0.375rem;
-        }}
+        }
 
-        .tag {{
+        .tag {
             background: var(--tag-bg);
             color: var(--tag-text);
             padding: 0.2rem 0.5rem;
             border-radius: 4px;
             font-size: 0.6875rem;
             font-weight: 500;
-        }}
+        }
+
+        .searching .category,
+        .searching .subcategory,
+        .searching .bookmark-card {
+            display: none !important;
+        }
+
+        .searching .search-hit {
+            display: block !important;
+        }
 
-        .no-results {{
+        .virtual-block {
+            margin-bottom: 1rem;
+            align-content: start;
+        }
+
+        .virtual-block:last-child {
+            margin-bottom: 0;
+        }
+
+        .searching .virtual-list .bookmark-card {
+            display: block !important;
+        }
+
+        .ranked-results {
+            display: none;
+        }
+
+        .ranked-summary {
+            font-size: 0.875rem;
+            color: var(--text-secondary);
+            margin-bottom: 0.75rem;
+        }
+
+        .no-results {
             text-align: center;
             padding: 3rem 2rem;
             color: var(--text-muted);
-        }}
+        }
 
-        .no-results-icon {{
+        .no-results-icon {
             font-size: 3rem;
             margin-bottom: 0.75rem;
-        }}
+        }
 
-        .no-results-text {{
+        .no-results-text {
             font-size: 1rem;
-        }}
+        }
 
-        .footer {{
+        .footer {
             background: var(--bg-secondary);
             padding: 2rem 0;
             margin-top: 4rem;
             text-align: center;
             color: var(--text-muted);
             border-top: 1px solid var(--border-color);
-        }}
+        }
 
-        @media (max-width: 768px) {{
-            .header-stats {{
+        @media (max-width: 768px) {
+            .header-stats {
                 gap: 1rem;
-            }}
+            }
 
-            .stat-value {{
+            .stat-value {
                 font-size: 1.25rem;
-            }}
+            }
 
-            .bookmarks-grid {{
+            .bookmarks-grid {
                 grid-template-columns: 1fr;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <header class="header">
-        <div class="container">
-            <div class="header-content">
-                <h1>📚 我的书签导航</h1>
-                <div class="header-stats">
-                    <div class="stat-item">
-                        <div class="stat-value">{total_bookmarks}</div>
-                        <div class="stat-label">书签</div>
-                    </div>
-                    <div class="stat-item">
-                        <div class="stat-value">{total_categories}</div>
-                        <div class="stat-label">分类</div>
-                    </div>
-                    <div class="stat-item">
-                        <div class="stat-value">{total_subcategories}</div>
-                        <div class="stat-label">子分类</div>
-                    </div>
-                    <button class="theme-toggle" id="themeToggle" title="切换主题">
-                        <span class="theme-icon">🌙</span>
-                    </button>
-                </div>
-            </div>
-        </div>
-    </header>
+            }
+        }'''
 
-    <div class="search-bar">
-        <div class="container">
-            <input 
-                type="text" 
-                class="search-input" 
-                id="searchInput" 
-                placeholder="🔍 搜索书签名称或标签..."
-            >
-        </div>
-    </div>
-
-    <nav class="category-nav">
-        <div class="container">
-            <div class="category-tabs" id="categoryTabs">
-                <button class="category-tab active" data-category="all">全部</button>
-'''
-
-    # 生成一级分类标签和二级分类标签
-    for category in bookmarks_data:
-        category_name = category.get('category', '未分类')
-        html += f'''                <button class="category-tab" data-category="{category_name}">{category_name}</button>
-'''
-    
-    html += '''            </div>
-'''
-    
-    # 为每个一级分类生成对应的二级分类标签容器
-    for category in bookmarks_data:
-        category_name = category.get('category', '未分类')
-        subcategories = category.get('subcategories', [])
-        
-        html += f'''            <div class="subcategory-tabs" id="subcategory-{category_name}" data-parent="{category_name}">
-                <button class="subcategory-tab active" data-subcategory="all" data-parent="{category_name}">全部</button>
-'''
-        
-        for subcategory in subcategories:
-            subcategory_name = subcategory.get('name', '未命名')
-            html += f'''                <button class="subcategory-tab" data-subcategory="{subcategory_name}" data-parent="{category_name}">{subcategory_name}</button>
-'''
-        
-        html += '''            </div>
-'''
-    
-    html += '''        </div>
-    </nav>
-
-    <main class="main-content">
-        <div class="container" id="bookmarksContainer">
-'''
-
-    # 生成书签内容
-    for category in bookmarks_data:
-        category_name = category.get('category', '未分类')
-        html += f'''
-            <section class="category" data-category="{category_name}">
-                <h2 class="category-title">{category_name}</h2>
-'''
-        
-        for subcategory in category.get('subcategories', []):
-            subcategory_name = subcategory.get('name', '未命名')
-            html += f'''
-                <div class="subcategory" data-subcategory="{subcategory_name}">
-                    <h3 class="subcategory-title">{subcategory_name}</h3>
-                    <div class="bookmarks-grid">
-'''
-            
-            for bookmark in subcategory.get('bookmarks', []):
-                name = bookmark.get('name', '未命名网站')
-                url = bookmark.get('url', '#')
-                icon = bookmark.get('icon', '')
-                description = bookmark.get('description', '')
-                tags = bookmark.get('tags', [])
-                
-                # 生成首字母作为fallback图标
-                initial = name[0].upper() if name else '?'
-                
-                tags_html = ''.join([f'<span class="tag">{tag}</span>' for tag in tags])
-                
-                html += f'''
-                        <a href="{url}" class="bookmark-card" target="_blank" rel="noopener noreferrer"
-                           data-name="{name.lower()}" 
-                           data-tags="{' '.join([tag.lower() for tag in tags])}"
-                           data-description="{description.lower()}">
-                            <div class="bookmark-header">
-'''
-                
-                if icon:
-                    html += f'''
-                                <img src="{icon}" alt="{name}" class="bookmark-icon" 
-                                     onerror="this.style.display='none'; this.nextElementSibling.style.display='flex';">
-                                <div class="bookmark-icon-fallback" style="display:none;">{initial}</div>
-'''
-                else:
-                    html += f'''
-                                <div class="bookmark-icon-fallback">{initial}</div>
-'''
-                
-                html += f'''
-                                <h4 class="bookmark-name">{name}</h4>
-                            </div>
-'''
-                
-                if description:
-                    html += f'''
-                            <p class="bookmark-description">{description}</p>
-'''
-                
-                if tags:
-                    html += f'''
-                            <div class="bookmark-tags">
-                                {tags_html}
-                            </div>
-'''
-                
-                html += '''
-                        </a>
-'''
-            
-            html += '''
-                    </div>
-                </div>
-'''
-        
-        html += '''
-            </section>
-'''
-
-    # 生成页脚和JavaScript
-    current_year = datetime.now().year
-    html += f'''
-        </div>
-
-        <div id="noResults" class="no-results" style="display: none;">
-            <div class="no-results-icon">🔍</div>
-            <div class="no-results-text">没有找到匹配的书签</div>
-        </div>
-    </main>
-
-    <footer class="footer">
-        <div class="container">
-            <p>© {current_year} 我的书签导航 | 共收录 {total_bookmarks} 个优质网站</p>
-        </div>
-    </footer>
-
-    <script>
+# 页面主脚本：主题切换、分类筛选、搜索和标签筛选；{{ 插槽名 }}处填入构建参数（见SCRIPT_SLOTS），其余部分原样输出
+MAIN_SCRIPT_SOURCE = '''
         // 主题切换功能
         const themeToggle = document.getElementById('themeToggle');
         const themeIcon = document.querySelector('.theme-icon');
@@ -593,17 +675,17 @@ def generate_html(bookmarks_data, output_file='index.html'):
         html.setAttribute('data-theme', savedTheme);
         updateThemeIcon(savedTheme);
 
-        themeToggle.addEventListener('click', () => {{
+        themeToggle.addEventListener('click', () => {
             const currentTheme = html.getAttribute('data-theme');
             const newTheme = currentTheme === 'light' ? 'dark' : 'light';
             html.setAttribute('data-theme', newTheme);
             localStorage.setItem('theme', newTheme);
             updateThemeIcon(newTheme);
-        }});
+        });
 
-        function updateThemeIcon(theme) {{
+        function updateThemeIcon(theme) {
             themeIcon.textContent = theme === 'light' ? '🌙' : '☀️';
-        }}
+        }
 
         // 分类导航功能
         let currentCategory = 'all';
@@ -613,8 +695,8 @@ def generate_html(bookmarks_data, output_file='index.html'):
         const subcategoryTabContainers = document.querySelectorAll('.subcategory-tabs');
 
         // 一级分类点击事件
-        categoryTabs.forEach(tab => {{
-            tab.addEventListener('click', () => {{
+        categoryTabs.forEach(tab => {
+            tab.addEventListener('click', () => {
                 const categoryName = tab.getAttribute('data-category');
                 
                 // 更新当前分类
@@ -626,33 +708,34 @@ def generate_html(bookmarks_data, output_file='index.html'):
                 tab.classList.add('active');
                 
                 // 显示/隐藏对应的二级分类
-                subcategoryTabContainers.forEach(container => {{
+                subcategoryTabContainers.forEach(container => {
                     container.classList.remove('active');
                     // 重置二级分类选中状态
                     const subTabs = container.querySelectorAll('.subcategory-tab');
                     subTabs.forEach(st => st.classList.remove('active'));
                     subTabs[0]?.classList.add('active');
-                }});
+                });
                 
-                if (categoryName !== 'all') {{
-                    const subcategoryContainer = document.getElementById(`subcategory-${{categoryName}}`);
-                    if (subcategoryContainer) {{
+                if (categoryName !== 'all') {
+                    const subcategoryContainer = document.getElementById(`subcategory-${categoryName}`);
+                    if (subcategoryContainer) {
                         subcategoryContainer.classList.add('active');
-                    }}
-                }}
+                    }
+                }
                 
-                // 清空搜索框
+                // 清空搜索框和标签筛选
                 searchInput.value = '';
+                clearTags();
                 
                 // 筛选显示书签
                 filterBookmarks();
-            }});
-        }});
+            });
+        });
 
         // 二级分类点击事件
         const subcategoryTabs = document.querySelectorAll('.subcategory-tab');
-        subcategoryTabs.forEach(tab => {{
-            tab.addEventListener('click', () => {{
+        subcategoryTabs.forEach(tab => {
+            tab.addEventListener('click', () => {
                 const subcategoryName = tab.getAttribute('data-subcategory');
                 const parentCategory = tab.getAttribute('data-parent');
                 
@@ -660,26 +743,28 @@ def generate_html(bookmarks_data, output_file='index.html'):
                 currentSubcategory = subcategoryName;
                 
                 // 更新同一父分类下的二级分类标签样式
-                const container = document.getElementById(`subcategory-${{parentCategory}}`);
-                if (container) {{
+                const container = document.getElementById(`subcategory-${parentCategory}`);
+                if (container) {
                     const siblingTabs = container.querySelectorAll('.subcategory-tab');
                     siblingTabs.forEach(t => t.classList.remove('active'));
-                }}
+                }
                 tab.classList.add('active');
                 
-                // 清空搜索框
+                // 清空搜索框和标签筛选
                 searchInput.value = '';
+                clearTags();
                 
                 // 筛选显示书签
                 filterBookmarks();
-            }});
-        }});
+            });
+        });
 
         // 筛选书签函数
-        function filterBookmarks() {{
+        function filterBookmarks() {
+            clearSearchHits();
             const categories = document.querySelectorAll('.category');
             const subcategories = document.querySelectorAll('.subcategory');
-            const cards = document.querySelectorAll('.bookmark-card');
+            const cards = bookmarksContainer.querySelectorAll('.bookmark-card');
             
             let visibleCount = 0;
             
@@ -688,122 +773,361 @@ def generate_html(bookmarks_data, output_file='index.html'):
             subcategories.forEach(sub => sub.style.display = 'none');
             cards.forEach(card => card.style.display = 'none');
             
-            if (currentCategory === 'all') {{
+            if (currentCategory === 'all') {
                 // 显示所有内容
                 categories.forEach(cat => cat.style.display = 'block');
                 subcategories.forEach(sub => sub.style.display = 'block');
-                cards.forEach(card => {{
-                    card.style.display = 'block';
-                    visibleCount++;
-                }});
-            }} else {{
+                cards.forEach(card => card.style.display = 'block');
+                visibleCount = cardCount(bookmarksContainer, cards);
+            } else {
                 // 显示指定分类
-                categories.forEach(cat => {{
+                categories.forEach(cat => {
                     const catName = cat.getAttribute('data-category');
-                    if (catName === currentCategory) {{
+                    if (catName === currentCategory) {
                         cat.style.display = 'block';
                         
                         // 显示该分类下的子分类和书签
                         const catSubcategories = cat.querySelectorAll('.subcategory');
-                        catSubcategories.forEach(sub => {{
+                        catSubcategories.forEach(sub => {
                             const subName = sub.getAttribute('data-subcategory');
                             
-                            if (currentSubcategory === 'all' || subName === currentSubcategory) {{
+                            if (currentSubcategory === 'all' || subName === currentSubcategory) {
                                 sub.style.display = 'block';
                                 
                                 // 显示该子分类下的所有书签
                                 const subCards = sub.querySelectorAll('.bookmark-card');
-                                subCards.forEach(card => {{
-                                    card.style.display = 'block';
-                                    visibleCount++;
-                                }});
-                            }}
-                        }});
-                    }}
-                }});
-            }}
+                                subCards.forEach(card => card.style.display = 'block');
+                                visibleCount += cardCount(sub, subCards);
+                            }
+                        });
+                    }
+                });
+            }
             
             // 显示/隐藏"无结果"提示
-            if (visibleCount === 0) {{
+            if (visibleCount === 0) {
                 bookmarksContainer.style.display = 'none';
                 noResults.style.display = 'block';
-            }} else {{
+            } else {
                 bookmarksContainer.style.display = 'block';
                 noResults.style.display = 'none';
-            }}
-        }}
+            }
+        }
+
+        // 元素内的书签数量；虚拟列表模式下卡片按需创建，数量由虚拟列表提供
+        function cardCount(element, cards) {
+            return window.virtualList ? window.virtualList.count(element) : cards.length;
+        }
 
         // 搜索过滤功能
         const searchInput = document.getElementById('searchInput');
         const bookmarksContainer = document.getElementById('bookmarksContainer');
         const noResults = document.getElementById('noResults');
 
-        searchInput.addEventListener('input', (e) => {{
+        // 构建时生成的倒排索引：词的一至三字符片段、中文单字和二元组 → 卡片编号（按文档顺序）
+        const searchIndexElement = document.getElementById('searchIndex');
+        let searchIndex = searchIndexElement && searchIndexElement.textContent.trim()
+            ? JSON.parse(searchIndexElement.textContent) : null;
+        window.loadSearchIndex = data => { searchIndex = data; postingCache.clear(); };
+
+        // 只取内容区中的卡片：相关度结果区里的副本也带有bookmark-card类，不能计入卡片编号
+        const allCards = bookmarksContainer.getElementsByClassName('bookmark-card');
+        const postingCache = new Map();
+        const cjkPattern = /[{{ cjk_chars }}]/u;
+        const tokenPattern = /[\\p{L}\\p{N}]+/gu;
+        const cjkSplitPattern = /[{{ cjk_chars }}]+|[^{{ cjk_chars }}]+/gu;
+        let searchHits = [];
+
+        // 解码差分编码的卡片编号列表
+        function decodeIds(deltas) {
+            const ids = new Array(deltas.length);
+            let id = 0;
+            for (let i = 0; i < deltas.length; i++) {
+                id += deltas[i];
+                ids[i] = id;
+            }
+            return ids;
+        }
+
+        function postings(key) {
+            if (!postingCache.has(key)) {
+                postingCache.set(key, decodeIds(searchIndex.postings[key] || []));
+            }
+            return postingCache.get(key);
+        }
+
+        // 求多个有序卡片编号列表的交集，从最短的列表开始
+        function intersectSorted(lists) {
+            lists = lists.slice().sort((a, b) => a.length - b.length);
+            let result = lists[0] || [];
+            for (let i = 1; i < lists.length && result.length > 0; i++) {
+                const other = lists[i];
+                const next = [];
+                let j = 0;
+                for (const id of result) {
+                    while (j < other.length && other[j] < id) j++;
+                    if (j < other.length && other[j] === id) next.push(id);
+                }
+                result = next;
+            }
+            return result;
+        }
+
+        // 与构建期一致地把查询切分为索引键：含有查询的卡片必然带有这些键
+        function queryKeys(term) {
+            const keys = [];
+            for (const run of term.match(tokenPattern) || []) {
+                for (const token of run.match(cjkSplitPattern)) {
+                    const size = cjkPattern.test(token) ? 2 : searchIndex.maxGram;
+                    if (token.length <= size) {
+                        keys.push(token);
+                    } else {
+                        for (let i = 0; i + size <= token.length; i++) keys.push(token.slice(i, i + size));
+                    }
+                }
+            }
+            return keys;
+        }
+
+        // 求有序列表的交集，返回候选卡片编号；索引不可用时返回null
+        function searchCandidates(term) {
+            const total = window.virtualList ? window.virtualList.total : allCards.length;
+            if (!searchIndex || searchIndex.kind === 'fuzzy' || total !== searchIndex.count) return null;
+            const keys = queryKeys(term);
+            if (keys.length === 0) return null;
+
+            return intersectSorted(keys.map(postings));
+        }
+
+        // 模糊搜索（--fuzzy-search）：查询与构建期一致地切分为三元组和中文单字、二元组，
+        // 候选书签按命中的键及其所在字段的权重计分，命中的键不足FUZZY_MIN_MATCH时舍弃
+        const RANKED_LIMIT = {{ fuzzy_result_limit }};
+        const FUZZY_MIN_MATCH = {{ fuzzy_min_match }};
+        let fuzzyState = null;
+        let rankedResults = null;
+
+        function fuzzyKeys(term) {
+            const tokens = [];
+            for (const run of term.match(tokenPattern) || []) tokens.push(...run.match(cjkSplitPattern));
+            const keys = new Set();
+            tokens.forEach((token, i) => {
+                if (cjkPattern.test(token)) {
+                    for (const char of token) keys.add(char);
+                    for (let j = 0; j + 1 < token.length; j++) keys.add(token.slice(j, j + 2));
+                } else {
+                    // 最后一个词可能还没输入完，词尾不补空格，按词首匹配
+                    const padded = i === tokens.length - 1 ? ` ${token}` : ` ${token} `;
+                    if (padded.length === 2) keys.add(padded);
+                    for (let j = 0; j + 3 <= padded.length; j++) keys.add(padded.slice(j, j + 3));
+                }
+            });
+            return Array.from(keys);
+        }
+
+        // 返回按相关度排列的卡片编号（同分时按页面顺序）；索引不可用时返回null
+        function rankedSearch(term) {
+            const total = window.virtualList ? window.virtualList.total : allCards.length;
+            if (!searchIndex || searchIndex.kind !== 'fuzzy' || total !== searchIndex.count) return null;
+            const keys = fuzzyKeys(term);
+            if (keys.length === 0) return null;
+
+            if (!fuzzyState || fuzzyState.index !== searchIndex) {
+                // 字段掩码 → 所含字段的权重之和；计分数组按卡片数分配一次，之后复用
+                const maskWeights = [];
+                for (let mask = 0; mask < 1 << searchIndex.weights.length; mask++) {
+                    maskWeights.push(searchIndex.weights.reduce((sum, w, bit) => mask & (1 << bit) ? sum + w : sum, 0));
+                }
+                fuzzyState = {
+                    index: searchIndex,
+                    maskWeights,
+                    scores: new Uint32Array(total),
+                    hits: new Uint16Array(total),
+                    touched: new Int32Array(total),
+                    order: new Float64Array(total),
+                };
+            }
+            const { maskWeights, scores, hits, touched, order } = fuzzyState;
+
+            let touchedCount = 0;
+            let maxScore = 0;
+            for (const key of keys) {
+                const entries = searchIndex.postings[key];
+                if (!entries) continue;
+                let id = 0;
+                for (let i = 0; i < entries.length; i += 2) {
+                    id += entries[i];
+                    if (hits[id] === 0) touched[touchedCount++] = id;
+                    hits[id]++;
+                    scores[id] += maskWeights[entries[i + 1]];
+                }
+            }
+            for (let k = 0; k < touchedCount; k++) {
+                if (scores[touched[k]] > maxScore) maxScore = scores[touched[k]];
+            }
+
+            // 分数和编号合成一个排序键，用类型化数组的原生排序代替比较函数
+            const minHits = Math.max(1, Math.ceil(keys.length * FUZZY_MIN_MATCH));
+            let count = 0;
+            for (let k = 0; k < touchedCount; k++) {
+                const id = touched[k];
+                if (hits[id] >= minHits) order[count++] = (maxScore - scores[id]) * total + id;
+                hits[id] = 0;
+                scores[id] = 0;
+            }
+            const sorted = order.subarray(0, count).sort();
+            const ids = new Array(count);
+            for (let i = 0; i < count; i++) ids[i] = sorted[i] % total;
+            return ids;
+        }
+
+        // 在单独的结果区按相关度显示前RANKED_LIMIT个书签，内容区暂时隐藏
+        function showRanked(ids) {
+            if (!rankedResults) {
+                rankedResults = document.createElement('div');
+                rankedResults.className = 'container ranked-results';
+                rankedResults.innerHTML = '<div class="ranked-summary"></div><div class="bookmarks-grid"></div>';
+                bookmarksContainer.after(rankedResults);
+            }
+            const [summary, grid] = rankedResults.children;
+            const fragment = document.createDocumentFragment();
+            ids.slice(0, RANKED_LIMIT).forEach(id => {
+                const card = window.virtualList ? window.virtualList.card(id) : allCards[id].cloneNode(true);
+                card.style.display = '';
+                fragment.appendChild(card);
+            });
+            grid.replaceChildren(fragment);
+            summary.textContent = ids.length > RANKED_LIMIT
+                ? `找到 ${ids.length} 个书签，按相关度显示前 ${RANKED_LIMIT} 个`
+                : `找到 ${ids.length} 个书签，按相关度排列`;
+
+            rankedResults.style.display = ids.length ? 'block' : 'none';
+            bookmarksContainer.style.display = 'none';
+            noResults.style.display = ids.length ? 'none' : 'block';
+        }
+
+        function cardMatches(card, searchTerm) {
+            const name = card.getAttribute('data-name') || '';
+            const tags = card.getAttribute('data-tags') || '';
+            const description = card.getAttribute('data-description') || '';
+            
+            return name.includes(searchTerm) || 
+                   tags.includes(searchTerm) || 
+                   description.includes(searchTerm);
+        }
+
+        function idMatches(id, searchTerm) {
+            return window.virtualList ? window.virtualList.matches(id, searchTerm) : cardMatches(allCards[id], searchTerm);
+        }
+
+        function markSearchHit(el) {
+            if (el && !el.classList.contains('search-hit')) {
+                el.classList.add('search-hit');
+                searchHits.push(el);
+            }
+        }
+
+        // 只切换命中卡片及其所在分类的样式，不触碰其余卡片；返回显示的卡片数
+        function showCardIds(ids) {
+            bookmarksContainer.classList.add('searching');
+            if (window.virtualList) return window.virtualList.show(ids);
+            ids.forEach(id => {
+                const card = allCards[id];
+                markSearchHit(card);
+                markSearchHit(card.closest('.subcategory'));
+                markSearchHit(card.closest('.category'));
+            });
+            return ids.length;
+        }
+
+        // resetVirtual为false时保留虚拟列表的筛选（随后会重新筛选，避免重复重建）
+        function clearSearchHits(resetVirtual = true) {
+            bookmarksContainer.classList.remove('searching');
+            if (rankedResults) rankedResults.style.display = 'none';
+            searchHits.forEach(el => el.classList.remove('search-hit'));
+            searchHits = [];
+            if (resetVirtual && window.virtualList) window.virtualList.clearFilter();
+        }
+
+        // 把分类选择重置为"全部"
+        function resetCategory() {
+            currentCategory = 'all';
+            currentSubcategory = 'all';
+            categoryTabs.forEach(t => t.classList.remove('active'));
+            categoryTabs[0]?.classList.add('active');
+            subcategoryTabContainers.forEach(container => container.classList.remove('active'));
+        }
+
+        searchInput.addEventListener('input', (e) => {
             const searchTerm = e.target.value.toLowerCase().trim();
+            clearTags();
             
-            if (searchTerm === '') {{
+            if (searchTerm === '') {
                 // 如果有分类筛选,则应用分类筛选,否则显示所有内容
-                if (currentCategory !== 'all') {{
+                if (currentCategory !== 'all') {
                     filterBookmarks();
-                }} else {{
+                } else {
                     showAllBookmarks();
-                }}
+                }
                 return;
-            }}
+            }
             
             // 搜索时重置分类选择为"全部"
-            currentCategory = 'all';
-            currentSubcategory = 'all';
-            categoryTabs.forEach(t => t.classList.remove('active'));
-            categoryTabs[0]?.classList.add('active');
-            subcategoryTabContainers.forEach(container => container.classList.remove('active'));
+            resetCategory();
 
-            const cards = document.querySelectorAll('.bookmark-card');
-            const categories = document.querySelectorAll('.category');
-            const subcategories = document.querySelectorAll('.subcategory');
-            
+            clearSearchHits(false);
             let visibleCount = 0;
 
-            // 隐藏所有分类和子分类
-            categories.forEach(cat => cat.style.display = 'none');
-            subcategories.forEach(sub => sub.style.display = 'none');
-
-            // 检查每个书签卡片
-            cards.forEach(card => {{
-                const name = card.getAttribute('data-name') || '';
-                const tags = card.getAttribute('data-tags') || '';
-                const description = card.getAttribute('data-description') || '';
-                
-                const matches = name.includes(searchTerm) || 
-                               tags.includes(searchTerm) || 
-                               description.includes(searchTerm);
-
-                if (matches) {{
-                    card.style.display = 'block';
-                    visibleCount++;
-                    
-                    // 显示父级分类和子分类
-                    const subcategory = card.closest('.subcategory');
-                    const category = card.closest('.category');
-                    if (subcategory) subcategory.style.display = 'block';
-                    if (category) category.style.display = 'block';
-                }} else {{
-                    card.style.display = 'none';
-                }}
-            }});
+            const ranked = rankedSearch(searchTerm);
+            if (ranked) {
+                showRanked(ranked);
+                return;
+            }
+
+            const candidates = searchCandidates(searchTerm);
+            if (candidates) {
+                // 只对索引给出的候选卡片做精确匹配
+                visibleCount = showCardIds(candidates.filter(id => idMatches(id, searchTerm)));
+            } else if (window.virtualList) {
+                visibleCount = showCardIds(window.virtualList.scan(searchTerm));
+            } else {
+                const cards = bookmarksContainer.querySelectorAll('.bookmark-card');
+                const categories = document.querySelectorAll('.category');
+                const subcategories = document.querySelectorAll('.subcategory');
+
+                // 隐藏所有分类和子分类
+                categories.forEach(cat => cat.style.display = 'none');
+                subcategories.forEach(sub => sub.style.display = 'none');
+
+                // 检查每个书签卡片
+                cards.forEach(card => {
+                    if (cardMatches(card, searchTerm)) {
+                        card.style.display = 'block';
+                        visibleCount++;
+                        
+                        // 显示父级分类和子分类
+                        const subcategory = card.closest('.subcategory');
+                        const category = card.closest('.category');
+                        if (subcategory) subcategory.style.display = 'block';
+                        if (category) category.style.display = 'block';
+                    } else {
+                        card.style.display = 'none';
+                    }
+                });
+            }
 
             // 显示/隐藏"无结果"提示
-            if (visibleCount === 0) {{
+            if (visibleCount === 0) {
                 bookmarksContainer.style.display = 'none';
                 noResults.style.display = 'block';
-            }} else {{
+            } else {
                 bookmarksContainer.style.display = 'block';
                 noResults.style.display = 'none';
-            }}
-        }});
+            }
+        });
 
-        function showAllBookmarks() {{
-            const cards = document.querySelectorAll('.bookmark-card');
+        function showAllBookmarks() {
+            clearSearchHits();
+            const cards = bookmarksContainer.querySelectorAll('.bookmark-card');
             const categories = document.querySelectorAll('.category');
             const subcategories = document.querySelectorAll('.subcategory');
             
@@ -813,67 +1137,1468 @@ def generate_html(bookmarks_data, output_file='index.html'):
             
             bookmarksContainer.style.display = 'block';
             noResults.style.display = 'none';
-        }}
+        }
+
+        // 标签筛选：构建时已算好每个标签的卡片编号列表（见tag_index.py），点击标签时直接按列表显示，
+        // 选中多个标签时显示同时带有这些标签的书签
+        const tagIndexElement = document.getElementById('tagIndex');
+        let tagIndex = tagIndexElement && tagIndexElement.textContent.trim()
+            ? JSON.parse(tagIndexElement.textContent) : null;
+        const tagPostingCache = new Map();
+        window.loadTagIndex = data => { tagIndex = data; tagPostingCache.clear(); };
+
+        const tagChips = document.querySelectorAll('.tag-chip');
+        const tagMore = document.getElementById('tagMore');
+        const activeTags = new Set();
+
+        function tagPostings(tag) {
+            if (!tagPostingCache.has(tag)) {
+                tagPostingCache.set(tag, decodeIds(tagIndex.tags[tag].ids));
+            }
+            return tagPostingCache.get(tag);
+        }
+
+        function clearTags() {
+            if (activeTags.size === 0) return;
+            activeTags.clear();
+            tagChips.forEach(chip => chip.classList.remove('active'));
+        }
+
+        // 按选中的标签显示书签；标签索引不可用（如分片尚未加载）时返回false
+        function applyTagFilter() {
+            const total = window.virtualList ? window.virtualList.total : allCards.length;
+            if (!tagIndex || total !== tagIndex.count) return false;
+
+            clearSearchHits(false);
+            const visibleCount = showCardIds(intersectSorted(Array.from(activeTags, tagPostings)));
+            if (visibleCount === 0) {
+                bookmarksContainer.style.display = 'none';
+                noResults.style.display = 'block';
+            } else {
+                bookmarksContainer.style.display = 'block';
+                noResults.style.display = 'none';
+            }
+            return true;
+        }
+
+        tagChips.forEach(chip => {
+            chip.addEventListener('click', () => {
+                const tag = Number(chip.getAttribute('data-tag'));
+                if (activeTags.has(tag)) {
+                    activeTags.delete(tag);
+                } else {
+                    activeTags.add(tag);
+                }
+                chip.classList.toggle('active', activeTags.has(tag));
+
+                // 标签筛选作用于全部书签：清空搜索框，分类重置为"全部"
+                searchInput.value = '';
+                resetCategory();
+                if (activeTags.size === 0) {
+                    showAllBookmarks();
+                } else {
+                    applyTagFilter();
+                }
+            });
+        });
+
+        tagMore?.addEventListener('click', () => {
+            const expanded = document.getElementById('tagBar').classList.toggle('expanded');
+            tagMore.textContent = expanded ? '收起' : tagMore.getAttribute('data-label');
+        });
 
         // 添加键盘快捷键
-        document.addEventListener('keydown', (e) => {{
+        document.addEventListener('keydown', (e) => {
             // Ctrl/Cmd + K 聚焦搜索框
-            if ((e.ctrlKey || e.metaKey) && e.key === 'k') {{
+            if ((e.ctrlKey || e.metaKey) && e.key === 'k') {
                 e.preventDefault();
                 searchInput.focus();
-            }}
+            }
             
             // ESC 清空搜索
-            if (e.key === 'Escape' && document.activeElement === searchInput) {{
+            if (e.key === 'Escape' && document.activeElement === searchInput) {
                 searchInput.value = '';
                 searchInput.dispatchEvent(new Event('input'));
-            }}
-        }});
+            }
+        });
 
         // 页面加载动画
-        window.addEventListener('load', () => {{
+        window.addEventListener('load', () => {
             document.body.style.opacity = '0';
             document.body.style.transition = 'opacity 0.3s ease';
-            setTimeout(() => {{
+            setTimeout(() => {
                 document.body.style.opacity = '1';
-            }}, 10);
-        }});
-    </script>
+            }, 10);
+        });
+'''
+
+# 页面主脚本可用的插槽（均为必需）
+SCRIPT_SLOTS = {
+    'cjk_chars': '中日韩字符范围，与search_index的切分规则一致',
+    'fuzzy_result_limit': '模糊搜索结果区最多显示的书签数',
+    'fuzzy_min_match': '模糊搜索候选书签至少命中的查询键比例',
+}
+
+# 填入构建参数后的页面主脚本，只在导入时生成一次
+MAIN_SCRIPT = ''.join(PageTemplate(MAIN_SCRIPT_SOURCE, SCRIPT_SLOTS, SCRIPT_SLOTS, name='页面主脚本').render({
+    'cjk_chars': CJK_CHARS,
+    'fuzzy_result_limit': str(FUZZY_RESULT_LIMIT),
+    'fuzzy_min_match': str(FUZZY_MIN_MATCH),
+}))
+
+
+# 默认页面模板：{{ 插槽名 }}处按每次构建的数据填入（见TEMPLATE_SLOTS），其余部分原样输出
+PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>我的书签导航</title>
+{{ style }}
+</head>
+<body>
+    <header class="header">
+        <div class="container">
+            <div class="header-content">
+                <h1>📚 我的书签导航</h1>
+                <div class="header-stats">
+                    <div class="stat-item">
+                        <div class="stat-value">{{ total_bookmarks }}</div>
+                        <div class="stat-label">书签</div>
+                    </div>
+                    <div class="stat-item">
+                        <div class="stat-value">{{ total_categories }}</div>
+                        <div class="stat-label">分类</div>
+                    </div>
+                    <div class="stat-item">
+                        <div class="stat-value">{{ total_subcategories }}</div>
+                        <div class="stat-label">子分类</div>
+                    </div>
+                    <button class="theme-toggle" id="themeToggle" title="切换主题">
+                        <span class="theme-icon">🌙</span>
+                    </button>
+                </div>
+            </div>
+        </div>
+    </header>
+
+    <div class="search-bar">
+        <div class="container">
+            <input 
+                type="text" 
+                class="search-input" 
+                id="searchInput" 
+                placeholder="🔍 搜索书签名称或标签..."
+            >
+        </div>
+    </div>
+
+    <nav class="category-nav">
+        <div class="container">
+            <div class="category-tabs" id="categoryTabs">
+                <button class="category-tab active" data-category="all">全部</button>
+{{ category_tabs }}            </div>
+{{ subcategory_tabs }}        </div>
+    </nav>
+{{ tag_bar }}
+
+    <main class="main-content">
+        <div class="container" id="bookmarksContainer">
+{{ content }}
+        </div>
+
+        <div id="noResults" class="no-results" style="display: none;">
+            <div class="no-results-icon">🔍</div>
+            <div class="no-results-text">没有找到匹配的书签</div>
+        </div>
+    </main>
+
+    <footer class="footer">
+        <div class="container">
+            <p>© {{ year }} 我的书签导航 | 共收录 {{ total_bookmarks }} 个优质网站</p>
+        </div>
+    </footer>
+{{ data_script }}
+{{ scripts }}
 </body>
 </html>
 '''
 
-    # 写入文件
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(html)
-    
+# 模板可用的插槽
+TEMPLATE_SLOTS = {
+    'style': '页面样式（内联的<style>，生产模式下为<link>）',
+    'total_bookmarks': '书签总数',
+    'total_categories': '一级分类数',
+    'total_subcategories': '二级分类数',
+    'year': '当前年份',
+    'category_tabs': '一级分类标签按钮',
+    'subcategory_tabs': '各一级分类的二级分类标签容器',
+    'tag_bar': '标签栏（按书签数排列的标签，点击筛选）',
+    'content': '书签内容区',
+    'data_script': '搜索索引、标签索引等数据块',
+    'scripts': '页面脚本（内联的<script>，生产模式下为<script src>）',
+}
+
+# 自定义模板必须包含的插槽
+REQUIRED_SLOTS = ('content', 'scripts')
+
+# 预编译的默认模板
+DEFAULT_TEMPLATE = PageTemplate(PAGE_TEMPLATE, TEMPLATE_SLOTS, REQUIRED_SLOTS, name='默认模板')
+
+# 内联样式和脚本块（附加内容为空时），只在导入时拼接一次
+_INLINE_STYLE = f"    <style>{PAGE_STYLE}\n\n    </style>"
+_INLINE_SCRIPT = f"    <script>{MAIN_SCRIPT}    </script>"
+
+
+def load_page_template(template_file=None):
+    """
+    返回页面模板：未指定文件时为默认模板，否则读取并预编译模板文件（文件未变化时复用编译结果）
+
+    Raises:
+        FileNotFoundError: 模板文件不存在
+        ValueError: 模板中有未知的插槽，或缺少必需的插槽（见REQUIRED_SLOTS）
+    """
+    if template_file is None:
+        return DEFAULT_TEMPLATE
+    return load_template(template_file, TEMPLATE_SLOTS, REQUIRED_SLOTS)
+
+
+def render_style(extra_style='', stylesheets=None):
+    """
+    生成style插槽：内联的页面样式，或外部样式表的<link>
+
+    Args:
+        extra_style (str): 附加在页面样式之后的CSS规则
+        stylesheets (list): 外部样式表的路径。提供时页面样式以<link>引用，不再内联，
+            extra_style应已包含在这些样式表中
+    """
+    if stylesheets is not None:
+        return '\n'.join(f'    <link rel="stylesheet" href="{href}">' for href in stylesheets)
+    if not extra_style:
+        return _INLINE_STYLE
+    return f"    <style>{PAGE_STYLE}\n{extra_style}\n    </style>"
+
+
+def _category_name(category):
+    """一级分类在页面中显示的名称"""
+    name = category.name
+    return name if name is not None else '未分类'
+
+
+def _subcategory_name(subcategory):
+    """二级分类在页面中显示的名称"""
+    name = subcategory.name
+    return name if name is not None else '未命名'
+
+
+def render_category_tab(category):
+    """生成一级分类标签按钮"""
+    category_name = _category_name(category)
+    return f'''                <button class="category-tab" data-category="{category_name}">{category_name}</button>
+'''
+
+
+def render_subcategory_tabs(category):
+    """生成一级分类对应的二级分类标签容器"""
+    category_name = _category_name(category)
+    parts = [f'''            <div class="subcategory-tabs" id="subcategory-{category_name}" data-parent="{category_name}">
+                <button class="subcategory-tab active" data-subcategory="all" data-parent="{category_name}">全部</button>
+''']
+
+    for subcategory in category.subcategories or ():
+        subcategory_name = _subcategory_name(subcategory)
+        parts.append(f'''                <button class="subcategory-tab" data-subcategory="{subcategory_name}" data-parent="{category_name}">{subcategory_name}</button>
+''')
+
+    parts.append('''            </div>
+''')
+    return ''.join(parts)
+
+
+def render_tag_bar(tag_index):
+    """
+    生成标签栏：每个标签一个按钮，显示书签数；按钮的data-tag为标签在索引中的序号
+
+    标签按书签数从多到少排列，前TAG_BAR_LIMIT个直接显示，其余点击"更多"后展开。
+    没有任何标签时返回空字符串。
+    """
+    tags = tag_index['tags']
+    if not tags:
+        return ''
+
+    parts = ['''    <nav class="tag-nav">
+        <div class="container">
+            <div class="tag-bar" id="tagBar">
+''']
+    for i, tag in enumerate(tags):
+        chip_class = 'tag-chip' if i < TAG_BAR_LIMIT else 'tag-chip tag-chip-extra'
+        parts.append(f'''                <button class="{chip_class}" data-tag="{i}">{tag['name']}<span class="tag-count">{tag['count']}</span></button>
+''')
+    if len(tags) > TAG_BAR_LIMIT:
+        label = f"更多标签 ({len(tags) - TAG_BAR_LIMIT})"
+        parts.append(f'''                <button class="tag-more" id="tagMore" data-label="{label}">{label}</button>
+''')
+    parts.append('''            </div>
+        </div>
+    </nav>''')
+    return ''.join(parts)
+
+
+def render_bookmark_card(bookmark, icons=None):
+    """
+    生成单个书签卡片
+
+    Args:
+        bookmark (Bookmark): 书签
+        icons (dict): 图标URL到内嵌图标CSS类的映射。提供时图标从页面内嵌的样式加载，
+            没有icon字段的书签按其站点的/favicon.ico查找，不在映射中的图标显示首字母，
+            不再请求远程地址
+
+    带有dead标记（见link_check.mark_dead_links）的书签显示为失效样式。
+    """
+    name = bookmark.name
+    if name is None:
+        name = '未命名网站'
+    url = bookmark.url
+    if url is None:
+        url = '#'
+    icon = bookmark.icon or ''
+    description = bookmark.description or ''
+    tags = bookmark.tags or ()
+
+    # 生成首字母作为fallback图标
+    initial = name[0].upper() if name else '?'
+
+    dead = bookmark.dead
+    card_class = 'bookmark-card bookmark-card-dead' if dead else 'bookmark-card'
+    card_title = ' title="链接可能已失效"' if dead else ''
+
+    parts = [f'''
+                        <a href="{url}" class="{card_class}"{card_title} target="_blank" rel="noopener noreferrer"
+                           data-name="{name.lower()}" 
+                           data-tags="{' '.join([tag.lower() for tag in tags])}"
+                           data-description="{description.lower()}">
+                            <div class="bookmark-header">
+''']
+
+    icon_class = icons.get(icon_url_for(bookmark)) if icons is not None else None
+    if icon_class:
+        parts.append(f'''
+                                <span class="bookmark-icon bookmark-icon-bundled {icon_class}" role="img" aria-label="{name}"></span>
+''')
+    elif icon and icons is None:
+        parts.append(f'''
+                                <img src="{icon}" alt="{name}" class="bookmark-icon" 
+                                     onerror="this.style.display='none'; this.nextElementSibling.style.display='flex';">
+                                <div class="bookmark-icon-fallback" style="display:none;">{initial}</div>
+''')
+    else:
+        parts.append(f'''
+                                <div class="bookmark-icon-fallback">{initial}</div>
+''')
+
+    parts.append(f'''
+                                <h4 class="bookmark-name">{name}</h4>
+                            </div>
+''')
+
+    if description:
+        parts.append(f'''
+                            <p class="bookmark-description">{description}</p>
+''')
+
+    if tags:
+        tags_html = ''.join([f'<span class="tag">{tag}</span>' for tag in tags])
+        parts.append(f'''
+                            <div class="bookmark-tags">
+                                {tags_html}
+                            </div>
+''')
+
+    parts.append('''
+                        </a>
+''')
+    return ''.join(parts)
+
+
+def render_subcategory_head(subcategory):
+    """生成二级分类区块的开头（标题和卡片网格的开始标签）"""
+    subcategory_name = _subcategory_name(subcategory)
+    return f'''
+                <div class="subcategory" data-subcategory="{subcategory_name}">
+                    <h3 class="subcategory-title">{subcategory_name}</h3>
+                    <div class="bookmarks-grid">
+'''
+
+
+# 二级分类区块的结尾
+SUBCATEGORY_END = '''
+                    </div>
+                </div>
+'''
+
+
+def render_subcategory(subcategory, icons=None):
+    """逐个生成二级分类区块（标题和书签卡片）的HTML片段"""
+    yield render_subcategory_head(subcategory)
+
+    for bookmark in subcategory.bookmarks or ():
+        yield render_bookmark_card(bookmark, icons)
+
+    yield SUBCATEGORY_END
+
+
+def render_category_body(category, cache=None, icons=None):
+    """逐个生成一级分类内容区内部（标题和各二级分类）的HTML片段"""
+    category_name = _category_name(category)
+    yield f'''                <h2 class="category-title">{category_name}</h2>
+'''
+
+    for subcategory in category.subcategories or ():
+        if cache is None:
+            yield from render_subcategory(subcategory, icons)
+        else:
+            yield cache.subcategory(subcategory)
+
+
+def render_category_section(category, cache=None, icons=None):
+    """
+    逐个生成一级分类内容区的HTML片段
+
+    Args:
+        category (Category): 一级分类
+        cache (FragmentCache): 片段缓存，提供时未变化的二级分类直接复用已渲染的片段；
+            也可以是parallel_render.RenderedSubcategories，取用并行渲染好的区块
+        icons (dict): 内嵌图标的类名映射，见render_bookmark_card()
+    """
+    category_name = _category_name(category)
+    yield f'''
+            <section class="category" data-category="{category_name}">
+'''
+
+    yield from render_category_body(category, cache, icons)
+
+    yield '''
+            </section>
+'''
+
+
+def render_virtual_sections(bookmarks_data):
+    """
+    逐个生成虚拟列表模式的内容区
+
+    分类标题和二级分类结构与普通模式相同，但网格中不输出卡片，只记录该二级分类的
+    书签在书签数据数组中的编号范围，卡片由页面脚本在进入视口附近时创建。
+    """
+    start = 0
+    for category in bookmarks_data:
+        category_name = _category_name(category)
+        yield f'''
+            <section class="category" data-category="{category_name}">
+                <h2 class="category-title">{category_name}</h2>
+'''
+
+        for subcategory in category.subcategories or ():
+            subcategory_name = _subcategory_name(subcategory)
+            end = start + len(subcategory.bookmarks or ())
+            yield f'''
+                <div class="subcategory" data-subcategory="{subcategory_name}">
+                    <h3 class="subcategory-title">{subcategory_name}</h3>
+                    <div class="virtual-list" data-start="{start}" data-end="{end}"></div>
+                </div>
+'''
+            start = end
+
+        yield '''
+            </section>
+'''
+
+
+def bookmark_record(bookmark, icons=None):
+    """
+    书签在虚拟列表数据中的紧凑表示: [名称, 网址, 图标, 简介, 标签]，失效的书签末尾多一个1
+
+    使用内嵌图标时，图标字段为"."加CSS类名；不在映射中的图标置空。
+    """
+    icon = bookmark.icon or ''
+    if icons is not None:
+        icon_class = icons.get(icon_url_for(bookmark))
+        icon = f".{icon_class}" if icon_class else ''
+    name = bookmark.name
+    url = bookmark.url
+    record = [
+        name if name is not None else '未命名网站',
+        url if url is not None else '#',
+        icon,
+        bookmark.description or '',
+        bookmark.tags or [],
+    ]
+    if bookmark.dead:
+        record.append(1)
+    return record
+
+
+def render_bookmark_data(bookmarks_data, icons=None):
+    """逐个生成虚拟列表模式的书签数据块（按卡片顺序排列的紧凑JSON数组）"""
+    yield '''
+            <script type="application/json" id="bookmarkData">['''
+    separator = ''
+    for bookmark in iter_bookmarks(bookmarks_data):
+        record = json.dumps(bookmark_record(bookmark, icons), ensure_ascii=False, separators=(',', ':'))
+        yield separator + record.replace('</', '<\\/')
+        separator = ','
+    yield ''']</script>
+'''
+
+
+def render_shard_placeholder(category, shard_src):
+    """生成分片模式下的一级分类占位区块，内容在切换到该分类时按需加载"""
+    category_name = _category_name(category)
+    return f'''
+            <section class="category" data-category="{category_name}" data-shard="{shard_src}">
+            </section>
+'''
+
+
+def render_shard(category, shard_src, icons=None, cache=None):
+    """生成分类分片脚本：加载后把该分类的HTML交给页面中的loadShard()插入"""
+    body = ''.join(render_category_body(category, cache, icons))
+    return f"loadShard({json.dumps(shard_src)}, {json.dumps(body, ensure_ascii=False)});\n"
+
+
+def render_scripts(extra_script='', scripts_srcs=None):
+    """
+    生成scripts插槽：内联的主脚本和附加脚本，或外部脚本的<script src>
+
+    Args:
+        extra_script (str): 附加在主脚本之后的脚本块
+        scripts_srcs (list): 外部脚本的路径。提供时主脚本和附加脚本都以<script src>引用，
+            不再内联，extra_script应已包含在这些脚本中
+    """
+    if scripts_srcs is not None:
+        return '\n'.join(f'    <script src="{src}"></script>' for src in scripts_srcs)
+    return _INLINE_SCRIPT + extra_script
+
+
+# 分片模式附加的脚本：切换分类或搜索时按需加载分类分片
+SHARD_LOADER_SCRIPT = '''
+    <script>
+        // 分片模式：各分类的书签保存在单独的分片脚本中，按需加载
+        const shardSections = Array.from(document.querySelectorAll('.category[data-shard]'));
+        const shardRequests = new Map();
+
+        // 分片脚本加载后调用，把分类内容插入对应的占位区块
+        window.loadShard = (src, html) => {
+            const section = shardSections.find(s => s.getAttribute('data-shard') === src);
+            if (section && !section.hasAttribute('data-loaded')) {
+                section.insertAdjacentHTML('beforeend', html);
+                section.setAttribute('data-loaded', '');
+            }
+        };
+
+        // 以<script>方式加载，直接打开本地文件（file://）时同样可用
+        function loadScript(src) {
+            if (!shardRequests.has(src)) {
+                shardRequests.set(src, new Promise((resolve, reject) => {
+                    const script = document.createElement('script');
+                    script.src = src;
+                    script.onload = resolve;
+                    script.onerror = () => {
+                        shardRequests.delete(src);
+                        script.remove();
+                        reject(new Error(`分片加载失败: ${src}`));
+                    };
+                    document.head.appendChild(script);
+                }));
+            }
+            return shardRequests.get(src);
+        }
+
+        function fetchShard(section) {
+            return loadScript(section.getAttribute('data-shard'));
+        }
+
+        function pendingShards(category) {
+            return shardSections.filter(s => !s.hasAttribute('data-loaded') &&
+                (category === 'all' || s.getAttribute('data-category') === category));
+        }
+
+        // 切换分类时加载该分类（"全部"则加载所有分类）的分片
+        categoryTabs.forEach(tab => {
+            tab.addEventListener('click', () => {
+                const category = tab.getAttribute('data-category');
+                const pending = pendingShards(category);
+                if (pending.length === 0) return;
+
+                // 加载期间不显示"无结果"提示
+                bookmarksContainer.style.display = 'block';
+                noResults.style.display = 'none';
+
+                Promise.all(pending.map(fetchShard)).then(() => {
+                    if (currentCategory === category && searchInput.value.trim() === '' && activeTags.size === 0) {
+                        filterBookmarks();
+                    }
+                }).catch(err => console.error(err));
+            });
+        });
+
+        // 搜索需要全部分类的数据和搜索索引，首次搜索时加载剩余分片后重新搜索
+        searchInput.addEventListener('input', () => {
+            const pending = pendingShards('all').map(fetchShard);
+            const indexSrc = searchIndexElement && searchIndexElement.getAttribute('data-src');
+            if (indexSrc && !searchIndex) pending.push(loadScript(indexSrc));
+            if (searchInput.value.trim() === '' || pending.length === 0) return;
+            Promise.all(pending)
+                .then(() => searchInput.dispatchEvent(new Event('input')))
+                .catch(err => console.error(err));
+        });
+
+        // 标签筛选同样需要全部分类的数据和标签索引，首次点击标签时加载后重新筛选
+        tagChips.forEach(chip => {
+            chip.addEventListener('click', () => {
+                const pending = pendingShards('all').map(fetchShard);
+                const tagsSrc = tagIndexElement && tagIndexElement.getAttribute('data-src');
+                if (tagsSrc && !tagIndex) pending.push(loadScript(tagsSrc));
+                if (activeTags.size === 0 || pending.length === 0) return;
+
+                bookmarksContainer.style.display = 'block';
+                noResults.style.display = 'none';
+                Promise.all(pending)
+                    .then(() => { if (activeTags.size > 0) applyTagFilter(); })
+                    .catch(err => console.error(err));
+            });
+        });
+
+        // 首屏只加载第一个分类
+        categoryTabs[1]?.click();
+    </script>'''
+
+
+# 虚拟列表模式附加的脚本：只为视口附近的卡片创建DOM节点，并在滚动时回收复用
+VIRTUAL_LIST_SCRIPT = '''
+    <script>
+        // 虚拟列表模式：书签数据保存在JSON数组中，卡片按区块在进入视口附近时创建
+        (() => {
+            const records = JSON.parse(document.getElementById('bookmarkData').textContent);
+            const lists = Array.from(document.querySelectorAll('.virtual-list'));
+            const BLOCK_SIZE = 48;          // 每个区块的卡片数
+            const CARD_MIN_WIDTH = 280;     // 与.bookmarks-grid的最小列宽一致
+            const GRID_GAP = 16;            // 与.bookmarks-grid的间距一致
+            const cardPool = [];            // 回收的卡片节点
+            const lowered = new Array(records.length);
+            let rowHeight = 150;            // 行高估计，随实际测量更新
+            let filtered = false;
+
+            const observer = new IntersectionObserver(entries => {
+                entries.forEach(entry => {
+                    if (entry.isIntersecting) {
+                        mountBlock(entry.target);
+                    } else {
+                        unmountBlock(entry.target);
+                    }
+                });
+            }, { rootMargin: '1000px 0px' });
+
+            function createCard() {
+                const card = document.createElement('a');
+                card.className = 'bookmark-card';
+                card.target = '_blank';
+                card.rel = 'noopener noreferrer';
+                card.innerHTML = '<div class="bookmark-header">' +
+                    '<img class="bookmark-icon" alt="">' +
+                    '<span class="bookmark-icon bookmark-icon-bundled" role="img"></span>' +
+                    '<div class="bookmark-icon-fallback"></div>' +
+                    '<h4 class="bookmark-name"></h4>' +
+                    '</div>' +
+                    '<p class="bookmark-description"></p>' +
+                    '<div class="bookmark-tags"></div>';
+                const [icon, , fallback] = card.firstChild.children;
+                icon.addEventListener('error', () => {
+                    icon.style.display = 'none';
+                    fallback.style.display = 'flex';
+                });
+                return card;
+            }
+
+            function fillCard(card, record) {
+                const [name, url, icon, description, tags, dead] = record;
+                const [img, bundled, fallback, title] = card.firstChild.children;
+                const [, descriptionElement, tagsElement] = card.children;
+
+                card.href = url;
+                card.style.display = '';
+                card.classList.toggle('bookmark-card-dead', !!dead);
+                if (dead) {
+                    card.title = '链接可能已失效';
+                } else {
+                    card.removeAttribute('title');
+                }
+                bundled.style.display = 'none';
+                if (icon.startsWith('.')) {
+                    // 内嵌图标：以CSS类引用页面中的data URI
+                    img.removeAttribute('src');
+                    img.style.display = 'none';
+                    bundled.className = `bookmark-icon bookmark-icon-bundled ${icon.slice(1)}`;
+                    bundled.setAttribute('aria-label', name);
+                    bundled.style.display = '';
+                    fallback.style.display = 'none';
+                } else if (icon) {
+                    if (img.getAttribute('src') !== icon) img.src = icon;
+                    img.alt = name;
+                    img.style.display = '';
+                    fallback.style.display = 'none';
+                } else {
+                    img.removeAttribute('src');
+                    img.style.display = 'none';
+                    fallback.style.display = '';
+                }
+                fallback.textContent = name ? name[0].toUpperCase() : '?';
+                title.textContent = name;
+
+                descriptionElement.textContent = description;
+                descriptionElement.style.display = description ? '' : 'none';
+
+                tagsElement.textContent = '';
+                tags.forEach(tag => {
+                    const span = document.createElement('span');
+                    span.className = 'tag';
+                    span.textContent = tag;
+                    tagsElement.appendChild(span);
+                });
+                tagsElement.style.display = tags.length ? '' : 'none';
+            }
+
+            function columnCount(list) {
+                if (window.matchMedia('(max-width: 768px)').matches) return 1;
+                // 隐藏的列表宽度为0，按内容区宽度（减去左右内边距）估计
+                const width = list.clientWidth || bookmarksContainer.clientWidth - 64;
+                return Math.max(1, Math.floor((width + GRID_GAP) / (CARD_MIN_WIDTH + GRID_GAP)));
+            }
+
+            function estimateHeight(block, columns) {
+                const rows = Math.ceil(block.size / columns);
+                block.style.height = `${rows * (rowHeight + GRID_GAP) - GRID_GAP}px`;
+            }
+
+            function mountBlock(block) {
+                if (block.mounted) return;
+                const fragment = document.createDocumentFragment();
+                for (let k = 0; k < block.size; k++) {
+                    const card = cardPool.pop() || createCard();
+                    fillCard(card, records[block.ids ? block.ids[k] : block.from + k]);
+                    fragment.appendChild(card);
+                }
+                block.appendChild(fragment);
+                block.style.height = '';
+                block.mounted = true;
+            }
+
+            function unmountBlock(block) {
+                if (!block.mounted) return;
+                const height = block.offsetHeight;
+                const columns = columnCount(block.parentElement);
+                if (height > 0) {
+                    // 用实际高度占位，并据此修正行高估计
+                    block.style.height = `${height}px`;
+                    const rows = Math.ceil(block.size / columns);
+                    rowHeight = Math.max(1, (height + GRID_GAP) / rows - GRID_GAP);
+                } else {
+                    estimateHeight(block, columns);
+                }
+                while (block.firstChild) cardPool.push(block.removeChild(block.firstChild));
+                block.mounted = false;
+            }
+
+            // 重建列表的区块；ids为该列表内要显示的书签编号，null表示显示全部
+            function buildList(list, ids) {
+                list.querySelectorAll('.virtual-block').forEach(block => {
+                    unmountBlock(block);
+                    observer.unobserve(block);
+                });
+                list.textContent = '';
+
+                const start = Number(list.dataset.start);
+                const count = ids ? ids.length : Number(list.dataset.end) - start;
+                const columns = columnCount(list);
+                list.visibleCount = count;
+
+                for (let offset = 0; offset < count; offset += BLOCK_SIZE) {
+                    const block = document.createElement('div');
+                    block.className = 'bookmarks-grid virtual-block';
+                    block.size = Math.min(BLOCK_SIZE, count - offset);
+                    block.ids = ids ? ids.slice(offset, offset + block.size) : null;
+                    block.from = start + offset;
+                    estimateHeight(block, columns);
+                    list.appendChild(block);
+                    observer.observe(block);
+                }
+            }
+
+            // 在有序编号数组中取出[start, end)范围内的部分
+            function idsInRange(ids, start, end) {
+                const lowerBound = value => {
+                    let lo = 0, hi = ids.length;
+                    while (lo < hi) {
+                        const mid = (lo + hi) >> 1;
+                        if (ids[mid] < value) lo = mid + 1; else hi = mid;
+                    }
+                    return lo;
+                };
+                return ids.slice(lowerBound(start), lowerBound(end));
+            }
+
+            window.virtualList = {
+                total: records.length,
+
+                // 元素（整个内容区、分类或二级分类）内当前显示的书签数
+                count(element) {
+                    let total = 0;
+                    element.querySelectorAll('.virtual-list').forEach(list => total += list.visibleCount);
+                    return total;
+                },
+
+                // 与普通模式的data-name/data-tags/data-description匹配规则一致
+                matches(id, term) {
+                    if (!lowered[id]) {
+                        const [name, , , description, tags] = records[id];
+                        lowered[id] = [name.toLowerCase(), tags.join(' ').toLowerCase(), description.toLowerCase()];
+                    }
+                    const [name, tags, description] = lowered[id];
+                    return name.includes(term) || tags.includes(term) || description.includes(term);
+                },
+
+                scan(term) {
+                    const ids = [];
+                    for (let id = 0; id < records.length; id++) {
+                        if (this.matches(id, term)) ids.push(id);
+                    }
+                    return ids;
+                },
+
+                // 只显示给定（升序）编号的书签，返回显示的数量
+                show(ids) {
+                    filtered = true;
+                    lists.forEach(list => {
+                        const listIds = idsInRange(ids, Number(list.dataset.start), Number(list.dataset.end));
+                        buildList(list, listIds);
+                        if (listIds.length > 0) {
+                            markSearchHit(list.closest('.subcategory'));
+                            markSearchHit(list.closest('.category'));
+                        }
+                    });
+                    return ids.length;
+                },
+
+                // 为给定编号的书签单独创建一张卡片（模糊搜索的结果区使用）
+                card(id) {
+                    const card = createCard();
+                    fillCard(card, records[id]);
+                    return card;
+                },
+
+                clearFilter() {
+                    if (!filtered) return;
+                    filtered = false;
+                    lists.forEach(list => buildList(list, null));
+                },
+            };
+
+            lists.forEach(list => buildList(list, null));
+
+            // 窗口尺寸变化后列数可能改变，重新估计未挂载区块的高度
+            let resizeTimer = null;
+            window.addEventListener('resize', () => {
+                clearTimeout(resizeTimer);
+                resizeTimer = setTimeout(() => {
+                    lists.forEach(list => {
+                        const columns = columnCount(list);
+                        list.querySelectorAll('.virtual-block').forEach(block => {
+                            if (!block.mounted) estimateHeight(block, columns);
+                        });
+                    });
+                }, 150);
+            });
+        })();
+    </script>'''
+
+
+def render_search_index(index=None, src=None):
+    """生成嵌入页面的搜索索引数据块；提供src时索引位于外部脚本，按需加载"""
+    if src is not None:
+        return f'''
+    <script type="application/json" id="searchIndex" data-src="{src}"></script>
+'''
+    return f'''
+    <script type="application/json" id="searchIndex">{dump_index(index)}</script>
+'''
+
+
+def render_tag_index(index=None, src=None):
+    """生成嵌入页面的标签索引数据块；提供src时索引位于外部脚本，首次点击标签时加载"""
+    if src is not None:
+        return f'''
+    <script type="application/json" id="tagIndex" data-src="{src}"></script>
+'''
+    return f'''
+    <script type="application/json" id="tagIndex">{dump_tag_index(index)}</script>
+'''
+
+
+def mode_script(virtual=False, sharded=False):
+    """返回虚拟列表模式或分片模式附加的脚本块，普通模式返回空字符串"""
+    if virtual:
+        return VIRTUAL_LIST_SCRIPT
+    if sharded:
+        return SHARD_LOADER_SCRIPT
+    return ''
+
+
+def write_page_assets(output_file, icon_style='', virtual=False, sharded=False):
+    """
+    生产模式：把页面样式和脚本压缩后写为以内容哈希命名的外部资源文件
+
+    资源文件位于输出文件同目录的assets/下，以输出文件名为前缀（同一目录下的多个页面互不影响），
+    内容不变时文件名不变，可以长期缓存；该页面已不再引用的旧资源文件随之删除。
+
+    Args:
+        output_file (str): 输出的HTML文件路径
+        icon_style (str): 内嵌图标的CSS规则，单独写为一个样式表
+        virtual (bool): 虚拟列表模式，附加虚拟列表脚本
+        sharded (bool): 分片模式，附加分片加载脚本
+
+    Returns:
+        tuple: (样式表路径列表, 脚本路径列表)，路径相对于输出文件
+    """
+    asset_dir = os.path.join(os.path.dirname(os.path.abspath(output_file)), ASSET_DIR)
+    os.makedirs(asset_dir, exist_ok=True)
+    stem = Path(output_file).stem
+
+    styles = [write_asset(asset_dir, f"{stem}.style", minify_css(PAGE_STYLE), 'css')]
+    if icon_style:
+        styles.append(write_asset(asset_dir, f"{stem}.icons", minify_css(icon_style), 'css'))
+    scripts = [write_asset(asset_dir, f"{stem}.main", minify_js(MAIN_SCRIPT), 'js')]
+    extra_script = mode_script(virtual, sharded)
+    if extra_script:
+        body = extra_script.strip()[len('<script>'):-len('</script>')]
+        kind = 'virtual' if virtual else 'shards'
+        scripts.append(write_asset(asset_dir, f"{stem}.{kind}", minify_js(body), 'js'))
+
+    remove_stale(asset_dir, set(styles), '.css', prefix=f"{stem}.")
+    remove_stale(asset_dir, set(scripts), '.js', prefix=f"{stem}.")
+    for name in styles + scripts:
+        precompress(os.path.join(asset_dir, name))
+    return [f"{ASSET_DIR}/{name}" for name in styles], [f"{ASSET_DIR}/{name}" for name in scripts]
+
+
+def render_page(bookmarks_data, stats=None, cache=None, section_keys=None, shard_srcs=None,
+                search_index=None, search_index_src=None, virtual=False, icon_bundle=None, assets=None,
+                template=None, rendered=None, tag_index=None, tag_index_src=None):
+    """
+    按文档顺序逐段生成整个HTML页面
+
+    生成器每次只产出一个较小的片段（标签、卡片等），调用方可以直接把它们写入文件，
+    无需在内存中拼出完整页面。页面框架来自预编译的模板，其中的静态部分原样输出，
+    只有插槽按本次的数据渲染。
+
+    Args:
+        bookmarks_data (list): 一级分类（models.Category）序列
+        stats (dict): collect_stats()的结果，为空时自动统计
+        cache (FragmentCache): 片段缓存，提供时只重新渲染内容变化的分类
+        section_keys (list): 各一级分类的内容哈希，为空时自动计算
+        shard_srcs (list): 分片模式下各一级分类的分片路径，提供时内容区只输出占位区块
+        search_index (dict): build_search_index()生成的搜索索引，嵌入页面
+        search_index_src (str): 外部搜索索引脚本的路径（分片模式），与search_index二选一
+        virtual (bool): 虚拟列表模式，书签以JSON数组输出，卡片由页面脚本按需创建
+        icon_bundle (IconBundle): 内嵌图标集合，提供时图标以共享的CSS类内嵌在页面中
+        assets (tuple): write_page_assets()的结果，提供时样式和脚本以外部文件引用
+        template (PageTemplate): 页面模板（见load_page_template），为空时使用默认模板
+        rendered (RenderedSubcategories): 并行渲染好的二级分类区块（见parallel_render），
+            未使用片段缓存时按顺序取用
+        tag_index (dict): build_tag_index()生成的标签索引，提供时输出标签栏并嵌入索引
+        tag_index_src (str): 外部标签索引脚本的路径（分片模式），提供时页面中只有标签栏，
+            索引在首次点击标签时加载
+    """
+    if stats is None:
+        stats = collect_stats(bookmarks_data)
+    if cache is not None and section_keys is None:
+        section_keys = [content_hash(category) for category in bookmarks_data]
+
+    icons = icon_bundle.classes if icon_bundle is not None else None
+    icon_style = icon_bundle.css() if icon_bundle is not None else ''
+    stylesheets, scripts_srcs = assets if assets is not None else (None, None)
+
+    def category_tabs():
+        for category in bookmarks_data:
+            yield render_category_tab(category)
+
+    def subcategory_tabs():
+        for category in bookmarks_data:
+            yield render_subcategory_tabs(category)
+
+    def content():
+        if virtual:
+            yield from render_virtual_sections(bookmarks_data)
+            yield from render_bookmark_data(bookmarks_data, icons)
+        elif shard_srcs is not None:
+            for category, shard_src in zip(bookmarks_data, shard_srcs):
+                yield render_shard_placeholder(category, shard_src)
+        elif cache is None:
+            for category in bookmarks_data:
+                yield from render_category_section(category, rendered, icons)
+        else:
+            for category, key in zip(bookmarks_data, section_keys):
+                yield cache.section(category, key)
+
+    data_script = ''
+    if search_index is not None or search_index_src is not None:
+        data_script = render_search_index(search_index, search_index_src)
+    tag_bar = ''
+    if tag_index is not None:
+        tag_bar = render_tag_bar(tag_index)
+        if tag_bar:
+            data_script += render_tag_index(None if tag_index_src else tag_index, tag_index_src)
+
+    template = template or DEFAULT_TEMPLATE
+    yield from template.render({
+        'style': render_style(icon_style, stylesheets),
+        'total_bookmarks': str(stats['total_bookmarks']),
+        'total_categories': str(stats['total_categories']),
+        'total_subcategories': str(stats['total_subcategories']),
+        'year': str(datetime.now().year),
+        'category_tabs': category_tabs,
+        'subcategory_tabs': subcategory_tabs,
+        'tag_bar': tag_bar,
+        'content': content,
+        'data_script': data_script,
+        'scripts': render_scripts(mode_script(virtual, shard_srcs is not None), scripts_srcs),
+    })
+
+
+def manifest_path(output_file):
+    """返回输出文件对应的构建清单路径"""
+    return cache_path(output_file, suffix='.manifest')
+
+
+def parallel_rendered(subcategories, icons=None, jobs=1):
+    """
+    jobs不为1时在进程池中并行渲染给定的二级分类（见parallel_render.rendered_subcategories），
+    with块中得到按顺序取用的渲染结果；串行渲染时得到None
+    """
+    if jobs == 1 or not subcategories:
+        return nullcontext()
+    # 延迟导入：parallel_render依赖本模块的渲染函数
+    from parallel_render import rendered_subcategories
+    return rendered_subcategories(subcategories, icons, jobs)
+
+
+def shard_prefix(output_file):
+    """返回页面分片的文件名前缀：以输出文件名开头，同一目录下的多个页面互不影响"""
+    return f"{Path(output_file).stem}."
+
+
+def write_shards(bookmarks_data, shard_dir, section_keys=None, icons=None, icons_key=None, jobs=1, prefix=''):
+    """
+    把每个一级分类写为分片脚本
+
+    分片文件名以prefix（见shard_prefix）开头，包含分类内容哈希（section_keys提供时使用其中的键），
+    同名分片已存在时不重写。
+    jobs不为1时需要写入的分片在进程池中并行渲染（见parallel_render），0表示使用全部CPU核心。
+
+    Returns:
+        tuple: (各分类的分片路径列表, 新写入的分片数)
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    if section_keys is None:
+        section_keys = [content_hash(category) for category in bookmarks_data]
+
+    shard_srcs = []
+    pending = []
+    for index, (category, key) in enumerate(zip(bookmarks_data, section_keys)):
+        shard_key = content_hash((RENDERER_FINGERPRINT, icons_key, key))
+        shard_name = f"{prefix}{index}-{shard_key[:12]}.js"
+        shard_src = f"{SHARD_DIR}/{shard_name}"
+        shard_srcs.append(shard_src)
+
+        shard_file = os.path.join(shard_dir, shard_name)
+        if not os.path.exists(shard_file):
+            pending.append((category, shard_src, shard_file))
+
+    subcategories = []
+    if jobs != 1:
+        subcategories = [subcategory for category, _, _ in pending for subcategory in category.subcategories or ()]
+    with parallel_rendered(subcategories, icons, jobs) as rendered:
+        for category, shard_src, shard_file in pending:
+            with open(shard_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+                f.write(render_shard(category, shard_src, icons, rendered))
+    return shard_srcs, len(pending)
+
+
+def write_data_shard(shard_dir, kind, script, prefix=''):
+    """
+    把索引等数据脚本写为以prefix和kind开头、以内容哈希命名的分片，同名分片已存在时不重写
+
+    Returns:
+        tuple: (分片路径, 是否新写入)
+    """
+    shard_name = f"{prefix}{kind}-{content_hash(script)[:12]}.js"
+    shard_file = os.path.join(shard_dir, shard_name)
+    if os.path.exists(shard_file):
+        return f"{SHARD_DIR}/{shard_name}", False
+    with open(shard_file, 'w', encoding='utf-8') as f:
+        f.write(script)
+    return f"{SHARD_DIR}/{shard_name}", True
+
+
+def generate_sharded_html(bookmarks_data, output_file='index.html', search_index=True, icon_bundle=None,
+                          production=False, template=None, jobs=1, tag_facets=True, fuzzy_search=False):
+    """
+    以分片模式生成导航页面
+
+    页面本身只包含分类标签和各分类的占位区块；每个一级分类的书签写入shards/目录下
+    各自的分片脚本，切换到该分类时才加载，首屏体积和DOM规模与书签总数无关。
+    分片文件名以输出文件名为前缀（同一目录下的多个页面互不影响），并包含内容哈希，
+    内容未变化的分片不会重写，也便于长期缓存。
+    搜索索引（fuzzy_search为True时为模糊搜索索引）同样写为单独的分片，首次搜索时才加载；标签栏在页面中，标签索引写为分片，首次点击标签时加载。
+    production为True时样式和脚本写为外部资源文件，所有输出文件都生成预压缩副本。
+    template为页面模板（PageTemplate），为空时使用默认模板；jobs为渲染分片的进程数，见write_shards()。
+
+    Returns:
+        bool: 是否写入了页面文件
+    """
+    bookmarks_data = as_categories(bookmarks_data)
+    with profiling.phase('stats'):
+        stats = collect_stats(bookmarks_data)
+    icons = icon_bundle.classes if icon_bundle is not None else None
+    icons_key = icon_bundle.fingerprint() if icon_bundle is not None else None
+    output_dir = os.path.dirname(os.path.abspath(output_file))
+    shard_dir = os.path.join(output_dir, SHARD_DIR)
+    prefix = shard_prefix(output_file)
+    with profiling.phase('shards'):
+        shard_srcs, written = write_shards(bookmarks_data, shard_dir, icons=icons, icons_key=icons_key,
+                                              jobs=jobs, prefix=prefix)
+
+    # 搜索索引和标签索引的分片与分类分片分开计数
+    index_written = 0
+    search_index_src = None
+    if search_index:
+        build_index = build_fuzzy_index if fuzzy_search else build_search_index
+        with profiling.phase('search_index'):
+            index_script = f"loadSearchIndex({dump_index(build_index(bookmarks_data))});\n"
+        search_index_src, new = write_data_shard(shard_dir, 'search', index_script, prefix)
+        index_written += new
+
+    tag_index = tag_index_src = None
+    if tag_facets and 'tag_bar' in (template or DEFAULT_TEMPLATE).slots:
+        with profiling.phase('tag_index'):
+            tag_index = build_tag_index(bookmarks_data)
+        if tag_index['tags']:
+            tag_index_src, new = write_data_shard(shard_dir, 'tags', f"loadTagIndex({dump_tag_index(tag_index)});\n",
+                                                  prefix)
+            index_written += new
+
+    # 清理本页面已不再引用的旧分片
+    current = {os.path.basename(src) for src in shard_srcs}
+    index_srcs = [src for src in (search_index_src, tag_index_src) if src]
+    current.update(os.path.basename(src) for src in index_srcs)
+    remove_stale(shard_dir, current, '.js', prefix=prefix)
+
+    assets = None
+    if production:
+        assets = write_page_assets(output_file, icon_bundle.css() if icon_bundle else '', sharded=True)
+    with profiling.phase('render'):
+        page = ''.join(render_page(bookmarks_data, stats, shard_srcs=shard_srcs,
+                                   search_index_src=search_index_src, icon_bundle=icon_bundle, assets=assets,
+                                   template=template, tag_index=tag_index, tag_index_src=tag_index_src))
+    with profiling.phase('write'):
+        page_changed = True
+        if os.path.exists(output_file):
+            with open(output_file, 'r', encoding='utf-8') as f:
+                page_changed = f.read() != page
+        if page_changed:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(page)
+    if production:
+        with profiling.phase('precompress'):
+            precompress(output_file)
+            for name in current:
+                precompress(os.path.join(shard_dir, name))
+    _count_output(stats, output_file, shards=len(shard_srcs), shards_written=written,
+                  index_shards=len(index_srcs), index_shards_written=index_written)
+
+    print(f"✅ 分片页面已生成: {output_file}{'' if page_changed else '（未变化）'}")
+    print(f"🧩 分类分片: 共 {len(shard_srcs)} 个，写入 {written} 个，位于 {shard_dir}")
+    if index_srcs:
+        print(f"🗂️  索引分片（搜索、标签）: 共 {len(index_srcs)} 个，写入 {index_written} 个")
+    print(f"📊 统计信息:")
+    print(f"   - 书签总数: {stats['total_bookmarks']}")
+    print(f"   - 一级分类: {stats['total_categories']}")
+    print(f"   - 二级分类: {stats['total_subcategories']}")
+    return page_changed
+
+
+def generate_html(bookmarks_data, output_file='index.html', incremental=False, sharded=False,
+                  search_index=True, virtual=False, icon_cache_dir=None, dead_urls=None, production=False,
+                  template_file=None, jobs=1, tag_facets=True, fuzzy_search=False):
+    """
+    生成HTML导航页面
+
+    Args:
+        bookmarks_data (list): 书签数据，一级分类字典的列表会先转换为models.Category
+        output_file (str): 输出文件路径
+        incremental (bool): 增量构建。根据构建清单中记录的分类内容哈希，
+            只重新渲染变化的分类；内容完全未变化时不写入输出文件
+        sharded (bool): 分片模式，见generate_sharded_html()
+        search_index (bool): 在页面中嵌入构建期生成的搜索倒排索引
+        virtual (bool): 虚拟列表模式。书签以紧凑JSON数组嵌入页面，只为视口附近的卡片创建
+            DOM节点并在滚动时回收复用，适合数万书签的超大集合
+        icon_cache_dir (str): 本地图标缓存目录。提供时图标按内容去重后以data URI内嵌在页面中，
+            缓存中没有的图标显示首字母，页面不再请求任何第三方图标
+        dead_urls (set): 已失效的网址（见link_check.load_dead_urls），对应的书签卡片显示为失效样式
+        production (bool): 生产模式。样式和脚本压缩后写为以内容哈希命名的外部文件（可长期缓存），
+            并为所有输出文件生成.gz（安装了brotli时还有.br）预压缩副本
+        template_file (str): 自定义页面模板文件，以{{ 插槽名 }}标记插槽（见TEMPLATE_SLOTS），
+            为空时使用默认模板PAGE_TEMPLATE
+        jobs (int): 渲染书签卡片的进程数，0表示使用全部CPU核心。书签较少时（见
+            parallel_render.PARALLEL_MIN_BOOKMARKS）自动改为串行渲染；虚拟列表模式的卡片由页面脚本创建，不使用
+        tag_facets (bool): 输出标签栏并嵌入构建期生成的标签索引（见tag_index），点击标签直接按索引筛选；
+            模板中没有tag_bar插槽时不生成
+        fuzzy_search (bool): 搜索索引改为模糊搜索索引（见search_index.build_fuzzy_index）：
+            容忍拼写错误，结果按名称、标签、简介的字段权重打分，按相关度排列显示
+
+    Returns:
+        bool: 是否写入了输出文件
+    """
+
+    if sharded and virtual:
+        raise ValueError("分片模式和虚拟列表模式不能同时使用")
+
+    template = load_page_template(template_file)
+
+    bookmarks_data = as_categories(bookmarks_data)
+
+    if dead_urls:
+        with profiling.phase('mark_dead'):
+            bookmarks_data = mark_dead_links(bookmarks_data, dead_urls)
+
+    icon_bundle = None
+    if icon_cache_dir is not None:
+        with profiling.phase('icons'):
+            icon_bundle = build_icon_bundle(bookmarks_data, icon_cache_dir)
+        print(f"🖼️  内嵌图标: {len(icon_bundle.classes)} 个图标地址，去重后 {icon_bundle.unique_count} 个，"
+              f"{len(icon_bundle.missing)} 个未缓存")
+
+    if sharded:
+        return generate_sharded_html(bookmarks_data, output_file, search_index, icon_bundle, production, template,
+                                     jobs, tag_facets, fuzzy_search)
+
+    with profiling.phase('stats'):
+        stats = collect_stats(bookmarks_data)
+    cache = section_keys = None
+    tag_facets = tag_facets and 'tag_bar' in template.slots
+    icons_key = icon_bundle.fingerprint() if icon_bundle is not None else None
+
+    assets = None
+    if production:
+        with profiling.phase('assets'):
+            assets = write_page_assets(output_file, icon_bundle.css() if icon_bundle else '', virtual=virtual)
+
+    if incremental:
+        with profiling.phase('hash'):
+            section_keys = [content_hash(category) for category in bookmarks_data]
+        page_key = content_hash((RENDERER_FINGERPRINT, template.fingerprint, datetime.now().year, search_index,
+                                 fuzzy_search, tag_facets, virtual, icons_key, assets, section_keys))
+        manifest_file = manifest_path(output_file)
+        manifest = read_cache_meta(manifest_file)
+
+        if manifest and manifest['page_key'] == page_key and _output_unchanged(output_file, manifest):
+            if production:
+                precompress(output_file)
+            _count_output(stats, output_file, skipped=True)
+            print(f"⏭️  书签未变化，跳过写入: {output_file}")
+            return False
+
+        fragments = {}
+        if manifest and manifest.get('renderer') == RENDERER_FINGERPRINT:
+            with profiling.phase('manifest_read'):
+                try:
+                    fragments = read_cache_data(manifest_file)
+                except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+                    fragments = {}
+        cache = FragmentCache(fragments, icon_bundle.classes if icon_bundle else None, icons_key)
+
+    index = None
+    if search_index:
+        with profiling.phase('search_index'):
+            index = build_fuzzy_index(bookmarks_data) if fuzzy_search else build_search_index(bookmarks_data)
+    tag_index = None
+    if tag_facets:
+        with profiling.phase('tag_index'):
+            tag_index = build_tag_index(bookmarks_data)
+
+    # 并行渲染：增量构建时只渲染缓存中没有的二级分类
+    subcategory_keys = subcategories = ()
+    if jobs != 1 and not virtual:
+        if cache is not None:
+            subcategory_keys, subcategories = cache.pending_subcategories(bookmarks_data, section_keys)
+        else:
+            subcategories = [subcategory for category in bookmarks_data
+                             for subcategory in category.subcategories or ()]
+
+    with parallel_rendered(subcategories, icon_bundle.classes if icon_bundle else None, jobs) as rendered:
+        if rendered is not None and cache is not None:
+            with profiling.phase('parallel_render'):
+                cache.add_rendered(subcategory_keys, rendered)
+            rendered = None
+        # 片段经缓冲写入器直接落盘，内存占用不随书签数量增长；并行渲染的区块边取回边写出
+        with open(output_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+            profiling.write_parts(f, render_page(bookmarks_data, stats, cache, section_keys, search_index=index,
+                                                 virtual=virtual, icon_bundle=icon_bundle, assets=assets,
+                                                 template=template, rendered=rendered, tag_index=tag_index))
+    if production:
+        with profiling.phase('precompress'):
+            precompress(output_file)
+
+    if incremental:
+        with profiling.phase('manifest_write'):
+            output_stat = os.stat(output_file)
+            write_cache(manifest_file, {
+                'version': CACHE_VERSION,
+                'renderer': RENDERER_FINGERPRINT,
+                'page_key': page_key,
+                'output_size': output_stat.st_size,
+                'output_mtime_ns': output_stat.st_mtime_ns,
+            }, cache.fragments)
+        profiling.count('sections_rendered', cache.rendered)
+        profiling.count('sections_reused', cache.reused)
+    _count_output(stats, output_file)
+
     print(f"✅ HTML文件已生成: {output_file}")
+    if incremental and not virtual:
+        print(f"♻️  增量构建: 重新渲染 {cache.rendered} 个分类，复用 {cache.reused} 个分类")
     print(f"📊 统计信息:")
-    print(f"   - 书签总数: {total_bookmarks}")
-    print(f"   - 一级分类: {total_categories}")
-    print(f"   - 二级分类: {total_subcategories}")
+    print(f"   - 书签总数: {stats['total_bookmarks']}")
+    print(f"   - 一级分类: {stats['total_categories']}")
+    print(f"   - 二级分类: {stats['total_subcategories']}")
+    return True
 
 
-def main():
+def _count_output(stats, output_file, **extra):
+    """记录剖析报告中的数量统计"""
+    profiling.count('bookmarks', stats['total_bookmarks'])
+    profiling.count('categories', stats['total_categories'])
+    profiling.count('subcategories', stats['total_subcategories'])
+    profiling.count('output_bytes', os.path.getsize(output_file))
+    for name, value in extra.items():
+        profiling.count(name, value)
+
+
+def _output_unchanged(output_file, manifest):
+    """输出文件是否仍是上次构建写入的版本"""
+    try:
+        stat = os.stat(output_file)
+    except OSError:
+        return False
+    return stat.st_size == manifest['output_size'] and stat.st_mtime_ns == manifest['output_mtime_ns']
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='读取YAML格式的书签文件，生成导航网站')
+    parser.add_argument('yaml_file', nargs='?', default='bookmarks.yaml',
+                        help='输入的YAML文件、包含多个YAML文件的目录，或SQLite书签库（.db，默认: bookmarks.yaml）')
+    parser.add_argument('-o', '--output', default='index.html', help='输出的HTML文件（默认: index.html）')
+    parser.add_argument('--full', action='store_true', help='忽略构建清单，完整重新生成')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--sharded', action='store_true', help='分片模式：每个分类的书签单独成文件，按需加载')
+    mode.add_argument('--virtual', action='store_true', help='虚拟列表模式：只为视口附近的卡片创建DOM节点')
+    parser.add_argument('--no-search-index', action='store_true', help='不生成搜索索引，搜索时逐个扫描卡片')
+    parser.add_argument('--fuzzy-search', action='store_true',
+                        help='模糊搜索：容忍拼写错误，结果按相关度排列（搜索索引约为默认的两倍）')
+    parser.add_argument('--no-tag-facets', action='store_true', help='不生成标签栏和标签索引')
+    parser.add_argument('--bundle-icons', nargs='?', const=ICON_CACHE_DIR, metavar='DIR',
+                        help=f'从本地图标缓存目录（默认: {ICON_CACHE_DIR}）读取图标，去重后内嵌到页面中')
+    parser.add_argument('--production', action='store_true',
+                        help='生产模式：样式和脚本压缩后写为带内容哈希的外部文件，并为输出文件生成预压缩副本')
+    parser.add_argument('--template', metavar='FILE',
+                        help='自定义页面模板文件，以{{ 插槽名 }}标记插槽（可先用--dump-template导出默认模板修改）')
+    parser.add_argument('--dump-template', action='store_true', help='把默认页面模板输出到标准输出后退出')
+    parser.add_argument('--mark-dead', metavar='REPORT',
+                        help='根据link_check.py生成的检查报告（JSON或CSV）标记失效的书签')
+    parser.add_argument('-j', '--jobs', type=int, default=1, metavar='N',
+                        help='并行渲染书签卡片的进程数，0表示使用全部CPU核心（默认: 1；书签较少时自动串行）')
+    parser.add_argument('--watch', action='store_true',
+                        help='监视模式：书签变化后自动重新生成，并启动带自动刷新的本地服务器（可与--sharded组合）')
+    parser.add_argument('--port', type=int, default=8000, help='监视模式下本地服务器的端口（默认: 8000）')
+    parser.add_argument('--no-serve', action='store_true', help='监视模式下不启动本地服务器')
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.watch and (args.virtual or args.production or args.bundle_icons or args.mark_dead):
+        parser.error('监视模式不支持 --virtual、--production、--bundle-icons 和 --mark-dead')
+    if args.watch and is_store_file(args.yaml_file):
+        parser.error('监视模式只支持YAML书签文件')
+    if args.watch and (args.profile or args.cprofile):
+        parser.error('监视模式不支持 --profile')
+    if args.jobs < 0:
+        parser.error('--jobs 不能为负数')
+    if args.fuzzy_search and args.no_search_index:
+        parser.error('--fuzzy-search 需要搜索索引，不能与 --no-search-index 同时使用')
+    if args.watch and args.jobs != 1:
+        parser.error('监视模式不支持 --jobs')
+    if args.watch and args.fuzzy_search:
+        parser.error('监视模式的页面不生成搜索索引，不支持 --fuzzy-search')
+    return args
+
+
+def main(argv=None):
     """主函数"""
+    args = parse_args(argv)
+
+    if args.dump_template:
+        print(PAGE_TEMPLATE, end='')
+        return
+
     # 定义文件路径
-    yaml_file = 'bookmarks.yaml'
-    output_file = 'index.html'
+    yaml_file = args.yaml_file
+    output_file = args.output
     
     # 检查YAML文件是否存在
     if not Path(yaml_file).exists():
         print(f"❌ 错误: 找不到文件 {yaml_file}")
         return
+
+    # 先检查模板，有误时不必加载书签
+    if args.template:
+        try:
+            load_page_template(args.template)
+        except (OSError, ValueError) as e:
+            print(f"❌ 模板错误: {e}")
+            return
+
+    if args.watch:
+        from watch import watch
+        watch(yaml_file, output_file, port=args.port, serve=not args.no_serve, sharded=args.sharded,
+              template_file=args.template, tag_facets=not args.no_tag_facets)
+        return
     
     try:
-        # 加载书签数据
-        print(f"📖 正在读取 {yaml_file}...")
-        bookmarks_data = load_bookmarks(yaml_file)
-        
-        # 生成HTML
-        print(f"🚀 正在生成导航网站...")
-        generate_html(bookmarks_data, output_file)
-        
+        with profiling.profile_from_args('generate_nav', args):
+            # 加载书签数据
+            print(f"📖 正在读取 {yaml_file}...")
+            with profiling.phase('load'):
+                bookmarks_data = load_bookmarks(yaml_file)
+            dead_urls = None
+            if args.mark_dead:
+                with profiling.phase('load_report'):
+                    dead_urls = load_dead_urls(args.mark_dead)
+
+            # 生成HTML
+            print(f"🚀 正在生成导航网站...")
+            generate_html(bookmarks_data, output_file, incremental=not args.full, sharded=args.sharded,
+                          search_index=not args.no_search_index, virtual=args.virtual,
+                          icon_cache_dir=args.bundle_icons, dead_urls=dead_urls, production=args.production,
+                          template_file=args.template, jobs=args.jobs, tag_facets=not args.no_tag_facets,
+                          fuzzy_search=args.fuzzy_search)
+
         print(f"\n🎉 完成! 请在浏览器中打开 {output_file} 查看效果")
         
     except Exception as e:
@@ -884,4 +2609,3 @@ def main():
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+带连接池的并发HTTP客户端
+按站点复用keep-alive连接，并限制每个站点同时进行的请求数，供图标抓取和死链检查共用
+"""
+
+import http.client
+import ssl
+import threading
+from collections import OrderedDict, defaultdict, namedtuple
+from itertools import zip_longest
+from urllib.parse import urljoin, urlsplit
+
+# 默认User-Agent
+USER_AGENT = 'Mozilla/5.0 (compatible; BookmarkGenerator/1.0)'
+
+# 需要跟随的重定向状态码
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+# 复用的连接在发送请求时可能已被服务器关闭，这些异常表示可以换新连接重试一次
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+# 网络请求可能抛出的异常
+REQUEST_ERRORS = (OSError, http.client.HTTPException, ValueError)
+
+HttpResponse = namedtuple('HttpResponse', ['status', 'headers', 'body', 'url'])
+
+
+def interleave_by_host(urls):
+    """按站点轮流排列地址，避免同一站点的请求挤在一起等待并发限制"""
+    groups = defaultdict(list)
+    for url in urls:
+        groups[urlsplit(url).netloc].append(url)
+    return [url for batch in zip_longest(*groups.values()) for url in batch if url is not None]
+
+
+class HttpClient:
+    """
+    线程安全的HTTP客户端
+
+    同一站点（协议、主机、端口）的空闲连接放回连接池供后续请求复用；
+    每个站点同时进行的请求数不超过per_host，避免对单个站点造成压力。
+    """
+
+    def __init__(self, per_host=4, timeout=10, max_idle=64, user_agent=USER_AGENT):
+        self.per_host = per_host
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.user_agent = user_agent
+        self.connections_opened = 0
+        self._lock = threading.Lock()
+        self._limits = {}
+        self._idle = OrderedDict()
+        self._idle_count = 0
+        self._ssl_context = ssl.create_default_context()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _host_limit(self, key):
+        with self._lock:
+            limit = self._limits.get(key)
+            if limit is None:
+                limit = self._limits[key] = threading.BoundedSemaphore(self.per_host)
+            return limit
+
+    def _new_connection(self, key):
+        scheme, host, port = key
+        if scheme == 'https':
+            conn = http.client.HTTPSConnection(host, port, timeout=self.timeout, context=self._ssl_context)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        with self._lock:
+            self.connections_opened += 1
+        return conn
+
+    def _take_idle(self, key):
+        with self._lock:
+            conns = self._idle.get(key)
+            if not conns:
+                return None
+            conn = conns.pop()
+            if not conns:
+                del self._idle[key]
+            self._idle_count -= 1
+            return conn
+
+    def _put_idle(self, key, conn):
+        evicted = []
+        with self._lock:
+            self._idle.setdefault(key, []).append(conn)
+            self._idle.move_to_end(key)
+            self._idle_count += 1
+            # 空闲连接总数超过上限时，关闭最久未使用站点的连接
+            while self._idle_count > self.max_idle:
+                oldest_key, conns = next(iter(self._idle.items()))
+                evicted.append(conns.pop(0))
+                if not conns:
+                    del self._idle[oldest_key]
+                self._idle_count -= 1
+        for old in evicted:
+            old.close()
+
+    def _send(self, key, method, path, headers, max_bytes):
+        """在连接池中的连接上发送一次请求，返回(状态码, 响应头, 响应体)"""
+        conn = self._take_idle(key)
+        reused = conn is not None
+        if conn is None:
+            conn = self._new_connection(key)
+
+        while True:
+            try:
+                conn.request(method, path, headers=headers)
+                response = conn.getresponse()
+                if method == 'HEAD':
+                    body = response.read()
+                elif max_bytes is None:
+                    body = response.read()
+                else:
+                    body = response.read(max_bytes + 1)
+                break
+            except STALE_CONNECTION_ERRORS:
+                conn.close()
+                if not reused:
+                    raise
+                # 复用的连接已失效，换新连接重试一次
+                conn = self._new_connection(key)
+                reused = False
+            except BaseException:
+                conn.close()
+                raise
+
+        # 响应体已读完且服务器未要求关闭时，连接放回连接池
+        if response.isclosed() and not response.will_close:
+            self._put_idle(key, conn)
+        else:
+            conn.close()
+        return response.status, response.headers, body
+
+    def request(self, method, url, headers=None, max_bytes=None, max_redirects=5):
+        """
+        发送请求并跟随重定向
+
+        Args:
+            method (str): 请求方法
+            url (str): http或https地址
+            headers (dict): 附加的请求头
+            max_bytes (int): 响应体最多读取的字节数（超出时只读取max_bytes+1字节）
+            max_redirects (int): 最多跟随的重定向次数
+
+        Returns:
+            HttpResponse: url为跟随重定向后的最终地址
+
+        Raises:
+            ValueError: 地址不是http/https
+            http.client.HTTPException: 协议错误或重定向次数过多
+            OSError: 连接失败、超时等网络错误
+        """
+        request_headers = {'User-Agent': self.user_agent, 'Accept': '*/*'}
+        if headers:
+            request_headers.update(headers)
+
+        for _ in range(max_redirects + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in ('http', 'https') or not parts.hostname:
+                raise ValueError(f"不支持的地址: {url}")
+            port = parts.port or (443 if parts.scheme == 'https' else 80)
+            key = (parts.scheme, parts.hostname, port)
+            path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+
+            with self._host_limit(key):
+                status, response_headers, body = self._send(key, method, path, request_headers, max_bytes)
+
+            location = response_headers.get('Location')
+            if status in REDIRECT_STATUSES and location:
+                url = urljoin(url, location)
+                if status == 303:
+                    method = 'GET'
+                continue
+            return HttpResponse(status, response_headers, body, url)
+
+        raise http.client.HTTPException(f"重定向次数过多: {url}")
+
+    def close(self):
+        """关闭所有空闲连接"""
+        with self._lock:
+            conns = [conn for conns in self._idle.values() for conn in conns]
+            self._idle.clear()
+            self._idle_count = 0
+        for conn in conns:
+            conn.close()
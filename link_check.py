@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+死链检查
+并发检查书签文件中所有网址的可访问性，生成JSON或CSV报告；
+报告可交给generate_nav.py --mark-dead，在导航页中标记失效的书签
+"""
+
+import argparse
+import csv
+import http.client
+import json
+import os
+import pickle
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from http_pool import REQUEST_ERRORS, HttpClient, interleave_by_host
+from models import as_categories
+from yaml_cache import CACHE_VERSION, cache_path, load_categories, read_cache_data, read_cache_meta, write_cache
+
+# 检查结果：可访问、已失效（HTTP错误）、网络错误、被站点拒绝（需要登录或反爬虫，无法判断）
+RESULT_OK = 'ok'
+RESULT_DEAD = 'dead'
+RESULT_ERROR = 'error'
+RESULT_BLOCKED = 'blocked'
+
+# 在导航页中标记为失效的检查结果：网络错误（DNS失败、超时、连接重置等）多为临时故障或
+# 检查所在网络的问题，不据此标记
+DEAD_RESULTS = {RESULT_DEAD}
+
+# 这些状态码通常表示站点拒绝了自动请求，而不是页面不存在
+BLOCKED_STATUSES = {401, 403, 429}
+
+# 结果缓存的有效期：可访问的网址较少变化，失效的网址更快重新检查以排除临时故障
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_ERROR_TTL = 24 * 3600
+
+# 报告字段
+REPORT_FIELDS = ['category', 'subcategory', 'name', 'url', 'result', 'status', 'final_url', 'error']
+
+
+def iter_links(bookmarks_data):
+    """按页面顺序遍历所有书签，返回(一级分类, 二级分类, 书签)"""
+    for category in as_categories(bookmarks_data):
+        category_name = category.name if category.name is not None else '未分类'
+        for subcategory in category.subcategories or ():
+            subcategory_name = subcategory.name if subcategory.name is not None else '未命名'
+            for bookmark in subcategory.bookmarks or ():
+                yield category_name, subcategory_name, bookmark
+
+
+def classify(status):
+    """根据HTTP状态码判断检查结果"""
+    if status < 400:
+        return RESULT_OK
+    if status in BLOCKED_STATUSES:
+        return RESULT_BLOCKED
+    return RESULT_DEAD
+
+
+def check_url(client, url, now=None):
+    """
+    检查单个网址
+
+    先发送HEAD请求；不少站点不支持HEAD或对其返回错误，此时改用GET重试（只读取响应的第一个字节）。
+    连接失败、超时等网络错误直接记为error，不再重试。
+
+    Returns:
+        dict: {'result', 'status', 'final_url', 'error', 'checked_at'}
+    """
+    now = time.time() if now is None else now
+    entry = {'result': RESULT_ERROR, 'status': None, 'final_url': None, 'error': None, 'checked_at': now}
+    try:
+        try:
+            response = client.request('HEAD', url)
+        except http.client.HTTPException:
+            response = None
+        if response is None or response.status >= 400:
+            response = client.request('GET', url, max_bytes=0)
+    except REQUEST_ERRORS as e:
+        entry['error'] = str(e) or type(e).__name__
+        return entry
+
+    entry.update(result=classify(response.status), status=response.status)
+    if response.url != url:
+        entry['final_url'] = response.url
+    return entry
+
+
+class LinkCache:
+    """
+    检查结果缓存，以网址为键
+
+    可访问的结果在ttl内有效，其他结果在error_ttl内有效；过期的结果在下次检查时被覆盖，
+    书签文件中已不存在的网址在保存时淘汰。
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, error_ttl=DEFAULT_ERROR_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.entries = {}
+        if read_cache_meta(path) is not None:
+            try:
+                self.entries = read_cache_data(path)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+                self.entries = {}
+
+    def get(self, url, now):
+        """返回未过期的缓存结果，没有时返回None"""
+        entry = self.entries.get(url)
+        if entry is None:
+            return None
+        ttl = self.ttl if entry['result'] == RESULT_OK else self.error_ttl
+        return entry if now - entry['checked_at'] < ttl else None
+
+    def save(self, urls):
+        """只保留urls中网址的结果并写入磁盘"""
+        self.entries = {url: self.entries[url] for url in urls if url in self.entries}
+        write_cache(self.path, {'version': CACHE_VERSION}, self.entries)
+
+
+def check_links(bookmarks_data, cache=None, workers=128, per_host=4, timeout=10, progress=None):
+    """
+    并发检查所有书签的网址
+
+    同一网址只检查一次；请求按站点轮流排列，单站点的并发上限不会拖慢其他站点。
+
+    Args:
+        bookmarks_data (list): 书签数据
+        cache (LinkCache): 结果缓存，None表示不使用缓存
+        workers (int): 并发线程数
+        per_host (int): 每个站点同时进行的请求数上限
+        timeout (float): 单次请求超时（秒）
+        progress (callable): 每完成一个网址调用一次，参数为(已完成数, 总数)
+
+    Returns:
+        tuple: (网址到检查结果的映射, 实际发起检查的网址数)
+    """
+    now = time.time()
+    urls = {bookmark.url for _, _, bookmark in iter_links(bookmarks_data)}
+    urls.discard(None)
+
+    results = {}
+    pending = []
+    for url in sorted(urls):
+        entry = cache.get(url, now) if cache is not None else None
+        if entry is None:
+            pending.append(url)
+        else:
+            results[url] = entry
+
+    try:
+        with HttpClient(per_host=per_host, timeout=timeout) as client:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                ordered = interleave_by_host(pending)
+                for done, (url, entry) in enumerate(
+                        zip(ordered, executor.map(lambda url: check_url(client, url, now), ordered)), 1):
+                    results[url] = entry
+                    if cache is not None:
+                        cache.entries[url] = entry
+                    if progress is not None:
+                        progress(done, len(ordered))
+    finally:
+        # 中途中断时已完成的结果仍写入缓存，下次运行接着检查
+        if cache is not None:
+            cache.save(urls)
+
+    return results, len(pending)
+
+
+def build_report(bookmarks_data, results):
+    """把检查结果展开为逐个书签的报告行"""
+    rows = []
+    for category_name, subcategory_name, bookmark in iter_links(bookmarks_data):
+        url = bookmark.url
+        entry = results.get(url, {})
+        rows.append({
+            'category': category_name,
+            'subcategory': subcategory_name,
+            'name': bookmark.name if bookmark.name is not None else '未命名网站',
+            'url': url,
+            'result': entry.get('result'),
+            'status': entry.get('status'),
+            'final_url': entry.get('final_url'),
+            'error': entry.get('error'),
+        })
+    return rows
+
+
+def write_report(rows, report_file):
+    """按扩展名把报告写成CSV或JSON"""
+    if report_file.lower().endswith('.csv'):
+        with open(report_file, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        summary = Counter(row['result'] for row in rows)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump({'summary': dict(summary), 'results': rows}, f, ensure_ascii=False, indent=2)
+
+
+def load_dead_urls(report_file):
+    """从检查报告（JSON或CSV）中读取已失效的网址"""
+    if report_file.lower().endswith('.csv'):
+        with open(report_file, 'r', encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(report_file, 'r', encoding='utf-8') as f:
+            rows = json.load(f)['results']
+    return {row['url'] for row in rows if row['result'] in DEAD_RESULTS}
+
+
+def mark_dead_links(bookmarks_data, dead_urls):
+    """
+    返回标记了失效书签的数据副本（失效书签的dead为True），原数据不变
+
+    未包含失效书签的分类原样共用，增量构建时这些分类的内容哈希保持不变。
+    """
+    marked = []
+    for category in as_categories(bookmarks_data):
+        subcategories = category.subcategories or []
+        if not any(bookmark.url in dead_urls
+                   for subcategory in subcategories for bookmark in subcategory.bookmarks or ()):
+            marked.append(category)
+            continue
+        marked.append(category.replace(subcategories=[
+            subcategory.replace(bookmarks=[
+                bookmark.replace(dead=True) if bookmark.url in dead_urls else bookmark
+                for bookmark in subcategory.bookmarks or ()
+            ])
+            for subcategory in subcategories
+        ]))
+    return marked
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='并发检查书签文件中的死链')
+    parser.add_argument('yaml_file', nargs='?', default='bookmarks.yaml', help='书签YAML文件（默认: bookmarks.yaml）')
+    parser.add_argument('-o', '--report', default='link_report.json',
+                        help='检查报告文件，扩展名为.csv时输出CSV，否则输出JSON（默认: link_report.json）')
+    parser.add_argument('--workers', type=int, default=128, help='并发线程数（默认: 128）')
+    parser.add_argument('--per-host', type=int, default=4, help='每个站点的并发请求上限（默认: 4）')
+    parser.add_argument('--timeout', type=float, default=10, help='请求超时秒数（默认: 10）')
+    parser.add_argument('--ttl-days', type=float, default=DEFAULT_TTL / 86400,
+                        help='可访问结果的缓存天数（默认: 7）')
+    parser.add_argument('--error-ttl-days', type=float, default=DEFAULT_ERROR_TTL / 86400,
+                        help='失效结果的缓存天数（默认: 1）')
+    parser.add_argument('--no-cache', action='store_true', help='忽略结果缓存，重新检查所有网址')
+    args = parser.parse_args()
+
+    if not Path(args.yaml_file).exists():
+        print(f"❌ 错误: 找不到文件 {args.yaml_file}")
+        return
+
+    bookmarks_data = load_categories(args.yaml_file)
+    cache = None
+    if not args.no_cache:
+        cache = LinkCache(cache_path(args.yaml_file, '.links'), args.ttl_days * 86400, args.error_ttl_days * 86400)
+
+    def progress(done, total):
+        if done % 500 == 0 or done == total:
+            print(f"\r   已检查 {done}/{total}", end='', file=sys.stderr, flush=True)
+
+    print(f"🔗 正在检查 {args.yaml_file} 中的链接...")
+    start = time.perf_counter()
+    results, checked = check_links(bookmarks_data, cache, args.workers, args.per_host, args.timeout, progress)
+    elapsed = time.perf_counter() - start
+    if checked:
+        print(file=sys.stderr)
+
+    rows = build_report(bookmarks_data, results)
+    os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+    write_report(rows, args.report)
+
+    summary = Counter(entry['result'] for entry in results.values())
+    print(f"✅ 检查完成，用时 {elapsed:.1f} 秒，报告已写入: {args.report}")
+    print(f"   - 网址总数: {len(results)}（本次检查 {checked}，缓存命中 {len(results) - checked}）")
+    print(f"   - 可访问: {summary[RESULT_OK]}")
+    print(f"   - 已失效: {summary[RESULT_DEAD]}")
+    print(f"   - 网络错误: {summary[RESULT_ERROR]}")
+    print(f"   - 被站点拒绝: {summary[RESULT_BLOCKED]}")
+
+
+if __name__ == '__main__':
+    main()
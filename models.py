@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+书签数据模型
+一级分类、二级分类和书签的紧凑内存表示：使用__slots__，不再为每个书签保存一份键名字典；
+分类名和标签经sys.intern驻留，重复出现的字符串在内存中只保留一份；标签以元组保存。
+
+各类同时提供只读的字典式访问（get()、[]、in、keys()），按YAML中的键名读取字段，
+只按字典读取书签数据的代码无需修改；渲染等热点路径直接访问属性。
+"""
+
+import sys
+
+# CSV书签文件的列，按CSV中的顺序（yaml_to_csv.py、csv_to_yaml.py、bookmark_store.py等共用）
+CSV_FIELDNAMES = ['一级分类', '二级分类', '网站名称', '网址', '图标URL', '标签', '简介']
+
+# 可选的添加时间列（书签的added字段，见bookmark_import.py），在CSV_FIELDNAMES之后
+CSV_ADDED_FIELD = '添加时间'
+
+
+def _intern(value):
+    """驻留字符串，其他类型原样返回"""
+    return sys.intern(value) if type(value) is str else value
+
+
+def _tags(tags):
+    """把标签列表转为驻留字符串的元组；None表示没有tags字段"""
+    if tags is None:
+        return None
+    if isinstance(tags, (list, tuple)):
+        return tuple([_intern(tag) for tag in tags])
+    # 格式不规范的标签（如单个字符串）原样保留
+    return tags
+
+
+class _Model:
+    """
+    模型的公共部分：字典式只读访问、比较、复制和pickle
+
+    子类的_keys为(YAML键名, 属性名)，按写出YAML时的顺序排列；值为None的字段视为不存在。
+    YAML中的其他键保存在extra字典中（没有时为None）。
+    """
+
+    __slots__ = ()
+    _keys = ()
+
+    def keys(self):
+        """存在的键（按_keys的顺序，其他键在后）"""
+        keys = [key for key, attr in self._keys if getattr(self, attr) is not None]
+        if self.extra:
+            keys.extend(self.extra)
+        return keys
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __getitem__(self, key):
+        for name, attr in self._keys:
+            if name == key:
+                value = getattr(self, attr)
+                if value is None:
+                    raise KeyError(key)
+                return value
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return self.get(key) is not None or bool(self.extra) and key in self.extra
+
+    def to_dict(self):
+        """转换为普通字典（嵌套的模型一并转换），可直接写出为YAML或JSON"""
+        return {key: _plain(value) for key, value in self.items()}
+
+    def replace(self, **changes):
+        """返回修改了部分属性的副本，原对象不变"""
+        values = {attr: getattr(self, attr) for attr in self.__slots__}
+        values.update(changes)
+        return type(self)(**values)
+
+    def __eq__(self, other):
+        if isinstance(other, _Model):
+            return type(self) is type(other) and all(
+                getattr(self, attr) == getattr(other, attr) for attr in self.__slots__)
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        # 内容哈希（generate_nav.content_hash）基于repr，须包含全部内容且与对象身份无关
+        values = ', '.join(f"{attr}={getattr(self, attr)!r}" for attr in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+    def __reduce__(self):
+        # 以构造参数pickle：加载解析缓存时重新驻留字符串，也比逐个设置属性快
+        return type(self), tuple(getattr(self, attr) for attr in self.__slots__)
+
+
+def _plain(value):
+    """把模型及其中的元组转换为字典和列表"""
+    if isinstance(value, _Model):
+        return value.to_dict()
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _extra(data, known):
+    """返回字典中已知键以外的键值，没有时返回None"""
+    if len(data) <= len(known) and all(key in known for key in data):
+        return None
+    return {key: value for key, value in data.items() if key not in known} or None
+
+
+class Bookmark(_Model):
+    """
+    书签
+
+    Attributes:
+        name, url, icon, description: 字段值，没有该字段时为None
+        tags (tuple): 标签（驻留字符串），没有tags字段时为None
+        dead (bool): 是否已失效（见link_check.mark_dead_links）
+        extra (dict): 其他字段
+    """
+
+    __slots__ = ('name', 'url', 'icon', 'description', 'tags', 'dead', 'extra')
+    _keys = (('name', 'name'), ('url', 'url'), ('icon', 'icon'), ('tags', 'tags'),
+             ('description', 'description'))
+    _known = frozenset(['name', 'url', 'icon', 'tags', 'description', 'dead'])
+
+    def __init__(self, name=None, url=None, icon=None, description=None, tags=None, dead=False, extra=None):
+        self.name = name
+        self.url = url
+        self.icon = icon
+        self.description = description
+        self.tags = _tags(tags)
+        self.dead = dead
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data):
+        """由书签字典构建"""
+        if type(data) is cls:
+            return data
+        if not isinstance(data, dict):
+            raise ValueError(f"书签数据格式错误：书签应为映射，实际为{data!r}")
+        get = data.get
+        return cls(get('name'), get('url'), get('icon'), get('description'), get('tags'),
+                   bool(get('dead', False)), _extra(data, cls._known))
+
+    def keys(self):
+        keys = super().keys()
+        if self.dead:
+            keys.append('dead')
+        return keys
+
+    def __getitem__(self, key):
+        if key == 'dead' and self.dead:
+            return True
+        return super().__getitem__(key)
+
+
+class Subcategory(_Model):
+    """
+    二级分类
+
+    Attributes:
+        name: 二级分类名（驻留字符串），没有name字段时为None
+        bookmarks (list): Bookmark列表，没有bookmarks字段时为None
+        extra (dict): 其他字段
+    """
+
+    __slots__ = ('name', 'bookmarks', 'extra')
+    _keys = (('name', 'name'), ('bookmarks', 'bookmarks'))
+    _known = frozenset(['name', 'bookmarks'])
+
+    def __init__(self, name=None, bookmarks=None, extra=None):
+        self.name = _intern(name)
+        self.bookmarks = bookmarks
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data):
+        """由二级分类字典构建，其中的书签一并转换"""
+        if type(data) is cls:
+            return data
+        if not isinstance(data, dict):
+            raise ValueError(f"书签数据格式错误：二级分类应为映射，实际为{data!r}")
+        bookmarks = data.get('bookmarks')
+        if isinstance(bookmarks, list):
+            from_dict = Bookmark.from_dict
+            bookmarks = [from_dict(bookmark) for bookmark in bookmarks]
+        return cls(data.get('name'), bookmarks, _extra(data, cls._known))
+
+
+class Category(_Model):
+    """
+    一级分类
+
+    Attributes:
+        name: 一级分类名（驻留字符串，YAML中的category字段），没有该字段时为None
+        subcategories (list): Subcategory列表，没有subcategories字段时为None
+        extra (dict): 其他字段
+    """
+
+    __slots__ = ('name', 'subcategories', 'extra')
+    _keys = (('category', 'name'), ('subcategories', 'subcategories'))
+    _known = frozenset(['category', 'subcategories'])
+
+    def __init__(self, name=None, subcategories=None, extra=None):
+        self.name = _intern(name)
+        self.subcategories = subcategories
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data):
+        """由一级分类字典构建，其中的二级分类和书签一并转换"""
+        if type(data) is cls:
+            return data
+        if not isinstance(data, dict):
+            raise ValueError(f"书签数据格式错误：一级分类应为映射，实际为{data!r}")
+        subcategories = data.get('subcategories')
+        if isinstance(subcategories, list):
+            from_dict = Subcategory.from_dict
+            subcategories = [from_dict(subcategory) for subcategory in subcategories]
+        return cls(data.get('category'), subcategories, _extra(data, cls._known))
+
+
+def as_categories(bookmarks_data):
+    """
+    把书签数据（一级分类字典的列表）转换为Category列表，已是模型的分类原样保留
+
+    None视为空列表；不是列表的序列（如bookmark_store.StoreCategories，逐个产出模型）原样返回。
+    """
+    if bookmarks_data is None:
+        return []
+    if not isinstance(bookmarks_data, list):
+        return bookmarks_data
+    from_dict = Category.from_dict
+    return [from_dict(category) for category in bookmarks_data]
+
+
+def iter_bookmarks(bookmarks_data):
+    """按页面中的卡片顺序遍历所有书签（bookmarks_data为Category序列）"""
+    for category in bookmarks_data:
+        for subcategory in category.subcategories or ():
+            yield from subcategory.bookmarks or ()
+
+
+def to_plain(bookmarks_data):
+    """把Category序列转换为普通字典的列表"""
+    return [category.to_dict() for category in bookmarks_data]
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+页面模板
+把页面模板预编译为静态文本与插槽交替的片段：静态部分（页面框架、样式和脚本）只在编译时切分一次，
+生成页面时原样输出，只有插槽（统计数字、分类标签、内容区等）按每次构建的数据渲染。
+
+模板中以{{ 插槽名 }}标记插槽，其余文本（包括CSS和JavaScript中的花括号）原样保留，无需转义。
+"""
+
+import hashlib
+import os
+import re
+
+# 插槽标记
+SLOT_RE = re.compile(r'\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}')
+
+# 已编译的模板文件，以(路径, 大小, 修改时间)为键
+_compiled = {}
+
+
+class PageTemplate:
+    """
+    预编译的页面模板
+
+    Attributes:
+        parts (tuple): (静态文本, 插槽名)序列，最后一段的插槽名为None
+        slots (frozenset): 模板中用到的插槽
+        fingerprint (str): 模板内容的哈希，模板变化时增量构建随之失效
+    """
+
+    def __init__(self, text, slots, required=(), name='模板'):
+        """
+        Args:
+            text (str): 模板文本
+            slots (iterable): 允许使用的插槽名
+            required (iterable): 模板中必须出现的插槽名
+            name (str): 模板名称（如文件路径），用于错误信息
+
+        Raises:
+            ValueError: 模板中有未知的插槽，或缺少必需的插槽
+        """
+        allowed = set(slots)
+        parts = []
+        used = set()
+        start = 0
+        for match in SLOT_RE.finditer(text):
+            slot = match.group(1)
+            if slot not in allowed:
+                raise ValueError(f"{name}中有未知的插槽{{{{ {slot} }}}}，可用的插槽: {', '.join(sorted(allowed))}")
+            parts.append((text[start:match.start()], slot))
+            used.add(slot)
+            start = match.end()
+        parts.append((text[start:], None))
+
+        missing = [slot for slot in required if slot not in used]
+        if missing:
+            raise ValueError(f"{name}缺少必需的插槽: {', '.join(missing)}")
+
+        self.parts = tuple(parts)
+        self.slots = frozenset(used)
+        self.fingerprint = hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+    def render(self, values):
+        """
+        按顺序逐段生成页面
+
+        Args:
+            values (dict): 插槽名到值的映射。值为字符串，或无参数的可调用对象
+                （返回字符串或片段序列，只在插槽出现时才调用，模板未用到的插槽不会渲染）
+        """
+        for static, slot in self.parts:
+            if static:
+                yield static
+            if slot is None:
+                continue
+            value = values[slot]
+            if callable(value):
+                value = value()
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+
+
+def load_template(path, slots, required=()):
+    """
+    读取并编译模板文件；文件未变化（大小和修改时间相同）时直接返回已编译的模板
+
+    Raises:
+        FileNotFoundError: 文件不存在
+        ValueError: 模板中有未知的插槽，或缺少必需的插槽
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    template = _compiled.get(key)
+    if template is None:
+        with open(path, 'r', encoding='utf-8') as f:
+            template = PageTemplate(f.read(), slots, required, name=f"模板文件{path}")
+        # 同一文件只保留最新的编译结果
+        for old_key in [old_key for old_key in _compiled if old_key[0] == path]:
+            del _compiled[old_key]
+        _compiled[key] = template
+    return template
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程并行渲染
+把要渲染的书签卡片切成书签数大致相等的连续区段（过大的二级分类同样会被切开），在进程池中渲染，
+再按原顺序拼回各二级分类区块，输出与串行渲染逐字节相同。
+
+书签数据在创建worker时传入（fork方式下直接继承，无需序列化），任务只包含区段的位置；
+结果按顺序逐个取回，主进程写出前面的区块时worker继续渲染后面的区段。
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import chain
+
+from generate_nav import SUBCATEGORY_END, render_bookmark_card, render_subcategory_head
+
+# 需要渲染的书签少于此数时，进程池启动和结果传输的开销超过节省的时间，自动改为串行渲染
+PARALLEL_MIN_BOOKMARKS = 20000
+
+# 每个worker平均分到的区段数：区段多一些，各worker的负载更均衡
+CHUNKS_PER_WORKER = 4
+
+# 区段的最小书签数，避免任务过碎
+MIN_CHUNK_SIZE = 500
+
+# worker进程中的二级分类列表和图标映射（由_init_worker设置）
+_subcategories = None
+_icons = None
+
+
+def resolve_jobs(jobs):
+    """返回实际的worker数：0或None表示使用全部CPU核心"""
+    return jobs if jobs else (os.cpu_count() or 1)
+
+
+def plan_chunks(subcategories, chunk_size):
+    """
+    把二级分类中的书签按顺序切成区段
+
+    Returns:
+        tuple: (任务列表, 各二级分类的区段数)。每个任务是(二级分类编号, 起始, 结束)的列表，
+            书签数合计约为chunk_size；各二级分类的区段按顺序分布在相邻的任务中
+    """
+    tasks = []
+    counts = []
+    task = []
+    filled = 0
+    for index, subcategory in enumerate(subcategories):
+        size = len(subcategory.bookmarks or ())
+        start = 0
+        pieces = 0
+        while start < size:
+            end = min(size, start + chunk_size - filled)
+            task.append((index, start, end))
+            pieces += 1
+            filled += end - start
+            start = end
+            if filled >= chunk_size:
+                tasks.append(task)
+                task = []
+                filled = 0
+        counts.append(pieces)
+    if task:
+        tasks.append(task)
+    return tasks, counts
+
+
+def _init_worker(subcategories, icons):
+    global _subcategories, _icons
+    _subcategories = subcategories
+    _icons = icons
+
+
+def _render_task(task):
+    """在worker中渲染一个任务的各区段，每个区段返回拼好的卡片HTML"""
+    return [
+        ''.join([render_bookmark_card(bookmark, _icons) for bookmark in _subcategories[index].bookmarks[start:end]])
+        for index, start, end in task
+    ]
+
+
+class RenderedSubcategories:
+    """
+    按顺序取回并行渲染的二级分类区块
+
+    subcategory()的接口与FragmentCache.subcategory()相同，可作为render_category_section()等函数的
+    cache参数；调用顺序必须与传入的二级分类顺序一致。
+    """
+
+    def __init__(self, subcategories, counts, chunks):
+        self.subcategories = subcategories
+        self.counts = counts
+        self.chunks = chunks
+        self.position = 0
+
+    def subcategory(self, subcategory):
+        """返回下一个二级分类的完整区块"""
+        position = self.position
+        if position >= len(self.subcategories) or self.subcategories[position] is not subcategory:
+            raise RuntimeError('并行渲染的二级分类与取用顺序不一致')
+        self.position = position + 1
+        cards = ''.join([next(self.chunks) for _ in range(self.counts[position])])
+        return render_subcategory_head(subcategory) + cards + SUBCATEGORY_END
+
+    def __iter__(self):
+        """按顺序逐个返回(二级分类, 区块)"""
+        for subcategory in self.subcategories[self.position:]:
+            yield subcategory, self.subcategory(subcategory)
+
+
+@contextmanager
+def rendered_subcategories(subcategories, icons=None, jobs=None, min_bookmarks=None):
+    """
+    在进程池中并行渲染给定的二级分类，with块中得到RenderedSubcategories
+
+    worker数不超过1，或书签数少于min_bookmarks时不启动进程池，得到None，调用方按串行方式渲染。
+
+    Args:
+        subcategories (list): 要渲染的二级分类（models.Subcategory），按取用顺序排列
+        icons (dict): 内嵌图标的类名映射，见generate_nav.render_bookmark_card()
+        jobs (int): worker数，0或None表示使用全部CPU核心
+        min_bookmarks (int): 启用并行渲染的最少书签数，为空时使用PARALLEL_MIN_BOOKMARKS
+    """
+    jobs = resolve_jobs(jobs)
+    if min_bookmarks is None:
+        min_bookmarks = PARALLEL_MIN_BOOKMARKS
+    total = sum(len(subcategory.bookmarks or ()) for subcategory in subcategories)
+    if jobs <= 1 or total < min_bookmarks:
+        yield None
+        return
+
+    chunk_size = max(MIN_CHUNK_SIZE, -(-total // (jobs * CHUNKS_PER_WORKER)))
+    tasks, counts = plan_chunks(subcategories, chunk_size)
+    executor = ProcessPoolExecutor(min(jobs, len(tasks)), initializer=_init_worker, initargs=(subcategories, icons))
+    try:
+        chunks = chain.from_iterable(executor.map(_render_task, tasks))
+        yield RenderedSubcategories(subcategories, counts, chunks)
+    except BaseException:
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
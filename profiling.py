@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分阶段性能剖析
+为generate_nav.py、csv_to_yaml.py和yaml_to_csv.py的--profile选项记录各阶段（解析、渲染、写入等）
+的耗时、tracemalloc峰值内存和数量统计，写为JSON报告供CI长期跟踪；可同时保存cProfile数据。
+
+未启用时phase()、count()等函数不做任何事，埋点对正常运行没有开销。
+"""
+
+import cProfile
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+# 报告格式版本
+REPORT_VERSION = 1
+
+# --profile不带参数时的报告文件
+DEFAULT_REPORT = 'profile.json'
+
+# 当前启用的剖析器（见profile()），未启用时为None
+_active = None
+
+
+class Profiler:
+    """
+    记录各阶段的耗时和峰值内存
+
+    阶段按首次出现的顺序排列，同名阶段多次进入时耗时累加、峰值取最大。
+    阶段之间不应嵌套：进入阶段时会重置tracemalloc的峰值。
+    """
+
+    def __init__(self, command, trace_memory=True, cprofile_file=None):
+        self.command = command
+        self.trace_memory = trace_memory
+        self.cprofile_file = cprofile_file
+        self.cprofile = None
+        self.phases = {}
+        self.counts = {}
+        self.peak_memory = 0
+        self.started = None
+        self.seconds = None
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.cprofile_file:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.seconds = time.perf_counter() - self.started
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.cprofile_file)
+        if tracemalloc.is_tracing():
+            self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+    def _entry(self, name):
+        entry = self.phases.get(name)
+        if entry is None:
+            entry = self.phases[name] = {'seconds': 0.0, 'calls': 0, 'peak_memory': 0}
+        return entry
+
+    @contextmanager
+    def phase(self, name):
+        """计时一个阶段"""
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, tracemalloc.get_traced_memory()[1] if tracing else 0)
+
+    def add(self, name, seconds, peak_memory=0):
+        """记录在别处测得的阶段耗时"""
+        entry = self._entry(name)
+        entry['seconds'] += seconds
+        entry['calls'] += 1
+        entry['peak_memory'] = max(entry['peak_memory'], peak_memory)
+        self.peak_memory = max(self.peak_memory, peak_memory)
+
+    def count(self, name, value):
+        self.counts[name] = value
+
+    def report(self):
+        """生成报告字典"""
+        return {
+            'version': REPORT_VERSION,
+            'command': self.command,
+            'argv': sys.argv[1:],
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'total_seconds': round(self.seconds, 6),
+            'peak_memory': self.peak_memory if self.trace_memory else None,
+            'phases': [
+                {'name': name, 'seconds': round(entry['seconds'], 6), 'calls': entry['calls'],
+                 'peak_memory': entry['peak_memory'] if self.trace_memory else None}
+                for name, entry in self.phases.items()
+            ],
+            'counts': self.counts,
+            'cprofile': self.cprofile_file,
+        }
+
+
+def phase(name):
+    """计时一个阶段；未启用剖析时什么也不做"""
+    return _active.phase(name) if _active is not None else nullcontext()
+
+
+def count(name, value):
+    """记录一项数量统计（如书签数、输出字节数）；未启用剖析时什么也不做"""
+    if _active is not None:
+        _active.count(name, value)
+
+
+def write_parts(f, parts, render_phase='render', write_phase='write'):
+    """
+    把生成器产出的片段写入文件
+
+    启用剖析时分别统计生成片段（渲染）和写入文件的耗时，否则等同于f.writelines(parts)。
+    """
+    if _active is None:
+        f.writelines(parts)
+        return
+    write = f.write
+    perf_counter = time.perf_counter
+    write_seconds = 0.0
+    with _active.phase(render_phase):
+        for part in parts:
+            start = perf_counter()
+            write(part)
+            write_seconds += perf_counter() - start
+    _active.phases[render_phase]['seconds'] -= write_seconds
+    _active.add(write_phase, write_seconds)
+
+
+@contextmanager
+def profile(command, report_file=None, cprofile_file=None, trace_memory=True):
+    """
+    在with块中启用剖析，结束时写出JSON报告（及cProfile数据）
+
+    report_file为None时不启用，with块照常执行。
+    """
+    global _active
+    if report_file is None:
+        yield None
+        return
+
+    profiler = Profiler(command, trace_memory, cprofile_file)
+    _active = profiler
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        _active = None
+        report_dir = os.path.dirname(os.path.abspath(report_file))
+        os.makedirs(report_dir, exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(profiler.report(), f, ensure_ascii=False, indent=2)
+        print_summary(profiler, report_file)
+
+
+def print_summary(profiler, report_file):
+    """打印各阶段耗时"""
+    print(f"⏱️  性能报告已写入: {report_file}（总耗时 {profiler.seconds:.3f} 秒）")
+    for name, entry in profiler.phases.items():
+        memory = f"，峰值内存 {entry['peak_memory'] / 1024 / 1024:.1f}MB" if profiler.trace_memory else ''
+        print(f"   - {name}: {entry['seconds']:.3f} 秒{memory}")
+    if profiler.cprofile_file:
+        print(f"   cProfile数据: {profiler.cprofile_file}")
+
+
+def add_arguments(parser):
+    """为命令行解析器添加--profile、--cprofile和--profile-no-memory选项"""
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_REPORT, metavar='REPORT',
+                        help=f'记录各阶段的耗时、峰值内存和数量统计，写为JSON报告（默认: {DEFAULT_REPORT}）')
+    parser.add_argument('--cprofile', metavar='FILE',
+                        help='与--profile一起使用，同时把cProfile数据写入此文件（可用pstats或snakeviz查看）')
+    parser.add_argument('--profile-no-memory', action='store_true',
+                        help='与--profile一起使用，不跟踪内存分配（tracemalloc会明显拖慢运行，耗时更接近实际）')
+
+
+def profile_from_args(command, args):
+    """按add_arguments()添加的选项启用剖析"""
+    report_file = args.profile
+    if report_file is None and args.cprofile:
+        report_file = DEFAULT_REPORT
+    return profile(command, report_file, args.cprofile, trace_memory=not args.profile_no_memory)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+构建期搜索索引
+为导航页预先计算倒排索引：把书签名称、标签和简介中的词的一至三字符片段、
+中文单字和二元组映射到书签卡片编号，页面搜索时只需求交集再逐个校验候选，无需扫描全部卡片；
+任何子串都能由片段找到，结果与逐个扫描的子串匹配相同。
+模糊搜索使用另一种索引：词按三元组切分并记录命中的字段，页面按命中的键数和字段权重为候选书签打分排序，
+拼写有误时仍能找到
+"""
+
+import json
+import re
+from functools import lru_cache
+
+from models import as_categories, iter_bookmarks
+
+# 索引格式版本
+INDEX_VERSION = 2
+
+# 非中文词索引的片段最大长度；更长的查询词取其中所有此长度的片段求交集后再校验
+MAX_GRAM_LENGTH = 3
+
+# 模糊搜索中名称、标签、简介各字段的权重
+FUZZY_FIELD_WEIGHTS = (3, 2, 1)
+
+# 中日韩字符范围：这些字符按单字和二元组切分
+CJK_CHARS = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+
+# 连续的中文字符，或连续的其他字母数字
+TOKEN_RE = re.compile(f'[{CJK_CHARS}]+|[^\\W_{CJK_CHARS}]+')
+CJK_RE = re.compile(f'[{CJK_CHARS}]')
+
+
+def searchable_text(bookmark):
+    """返回书签（models.Bookmark）参与搜索的文本（名称、标签和简介，小写）"""
+    name = bookmark.name
+    return ' '.join([
+        name if name is not None else '未命名网站',
+        ' '.join(bookmark.tags or ()),
+        bookmark.description or '',
+    ]).lower()
+
+
+@lru_cache(maxsize=1 << 16)
+def _token_index_keys(token):
+    """单个词的索引键；书签中的词大量重复，按词缓存"""
+    if CJK_RE.match(token):
+        return frozenset(token).union(token[i:i + 2] for i in range(len(token) - 1))
+    return frozenset(token[i:i + n] for n in range(1, MAX_GRAM_LENGTH + 1) for i in range(len(token) - n + 1))
+
+
+def index_keys(text):
+    """
+    返回文本的全部索引键
+
+    非中文词索引其所有长度为1至MAX_GRAM_LENGTH的片段；
+    中文片段索引每个单字和相邻二元组。
+    """
+    keys = set()
+    for token in TOKEN_RE.findall(text):
+        keys |= _token_index_keys(token)
+    return keys
+
+
+@lru_cache(maxsize=1 << 16)
+def _token_fuzzy_keys(token):
+    """单个词的模糊搜索索引键；书签中的词大量重复，按词缓存"""
+    if CJK_RE.match(token):
+        return frozenset(token).union(token[i:i + 2] for i in range(len(token) - 1))
+    padded = f' {token} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2)).union((padded[:2],))
+
+
+def fuzzy_keys(text):
+    """
+    返回文本的模糊搜索索引键
+
+    非中文词前后补空格后切分为三元组，另加词首的二元组（只输入了一个字母时使用）；
+    中文片段与index_keys()相同，索引每个单字和相邻二元组。
+    """
+    keys = set()
+    for token in TOKEN_RE.findall(text):
+        keys |= _token_fuzzy_keys(token)
+    return keys
+
+
+def fuzzy_fields(bookmark):
+    """返回书签参与模糊搜索的各字段文本（小写），顺序与FUZZY_FIELD_WEIGHTS一致"""
+    name = bookmark.name
+    return (
+        (name if name is not None else '未命名网站').lower(),
+        ' '.join(bookmark.tags or ()).lower(),
+        (bookmark.description or '').lower(),
+    )
+
+
+def build_search_index(bookmarks_data):
+    """
+    构建倒排索引
+
+    Returns:
+        dict: {'version', 'count': 卡片总数, 'maxGram', 'postings': {键: 差分编码的卡片编号}}
+    """
+    postings = {}
+    count = 0
+    for card_id, bookmark in enumerate(iter_bookmarks(as_categories(bookmarks_data))):
+        for key in index_keys(searchable_text(bookmark)):
+            ids = postings.get(key)
+            if ids is None:
+                postings[key] = [card_id]
+            else:
+                ids.append(card_id)
+        count = card_id + 1
+
+    # 编号递增，按差分编码存储以缩小体积
+    for key, ids in postings.items():
+        postings[key] = [ids[0]] + [b - a for a, b in zip(ids, ids[1:])]
+
+    return {
+        'version': INDEX_VERSION,
+        'count': count,
+        'maxGram': MAX_GRAM_LENGTH,
+        'postings': postings,
+    }
+
+
+def build_fuzzy_index(bookmarks_data):
+    """
+    构建模糊搜索索引
+
+    Returns:
+        dict: {'version', 'kind': 'fuzzy', 'count': 卡片总数, 'weights': 各字段权重,
+            'postings': {键: [编号差值, 字段掩码, 编号差值, 字段掩码, ...]}}，
+            字段掩码的第i位表示键出现在第i个字段（见FUZZY_FIELD_WEIGHTS）中
+    """
+    postings = {}
+    count = 0
+    for card_id, bookmark in enumerate(iter_bookmarks(as_categories(bookmarks_data))):
+        masks = {}
+        for bit, text in enumerate(fuzzy_fields(bookmark)):
+            flag = 1 << bit
+            for key in fuzzy_keys(text):
+                masks[key] = masks.get(key, 0) | flag
+        for key, mask in masks.items():
+            entries = postings.get(key)
+            if entries is None:
+                postings[key] = [card_id, mask]
+            else:
+                entries.append(card_id)
+                entries.append(mask)
+        count = card_id + 1
+
+    # 编号差分编码，字段掩码原样保留
+    for entries in postings.values():
+        for i in range(len(entries) - 2, 0, -2):
+            entries[i] -= entries[i - 2]
+
+    return {
+        'version': INDEX_VERSION,
+        'kind': 'fuzzy',
+        'count': count,
+        'weights': list(FUZZY_FIELD_WEIGHTS),
+        'postings': postings,
+    }
+
+
+def dump_index(index):
+    """把索引序列化为紧凑的JSON，可直接嵌入<script>元素"""
+    # 按键排序，同样的数据总是得到相同的输出（集合的遍历顺序随进程变化）
+    text = json.dumps(index, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    return text.replace('</', '<\\/')
+
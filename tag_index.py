@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+构建期标签索引
+统计每个标签的书签数，并预先计算标签到书签卡片编号的倒排列表：页面上点击标签时直接按列表显示卡片，
+无需逐个扫描卡片；同样的索引也可以导出为JSON，供其他工具使用
+"""
+
+import argparse
+import json
+
+from models import as_categories, iter_bookmarks
+from search_index import dump_index
+
+# 索引格式版本
+TAG_INDEX_VERSION = 1
+
+
+def tag_key(tag):
+    """标签的归并键：去掉首尾空白并转为小写，大小写不同的同一标签合并计数"""
+    return str(tag).strip().lower()
+
+
+def build_tag_index(bookmarks_data, delta=True):
+    """
+    构建标签索引
+
+    同一标签的不同大小写写法合并，显示名取第一次出现的写法。
+
+    Args:
+        bookmarks_data (list): 一级分类序列
+        delta (bool): 卡片编号是否差分编码（嵌入页面时使用，体积更小）
+
+    Returns:
+        dict: {'version', 'count': 卡片总数, 'tags': [{'name', 'count', 'ids'}]}，
+            标签按书签数从多到少（相同时按名称）排列，ids为带有该标签的卡片编号（按页面中的顺序）
+    """
+    names = {}
+    postings = {}
+    count = 0
+    for card_id, bookmark in enumerate(iter_bookmarks(as_categories(bookmarks_data))):
+        count = card_id + 1
+        for tag in bookmark.tags or ():
+            key = tag_key(tag)
+            if not key:
+                continue
+            ids = postings.get(key)
+            if ids is None:
+                postings[key] = [card_id]
+                names[key] = str(tag).strip()
+            elif ids[-1] != card_id:
+                # 同一书签中重复的标签只计一次
+                ids.append(card_id)
+
+    tags = []
+    for key in sorted(postings, key=lambda key: (-len(postings[key]), key)):
+        ids = postings[key]
+        if delta:
+            ids = [ids[0]] + [b - a for a, b in zip(ids, ids[1:])]
+        tags.append({'name': names[key], 'count': len(postings[key]), 'ids': ids})
+
+    return {
+        'version': TAG_INDEX_VERSION,
+        'count': count,
+        'tags': tags,
+    }
+
+
+def export_tag_index(bookmarks_data, with_bookmarks=True):
+    """
+    生成供其他工具使用的标签索引：卡片编号不做差分编码，并附上编号对应的书签
+
+    Returns:
+        dict: build_tag_index()的结果，with_bookmarks为True时另有'bookmarks'：
+            按编号排列的{'category', 'subcategory', 'name', 'url'}
+    """
+    bookmarks_data = as_categories(bookmarks_data)
+    index = build_tag_index(bookmarks_data, delta=False)
+    if with_bookmarks:
+        index['bookmarks'] = [
+            {'category': category.name, 'subcategory': subcategory.name, 'name': bookmark.name, 'url': bookmark.url}
+            for category in bookmarks_data
+            for subcategory in category.subcategories or ()
+            for bookmark in subcategory.bookmarks or ()
+        ]
+    return index
+
+
+def dump_tag_index(index):
+    """把索引序列化为紧凑的JSON，可直接嵌入<script>元素"""
+    return dump_index(index)
+
+
+def main():
+    """主函数"""
+    # 延迟导入：generate_nav依赖本模块
+    from generate_nav import load_bookmarks
+
+    parser = argparse.ArgumentParser(description='统计书签标签，导出标签到书签的索引（JSON）')
+    parser.add_argument('source', nargs='?', default='bookmarks.yaml',
+                        help='书签YAML文件、YAML目录或SQLite书签库（默认: bookmarks.yaml）')
+    parser.add_argument('-o', '--output', default='tag_index.json', help='输出的JSON文件（默认: tag_index.json）')
+    parser.add_argument('--no-bookmarks', action='store_true', help='只输出标签和卡片编号，不附带书签列表')
+    parser.add_argument('--top', type=int, default=10, help='打印书签数最多的前N个标签（默认: 10）')
+    args = parser.parse_args()
+
+    try:
+        index = export_tag_index(load_bookmarks(args.source), with_bookmarks=not args.no_bookmarks)
+    except FileNotFoundError:
+        print(f"❌ 错误: 找不到文件 {args.source}")
+        return
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+
+    print(f"🏷️  {index['count']} 个书签，{len(index['tags'])} 个标签，索引已写入: {args.output}")
+    for tag in index['tags'][:args.top]:
+        print(f"   - {tag['name']}: {tag['count']}")
+
+
+if __name__ == "__main__":
+    main()
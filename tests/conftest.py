@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""测试配置：各模块位于仓库根目录，测试直接按模块名导入"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
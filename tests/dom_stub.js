@@ -0,0 +1,172 @@
+// 在node中运行生成页面脚本的最小DOM替身（不依赖jsdom），供test_ranked_search.py使用
+// 用法: node dom_stub.js <页面HTML> <查询>...；每个查询输出一行JSON
+const fs = require('fs');
+
+class ClassList {
+    constructor(element) { this.element = element; this.names = new Set(); }
+    add(...names) { names.forEach(name => this.names.add(name)); }
+    remove(...names) { names.forEach(name => this.names.delete(name)); }
+    contains(name) { return this.names.has(name); }
+    toggle(name, force) {
+        if (force === undefined) force = !this.names.has(name);
+        force ? this.names.add(name) : this.names.delete(name);
+        return force;
+    }
+}
+
+class Element {
+    constructor(tag, attrs = {}) {
+        this.tag = tag;
+        this.attrs = attrs;
+        this.parent = null;
+        this.children = [];
+        this.style = {};
+        this.listeners = {};
+        this.textContent = '';
+        this.classList = new ClassList(this);
+        (attrs.class || '').split(/\s+/).filter(Boolean).forEach(name => this.classList.add(name));
+    }
+    set className(value) { this.classList.names = new Set(value.split(/\s+/).filter(Boolean)); }
+    get className() { return Array.from(this.classList.names).join(' '); }
+    getAttribute(name) { return name in this.attrs ? this.attrs[name] : null; }
+    hasAttribute(name) { return name in this.attrs; }
+    setAttribute(name, value) { this.attrs[name] = String(value); }
+    addEventListener(type, listener) { (this.listeners[type] = this.listeners[type] || []).push(listener); }
+    dispatchEvent(event) { (this.listeners[event.type] || []).forEach(listener => listener({ target: this })); }
+    click() { this.dispatchEvent({ type: 'click' }); }
+    appendChild(child) {
+        if (child.tag === '#fragment') {
+            child.children.slice().forEach(grandchild => this.appendChild(grandchild));
+            child.children = [];
+            return child;
+        }
+        if (child.parent) child.parent.children.splice(child.parent.children.indexOf(child), 1);
+        this.children.push(child);
+        child.parent = this;
+        return child;
+    }
+    replaceChildren(...nodes) {
+        this.children.forEach(child => { child.parent = null; });
+        this.children = [];
+        nodes.forEach(node => this.appendChild(node));
+    }
+    after(node) {
+        const siblings = this.parent.children;
+        siblings.splice(siblings.indexOf(this) + 1, 0, node);
+        node.parent = this.parent;
+    }
+    cloneNode(deep) {
+        const clone = new Element(this.tag, Object.assign({}, this.attrs));
+        clone.className = this.className;
+        clone.textContent = this.textContent;
+        if (deep) this.children.forEach(child => clone.appendChild(child.cloneNode(true)));
+        return clone;
+    }
+    set innerHTML(html) {
+        this.replaceChildren();
+        parse(html, this);
+    }
+    insertAdjacentHTML(position, html) { parse(html, this); }
+    closest(selector) {
+        for (let node = this; node; node = node.parent) {
+            if (matches(node, selector)) return node;
+        }
+        return null;
+    }
+    querySelectorAll(selector) {
+        const found = [];
+        const walk = node => node.children.forEach(child => {
+            if (matches(child, selector)) found.push(child);
+            walk(child);
+        });
+        walk(this);
+        return found;
+    }
+    querySelector(selector) { return this.querySelectorAll(selector)[0] || null; }
+    // 与浏览器一致，返回随文档变化的实时集合
+    getElementsByClassName(name) {
+        const root = this;
+        const current = () => root.querySelectorAll('.' + name);
+        return new Proxy({}, {
+            get(target, key) {
+                const list = current();
+                if (key === 'length') return list.length;
+                if (key === Symbol.iterator) return list[Symbol.iterator].bind(list);
+                if (typeof key === 'string' && /^\d+$/.test(key)) return list[Number(key)];
+                return list[key];
+            },
+        });
+    }
+}
+
+// 只支持页面脚本用到的简单选择器：.类名、#编号、标签名
+function matches(node, selector) {
+    if (selector.startsWith('.')) return node.classList.contains(selector.slice(1));
+    if (selector.startsWith('#')) return node.attrs.id === selector.slice(1);
+    return node.tag === selector;
+}
+
+const VOID_TAGS = new Set(['meta', 'input', 'img', 'link', 'br', 'hr']);
+
+function parse(html, root) {
+    const stack = [root];
+    const tagPattern = /<(\/?)([\w-]+)([^>]*)>/g;
+    let match;
+    while ((match = tagPattern.exec(html))) {
+        const [, closing, tag, rest] = match;
+        if (closing) {
+            if (!VOID_TAGS.has(tag)) stack.pop();
+            continue;
+        }
+        const attrs = {};
+        rest.replace(/([\w-]+)="([^"]*)"/g, (_, name, value) => { attrs[name] = value; });
+        const element = new Element(tag, attrs);
+        stack[stack.length - 1].appendChild(element);
+        if (tag === 'script' || tag === 'style') {
+            const end = html.indexOf(`</${tag}>`, tagPattern.lastIndex);
+            element.textContent = html.slice(tagPattern.lastIndex, end);
+            tagPattern.lastIndex = end + tag.length + 3;
+            continue;
+        }
+        if (!VOID_TAGS.has(tag) && !rest.endsWith('/')) stack.push(element);
+    }
+}
+
+const root = new Element('#document');
+parse(fs.readFileSync(process.argv[2], 'utf8'), root);
+
+global.window = global;
+global.document = {
+    documentElement: root.querySelector('html') || root,
+    body: root.querySelector('body') || root,
+    head: root.querySelector('head') || root,
+    activeElement: null,
+    getElementById: id => root.querySelector('#' + id),
+    querySelectorAll: selector => root.querySelectorAll(selector),
+    querySelector: selector => root.querySelector(selector),
+    getElementsByClassName: name => root.getElementsByClassName(name),
+    createElement: tag => new Element(tag),
+    createDocumentFragment: () => new Element('#fragment'),
+    addEventListener() {},
+};
+global.addEventListener = () => {};
+global.localStorage = { getItem: () => null, setItem() {} };
+global.Event = class { constructor(type) { this.type = type; } };
+
+const scripts = root.querySelectorAll('script').filter(script => !script.attrs.type && !script.attrs.src);
+(0, eval)(scripts.map(script => script.textContent).join('\n'));
+
+const searchInput = document.getElementById('searchInput');
+const container = document.getElementById('bookmarksContainer');
+for (const query of process.argv.slice(3)) {
+    searchInput.value = query;
+    searchInput.dispatchEvent(new Event('input'));
+    const ranked = document.querySelector('.ranked-results');
+    const grid = ranked && ranked.querySelector('.bookmarks-grid');
+    console.log(JSON.stringify({
+        query,
+        ranked: Boolean(ranked) && ranked.style.display === 'block' && container.style.display === 'none',
+        names: grid ? grid.children.map(card => card.getAttribute('data-name')) : [],
+        cards: container.querySelectorAll('.bookmark-card').length,
+    }));
+}
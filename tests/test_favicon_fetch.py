@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""连接池（http_pool）和图标抓取（favicon_fetch）的测试，请求发往本机的http.server"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from favicon_bundle import icon_cache_file
+from favicon_fetch import fetch_icon, read_meta
+from http_pool import HttpClient
+
+ICON = b'\x89PNG\r\n\x1a\n' + b'\x00' * 24
+ETAG = '"icon-v1"'
+
+
+class IconHandler(BaseHTTPRequestHandler):
+    """
+    /icon.png: 带ETag的图标，If-None-Match相同时返回304
+    /old.ico: 301重定向到/icon.png
+    /drop: 正常响应（不声明关闭连接），随后服务器关闭该连接
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.path == '/icon.png':
+            if self.headers.get('If-None-Match') == ETAG:
+                self.send_response(304)
+                self.send_header('ETag', ETAG)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_body(ICON, 'image/png')
+        elif self.path == '/old.ico':
+            self.send_response(301)
+            self.send_header('Location', '/icon.png')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif self.path == '/drop':
+            self.send_body(b'ok', 'text/plain')
+            self.close_connection = True
+        else:
+            self.send_body(b'<html>not found</html>', 'text/html', status=404)
+
+    def send_body(self, body, content_type, status=200):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if status == 200:
+            self.send_header('ETag', ETAG)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), IconHandler)
+    httpd.daemon_threads = True
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def url(server, path):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def test_etag_revalidation(server, tmp_path):
+    icon_url = url(server, '/icon.png')
+    with HttpClient() as client:
+        assert fetch_icon(client, str(tmp_path), icon_url, now=1000) == 'fetched'
+        with open(icon_cache_file(str(tmp_path), icon_url), 'rb') as f:
+            assert f.read() == ICON
+        assert read_meta(icon_cache_file(str(tmp_path), icon_url) + '.json')['etag'] == ETAG
+
+        # 新鲜期内不发请求
+        assert fetch_icon(client, str(tmp_path), icon_url, ttl=60, now=1030) == 'fresh'
+        assert len(server.requests) == 1
+
+        # 过期后以条件请求重新验证
+        assert fetch_icon(client, str(tmp_path), icon_url, ttl=60, now=1100) == 'not_modified'
+        assert server.requests[-1] == ('/icon.png', ETAG)
+        assert read_meta(icon_cache_file(str(tmp_path), icon_url) + '.json')['checked_at'] == 1100
+
+        # 两次请求复用同一个连接
+        assert client.connections_opened == 1
+
+
+def test_follows_redirect(server, tmp_path):
+    with HttpClient() as client:
+        response = client.request('GET', url(server, '/old.ico'))
+        assert response.status == 200
+        assert response.body == ICON
+        assert response.url == url(server, '/icon.png')
+
+        assert fetch_icon(client, str(tmp_path), url(server, '/old.ico'), now=1000) == 'fetched'
+    assert [path for path, _ in server.requests] == ['/old.ico', '/icon.png'] * 2
+
+
+def test_non_image_fails(server, tmp_path):
+    with HttpClient() as client:
+        assert fetch_icon(client, str(tmp_path), url(server, '/missing.ico'), now=1000) == 'failed'
+    meta = read_meta(icon_cache_file(str(tmp_path), url(server, '/missing.ico')) + '.json')
+    assert meta['ok'] is False
+    assert meta['error'] == 'HTTP 404'
+
+
+def test_retries_connection_closed_by_server(server):
+    with HttpClient() as client:
+        # 服务器在响应后关闭了连接，连接池中留下的是已失效的连接
+        assert client.request('GET', url(server, '/drop')).body == b'ok'
+        assert client.connections_opened == 1
+
+        response = client.request('GET', url(server, '/icon.png'))
+        assert response.status == 200
+        assert response.body == ICON
+        assert client.connections_opened == 2
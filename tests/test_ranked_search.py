@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""模糊搜索（--fuzzy-search）页面脚本的测试：在node中以最小DOM替身（dom_stub.js）运行生成的页面"""
+
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from generate_nav import generate_html
+
+DOM_STUB = Path(__file__).with_name('dom_stub.js')
+
+BOOKMARKS = [
+    {'category': '开发', 'subcategories': [
+        {'name': '代码托管', 'bookmarks': [
+            {'name': 'GitHub', 'url': 'https://github.com', 'tags': ['代码', '开源'], 'description': '全球最大的代码托管平台'},
+            {'name': 'GitLab', 'url': 'https://gitlab.com', 'tags': ['代码'], 'description': '自托管的Git仓库'},
+        ]},
+        {'name': '文档', 'bookmarks': [
+            {'name': 'MDN', 'url': 'https://developer.mozilla.org', 'tags': ['教程'], 'description': 'Web开发文档'},
+        ]},
+    ]},
+]
+
+pytestmark = pytest.mark.skipif(shutil.which('node') is None, reason='需要node')
+
+
+def run_queries(page, *queries):
+    """在页面中依次输入查询，返回每个查询的结果（见dom_stub.js）"""
+    result = subprocess.run(['node', str(DOM_STUB), str(page), *queries],
+                            capture_output=True, text=True, check=True)
+    return [json.loads(line) for line in result.stdout.splitlines()]
+
+
+@pytest.fixture
+def fuzzy_page(tmp_path):
+    page = tmp_path / 'index.html'
+    generate_html(BOOKMARKS, str(page), fuzzy_search=True)
+    return page
+
+
+def test_consecutive_queries_stay_ranked(fuzzy_page):
+    # 相关度结果区中的卡片副本不能计入卡片数，否则第一次搜索后就退回逐个扫描
+    results = run_queries(fuzzy_page, 'git', 'hub', 'gthub')
+    assert [result['ranked'] for result in results] == [True, True, True]
+    assert sorted(results[0]['names']) == ['github', 'gitlab']
+    assert results[1]['names'] == ['github']
+    assert results[2]['names'] == ['github']
+    assert all(result['cards'] == 3 for result in results)
+
+
+def test_ranked_results_follow_relevance(fuzzy_page):
+    # 名称命中的权重高于简介命中
+    results = run_queries(fuzzy_page, '代码', '文档')
+    assert all(result['ranked'] for result in results)
+    assert results[0]['names'][:2] == ['github', 'gitlab']
+    assert results[1]['names'] == ['mdn']
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+监视模式
+监视书签YAML文件（或目录），内容变化后在内存中增量重新生成页面，
+并由内置的本地服务器通知已打开的页面自动刷新
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import yaml
+
+from assets import remove_stale
+from generate_nav import (SHARD_DIR, WRITE_BUFFER_SIZE, FragmentCache, collect_stats, content_hash,
+                          load_page_template, render_page, shard_prefix, write_data_shard, write_shards,
+                          yaml_files)
+from models import Category, Subcategory
+from tag_index import build_tag_index, dump_tag_index
+from yaml_cache import parse_categories, parse_yaml
+
+# 轮询文件状态的间隔（秒）
+POLL_INTERVAL = 0.02
+
+# 检测到变化后，文件状态保持这么久不再变化才开始重新生成，避免编辑器分多次写入时重复构建
+DEBOUNCE = 0.03
+
+# 页面订阅刷新通知的地址（Server-Sent Events）
+LIVE_RELOAD_PATH = '/__livereload'
+
+# 服务器在返回的页面中注入的刷新脚本（输出文件本身不包含）
+LIVE_RELOAD_SNIPPET = (
+    f"<script>new EventSource('{LIVE_RELOAD_PATH}')"
+    ".addEventListener('reload', () => location.reload());</script>\n"
+).encode('utf-8')
+
+# 顶层序列条目的开头（第0列的"- "），以及使内容无法按条目切分的文档标记和指令
+_TOP_LEVEL_RE = re.compile(rb'\n(?:(-[ \r\n])|---|\.\.\.|%)')
+
+# 二级分类序列所在的键
+_SUBCATEGORIES_RE = re.compile(rb'^( *)subcategories: *(?:#.*)?$', re.M)
+
+
+def split_items(content):
+    """
+    把顶层为序列的YAML内容按条目切分，每个一级分类一块
+
+    条目以第0列的"- "开头，之前只能有空行和注释；无法按条目切分
+    （如包含多文档标记或指令）时返回None。
+    """
+    starts = []
+    # 以换行开头的模式可以快速扫描，在内容前补一个换行以匹配第一行（位置随之减一）
+    for match in _TOP_LEVEL_RE.finditer(b'\n' + content):
+        if match.group(1) is None:
+            return None
+        starts.append(match.start(1) - 1)
+    if not starts:
+        return None if content.strip() else []
+    for line in content[:starts[0]].splitlines():
+        if line.strip() and not line.lstrip().startswith(b'#'):
+            return None
+    starts[0] = 0
+    return [content[start:end] for start, end in zip(starts, starts[1:] + [len(content)])]
+
+
+def split_category(chunk):
+    """
+    把一级分类条目切分为头部（subcategories键及之前的部分）和各二级分类条目
+
+    subcategories必须是条目中的最后一个键，其值为块序列；结构不符合时返回None。
+    """
+    match = _SUBCATEGORIES_RE.search(chunk)
+    if match is None:
+        return None
+    # 键必须与条目首行（"- category: ..."）中的键对齐，避免匹配到多行文本中的内容
+    key_indent = len(match.group(1))
+    if key_indent != len(chunk) - len(chunk[1:].lstrip(b' ')):
+        return None
+    header = chunk[:match.end()]
+
+    starts = []
+    item_indent = None
+    pos = match.end() + 1
+    while pos < len(chunk):
+        end = chunk.find(b'\n', pos)
+        end = len(chunk) if end < 0 else end + 1
+        line = chunk[pos:end]
+        stripped = line.lstrip(b' ')
+        if stripped.strip() and not stripped.startswith(b'#'):
+            indent = len(line) - len(stripped)
+            if item_indent is None:
+                if indent < key_indent or not stripped.startswith(b'- '):
+                    return None
+                item_indent = indent
+            if indent < item_indent:
+                return None
+            if indent == item_indent:
+                if not stripped.startswith(b'- '):
+                    return None
+                starts.append(pos)
+        pos = end
+
+    if not starts:
+        return None
+    starts[0] = match.end()
+    return header, [chunk[start:end] for start, end in zip(starts, starts[1:] + [len(chunk)])]
+
+
+class IncrementalLoader:
+    """
+    增量加载书签数据
+
+    每个文件按一级分类条目切分，分类条目再按二级分类条目切分，以条目文本的哈希为键缓存解析结果，
+    文件变化时只重新解析改动过的二级分类；一级分类条目的哈希同时作为其页面片段的缓存键，
+    无需再对解析结果计算内容哈希。未变化的文件（大小和修改时间相同）直接复用上次的结果。
+    """
+
+    def __init__(self):
+        self.items = {}
+        self.categories = {}
+        self.files = {}
+        self.parsed = 0
+
+    def _parse(self, chunk, live, from_dict=None):
+        """解析一个条目块（结果为序列），命中缓存时跳过；提供from_dict时缓存转换后的模型"""
+        digest = hashlib.blake2b(chunk, digest_size=16).digest()
+        live.add(digest)
+        items = self.items.get(digest)
+        if items is None:
+            items = parse_yaml(chunk) or []
+            if not isinstance(items, list):
+                raise ValueError('条目不是序列元素')
+            if from_dict is not None:
+                items = [from_dict(item) for item in items]
+            self.items[digest] = items
+            self.parsed += 1
+        return items
+
+    def _parse_category(self, chunk, live):
+        """
+        解析一级分类条目：未变化时直接复用，变化时只重新解析其中改动过的二级分类
+
+        Returns:
+            tuple: (条目哈希, 解析结果)
+        """
+        # 以条目文本本身为键查找，未变化的条目无需计算哈希
+        cached = self.categories.get(chunk)
+        if cached is not None:
+            live.add(chunk)
+            live.update(cached[2])
+            return cached[0], cached[1]
+
+        children = set()
+        parts = split_category(chunk)
+        if parts is not None:
+            header, subchunks = parts
+            categories = self._parse(header, children)
+            if len(categories) != 1 or not isinstance(categories[0], dict) \
+                    or categories[0].get('subcategories') is not None:
+                parts = None
+        if parts is None:
+            items = self._parse(chunk, children, Category.from_dict)
+        else:
+            subcategories = []
+            for subchunk in subchunks:
+                subcategories.extend(self._parse(subchunk, children, Subcategory.from_dict))
+            items = [Category.from_dict(dict(categories[0], subcategories=subcategories))]
+
+        digest = hashlib.blake2b(chunk, digest_size=16).hexdigest()
+        self.categories[chunk] = (digest, items, children)
+        live.add(chunk)
+        live.update(children)
+        return digest, items
+
+    def _load_file(self, path, live):
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        cached = self.files.get(path)
+        if cached is not None and cached[0] == signature:
+            live.update(cached[3])
+            return cached[1], cached[2]
+
+        with open(path, 'rb') as f:
+            content = f.read()
+
+        file_live = set()
+        chunks = split_items(content)
+        data, keys = [], []
+        if chunks is not None:
+            try:
+                for chunk in chunks:
+                    digest, items = self._parse_category(chunk, file_live)
+                    data.extend(items)
+                    keys.extend(f"{digest}:{i}" for i in range(len(items)))
+            except (yaml.YAMLError, ValueError):
+                # 条目之间有引用（锚点和别名）等无法单独解析的情况，整体解析
+                chunks = None
+
+        if chunks is None:
+            data = parse_categories(content)
+            keys = [content_hash(category) for category in data]
+            self.parsed += 1
+
+        self.files[path] = (signature, data, keys, file_live)
+        live.update(file_live)
+        return data, keys
+
+    def load(self, source):
+        """
+        加载书签来源（文件或目录）
+
+        Returns:
+            tuple: (书签数据, 各一级分类的缓存键)
+        """
+        self.parsed = 0
+        live = set()
+        paths = yaml_files(source)
+        bookmarks_data, keys = [], []
+        for path in paths:
+            data, file_keys = self._load_file(path, live)
+            bookmarks_data.extend(data)
+            keys.extend(file_keys)
+
+        # 淘汰已不存在的文件和条目
+        self.files = {path: self.files[path] for path in paths}
+        self.items = {digest: items for digest, items in self.items.items() if digest in live}
+        self.categories = {chunk: entry for chunk, entry in self.categories.items() if chunk in live}
+        return bookmarks_data, keys
+
+
+class WatchBuilder:
+    """
+    在内存中保留解析结果和渲染片段，每次只重新解析和渲染变化的部分
+
+    分片模式下只写入内容变化的分类分片和很小的页面外壳，写入量与书签总数无关。
+    自定义模板文件每次构建时检查，修改后重新编译。
+    标签索引只需遍历一次书签，每次构建时重新生成（tag_facets为False时不生成标签栏）。
+    """
+
+    def __init__(self, source, output_file, sharded=False, template_file=None, tag_facets=True):
+        self.source = source
+        self.output_file = output_file
+        self.sharded = sharded
+        self.template_file = template_file
+        self.tag_facets = tag_facets
+        self.loader = IncrementalLoader()
+        self.cache = FragmentCache()
+        self.page = None
+        self.shards_written = 0
+
+    def build(self):
+        """
+        重新生成页面，内容未变化时不写入
+
+        Returns:
+            bool: 是否写入了输出文件
+        """
+        template = load_page_template(self.template_file)
+        bookmarks_data, section_keys = self.loader.load(self.source)
+        stats = collect_stats(bookmarks_data)
+        self.cache.next_build()
+        tag_index = None
+        if self.tag_facets and 'tag_bar' in template.slots:
+            tag_index = build_tag_index(bookmarks_data)
+
+        if self.sharded:
+            shard_dir = os.path.join(os.path.dirname(os.path.abspath(self.output_file)), SHARD_DIR)
+            prefix = shard_prefix(self.output_file)
+            shard_srcs, self.shards_written = write_shards(bookmarks_data, shard_dir, section_keys, prefix=prefix)
+            current = {os.path.basename(src) for src in shard_srcs}
+            tag_index_src = None
+            if tag_index is not None and tag_index['tags']:
+                tag_index_src, new = write_data_shard(
+                    shard_dir, 'tags', f"loadTagIndex({dump_tag_index(tag_index)});\n", prefix)
+                current.add(os.path.basename(tag_index_src))
+                self.shards_written += new
+            remove_stale(shard_dir, current, '.js', prefix=prefix)
+            page = ''.join(render_page(bookmarks_data, stats, shard_srcs=shard_srcs, template=template,
+                                       tag_index=tag_index, tag_index_src=tag_index_src))
+            changed = self.shards_written > 0
+        else:
+            page = ''.join(render_page(bookmarks_data, stats, self.cache, section_keys, template=template,
+                                       tag_index=tag_index))
+            changed = False
+
+        if page != self.page:
+            # 先写临时文件再替换，服务器不会读到写了一半的页面
+            tmp_path = f"{self.output_file}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+                f.write(page)
+            os.replace(tmp_path, self.output_file)
+            self.page = page
+            changed = True
+        return changed
+
+
+def snapshot(source, extra_files=()):
+    """返回书签来源中各文件（及extra_files中的其他文件，如模板）的状态，用于检测变化"""
+    state = {}
+    for path in [*yaml_files(source), *extra_files]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        state[path] = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+    return state
+
+
+class LiveReloadServer(ThreadingHTTPServer):
+    """提供输出目录的静态文件，并向订阅的页面推送刷新通知"""
+
+    daemon_threads = True
+
+    def __init__(self, address, directory):
+        super().__init__(address, partial(LiveReloadHandler, directory=directory))
+        self.version = 0
+        self.changed = threading.Condition()
+
+    def notify(self):
+        """通知所有打开的页面刷新"""
+        with self.changed:
+            self.version += 1
+            self.changed.notify_all()
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    """在HTML页面中注入刷新脚本，并在LIVE_RELOAD_PATH上保持事件流连接"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == LIVE_RELOAD_PATH:
+            self.send_events()
+            return
+
+        file_path = self.translate_path(path)
+        if os.path.isdir(file_path) and path.endswith('/'):
+            file_path = os.path.join(file_path, 'index.html')
+        if file_path.endswith('.html') and os.path.isfile(file_path):
+            self.send_page(file_path)
+            return
+        super().do_GET()
+
+    def send_page(self, file_path):
+        with open(file_path, 'rb') as f:
+            content = f.read()
+        end = content.rfind(b'</body>')
+        if end < 0:
+            end = len(content)
+        content = content[:end] + LIVE_RELOAD_SNIPPET + content[end:]
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(content)
+
+    def send_events(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+
+        server = self.server
+        with server.changed:
+            version = server.version
+        try:
+            while True:
+                with server.changed:
+                    server.changed.wait_for(lambda: server.version != version, timeout=15)
+                    current = server.version
+                if current != version:
+                    version = current
+                    self.wfile.write(b'event: reload\ndata: \n\n')
+                else:
+                    # 定期发送注释行保持连接，并及时发现已关闭的页面
+                    self.wfile.write(b': keep-alive\n\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def rebuild(builder):
+    """重新生成并报告耗时，YAML有误（包括语法正确但结构不对）时保留上一次的页面，继续监视"""
+    start = time.perf_counter()
+    try:
+        written = builder.build()
+    except (yaml.YAMLError, OSError, ValueError) as e:
+        print(f"❌ 重新生成失败，保留上一次的页面: {e}")
+        return False
+    except Exception as e:
+        # 编辑到一半的文件结构不对（如该是映射的地方写成了列表）时，渲染中可能出现各种异常
+        print(f"❌ 重新生成失败，保留上一次的页面: {type(e).__name__}: {e}")
+        return False
+    elapsed = (time.perf_counter() - start) * 1000
+    if written and builder.sharded:
+        print(f"🔁 已重新生成 {builder.output_file}（{elapsed:.0f} ms，重新解析 {builder.loader.parsed} 块，"
+              f"写入 {builder.shards_written} 个分片）")
+    elif written:
+        print(f"🔁 已重新生成 {builder.output_file}（{elapsed:.0f} ms，重新解析 {builder.loader.parsed} 块，"
+              f"重新渲染 {builder.cache.rendered} 个分类，复用 {builder.cache.reused} 个）")
+    else:
+        print(f"⏭️  内容未变化（{elapsed:.0f} ms）")
+    return written
+
+
+def watch(source, output_file='index.html', port=8000, host='127.0.0.1', serve=True, sharded=False,
+          template_file=None, tag_facets=True):
+    """
+    监视书签来源并持续重新生成页面，按Ctrl+C退出
+
+    Args:
+        source (str): YAML文件或包含YAML文件的目录
+        output_file (str): 输出的HTML文件
+        port (int): 本地服务器端口
+        host (str): 本地服务器监听地址
+        serve (bool): 是否启动带自动刷新的本地服务器
+        sharded (bool): 以分片模式输出，书签数万时仍能快速重新生成
+        template_file (str): 自定义页面模板文件，修改后同样自动重新生成
+        tag_facets (bool): 输出标签栏并嵌入标签索引（见tag_index）
+    """
+    builder = WatchBuilder(source, output_file, sharded, template_file, tag_facets)
+    watched = [template_file] if template_file else []
+    rebuild(builder)
+
+    server = None
+    if serve:
+        directory = os.path.dirname(os.path.abspath(output_file))
+        server = LiveReloadServer((host, port), directory)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"🌐 本地预览: http://{host}:{server.server_address[1]}/{os.path.basename(output_file)}")
+    print(f"👀 正在监视 {source}，按 Ctrl+C 退出")
+
+    last = snapshot(source, watched)
+    try:
+        while True:
+            time.sleep(POLL_INTERVAL)
+            current = snapshot(source, watched)
+            if current == last:
+                continue
+            # 等待文件状态稳定下来再构建
+            while True:
+                time.sleep(DEBOUNCE)
+                settled = snapshot(source, watched)
+                if settled == current:
+                    break
+                current = settled
+            last = current
+            if rebuild(builder) and server is not None:
+                server.notify()
+    except KeyboardInterrupt:
+        print("\n👋 已停止监视")
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+YAML快速加载与解析缓存
+优先使用libyaml的CSafeLoader解析，并把解析结果以pickle格式缓存到磁盘，
+文件未变化时直接读取缓存，不再重复解析
+"""
+
+import hashlib
+import os
+import pickle
+
+import yaml
+
+from models import Bookmark, Category
+
+# 有libyaml时使用C实现的解析器，否则回退到纯Python实现
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# 缓存目录（位于YAML文件所在目录下）
+CACHE_DIR = '.bookmark_cache'
+
+# 缓存格式版本，格式变化时递增以使旧缓存失效
+CACHE_VERSION = 1
+
+# load_yaml()和load_categories()的缓存文件后缀
+YAML_CACHE_SUFFIX = '.pickle'
+CATEGORIES_CACHE_SUFFIX = '.categories.pickle'
+
+
+def parse_yaml(stream):
+    """解析YAML文本、字节串或文件对象"""
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def cache_path(file_path, suffix='.pickle'):
+    """返回文件对应的缓存文件路径（位于同目录的缓存目录下）"""
+    file_path = os.path.abspath(file_path)
+    directory, filename = os.path.split(file_path)
+    return os.path.join(directory, CACHE_DIR, f"{filename}{suffix}")
+
+
+def read_cache_meta(path):
+    """读取缓存文件头部的元数据，缓存不存在或已损坏时返回None"""
+    try:
+        with open(path, 'rb') as f:
+            meta = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    if not isinstance(meta, dict) or meta.get('version') != CACHE_VERSION:
+        return None
+    return meta
+
+
+def read_cache_data(path):
+    """读取缓存中的数据部分（跳过头部元数据）"""
+    with open(path, 'rb') as f:
+        pickle.load(f)
+        return pickle.load(f)
+
+
+def write_cache(path, meta, data):
+    """原子地写入缓存文件：先写临时文件再替换"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(meta, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        # 缓存只是加速手段，写入失败（如只读目录）时忽略
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_yaml(yaml_file, use_cache=True):
+    """
+    加载YAML文件，命中缓存时跳过解析
+
+    缓存以文件大小、修改时间和内容SHA-256为键：大小和修改时间都未变化时直接读取缓存；
+    否则计算内容哈希，内容未变（如仅被touch）时仍复用缓存并刷新元数据；
+    内容确实变化时才重新解析并更新缓存。
+
+    Args:
+        yaml_file (str): YAML文件路径
+        use_cache (bool): 是否使用磁盘缓存
+
+    Raises:
+        FileNotFoundError: 文件不存在
+        yaml.YAMLError: YAML解析失败
+    """
+    return _load_cached(yaml_file, use_cache, parse_yaml, YAML_CACHE_SUFFIX)
+
+
+def load_categories(yaml_file, use_cache=True):
+    """
+    加载书签YAML文件为models.Category列表，缓存方式同load_yaml()（缓存文件单独保存）
+
+    以解析事件直接构建模型（见parse_categories），不经过完整的节点图。
+
+    Raises:
+        FileNotFoundError: 文件不存在
+        yaml.YAMLError: YAML解析失败
+        ValueError: 书签数据的结构不正确
+    """
+    return _load_cached(yaml_file, use_cache, parse_categories, CATEGORIES_CACHE_SUFFIX)
+
+
+def _load_cached(yaml_file, use_cache, parse, suffix):
+    """按load_yaml()所述的方式读取缓存，未命中时以parse解析文件内容并写入缓存"""
+    if not use_cache:
+        with open(yaml_file, 'rb') as f:
+            return parse(f)
+
+    stat = os.stat(yaml_file)
+    path = cache_path(yaml_file, suffix)
+    meta = read_cache_meta(path)
+
+    if meta and meta['size'] == stat.st_size and meta['mtime_ns'] == stat.st_mtime_ns:
+        try:
+            return read_cache_data(path)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, TypeError, ValueError):
+            meta = None
+
+    with open(yaml_file, 'rb') as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()
+
+    if meta and meta['sha256'] == digest:
+        try:
+            data = read_cache_data(path)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, TypeError, ValueError):
+            data = None
+        if data is not None:
+            meta.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            write_cache(path, meta, data)
+            return data
+
+    data = parse(content)
+    meta = {
+        'version': CACHE_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': digest,
+    }
+    write_cache(path, meta, data)
+    return data
+
+
+def cache_is_fresh(yaml_file, suffix=YAML_CACHE_SUFFIX):
+    """缓存的大小和修改时间与文件一致时返回True（load_yaml可直接读取缓存，load_categories的缓存以其后缀查询）"""
+    meta = read_cache_meta(cache_path(yaml_file, suffix))
+    if meta is None:
+        return False
+    stat = os.stat(yaml_file)
+    return meta['size'] == stat.st_size and meta['mtime_ns'] == stat.st_mtime_ns
+
+
+# 合并键"<<"的标签；构建时以_MERGE表示，与字符串"<<"区分
+_MERGE_TAG = 'tag:yaml.org,2002:merge'
+_STR_TAG = 'tag:yaml.org,2002:str'
+_MERGE = object()
+
+
+class _EventBuilder:
+    """
+    由解析事件构建Python对象
+
+    只用到get_event/check_event，纯Python的SafeLoader和libyaml的CSafeLoader都支持；
+    标量的类型按与safe_load相同的规则解析和构造，但不保留节点图，内存占用只与当前对象有关。
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.anchors = {}
+        # 可能解析为非字符串类型的普通标量的首字符（空字符串对应null）
+        self.implicit_chars = set(loader.yaml_implicit_resolvers)
+
+    def build(self):
+        """读取下一个完整的节点并返回构造出的对象"""
+        loader = self.loader
+        event = loader.get_event()
+        if isinstance(event, yaml.AliasEvent):
+            return self.anchors[event.anchor]
+
+        if isinstance(event, yaml.ScalarEvent):
+            tag = event.tag
+            value = event.value
+            if tag is None or tag == '!':
+                # 引号字符串，或首字符不可能是数字、布尔值等其他类型时直接作为字符串，省去逐个正则匹配
+                if not event.implicit[0] or value[:1] not in self.implicit_chars:
+                    tag = _STR_TAG
+                else:
+                    tag = loader.resolve(yaml.ScalarNode, value, event.implicit)
+            if tag == _MERGE_TAG:
+                value = _MERGE
+            elif tag != _STR_TAG:
+                node = yaml.ScalarNode(tag, value, event.start_mark, event.end_mark, event.style)
+                constructor = loader.yaml_constructors.get(tag, loader.yaml_constructors[None])
+                value = constructor(loader, node)
+        elif isinstance(event, yaml.SequenceStartEvent):
+            value = []
+            while not loader.check_event(yaml.SequenceEndEvent):
+                value.append(self.build())
+            loader.get_event()
+        else:
+            value = {}
+            while not loader.check_event(yaml.MappingEndEvent):
+                key = self.build()
+                item = self.build()
+                if key is _MERGE and isinstance(item, dict):
+                    # 合并键：已有的键优先
+                    for merge_key, merge_value in item.items():
+                        value.setdefault(merge_key, merge_value)
+                else:
+                    value[key] = item
+            loader.get_event()
+
+        if event.anchor is not None:
+            self.anchors[event.anchor] = value
+        return value
+
+
+def _start_document(loader, builder):
+    """
+    读到文档顶层序列的开头，准备逐项读取
+
+    Returns:
+        bool: 文档为空（或顶层为null）时返回False
+
+    Raises:
+        ValueError: 顶层不是序列
+    """
+    loader.get_event()
+    if not loader.check_event(yaml.DocumentStartEvent):
+        return False
+    loader.get_event()
+    if not loader.check_event(yaml.SequenceStartEvent):
+        if builder.build() is None:
+            return False
+        raise ValueError("书签数据格式错误：顶层应为分类列表")
+    loader.get_event()
+    return True
+
+
+def parse_categories(stream):
+    """
+    解析书签YAML文本、字节串或文件对象，返回models.Category列表
+
+    以解析事件逐个构建一级分类后立即转换为模型，内存中只保留模型和当前分类的字典；
+    标量的解析规则与parse_yaml()相同。
+
+    Raises:
+        yaml.YAMLError: YAML解析失败
+        ValueError: 书签数据的结构不正确
+    """
+    loader = SafeLoader(stream)
+    try:
+        builder = _EventBuilder(loader)
+        if not _start_document(loader, builder):
+            return []
+        from_dict = Category.from_dict
+        categories = []
+        while not loader.check_event(yaml.SequenceEndEvent):
+            categories.append(from_dict(builder.build()))
+        return categories
+    finally:
+        loader.dispose()
+
+
+def _iter_group(builder, name_key, items_key, iter_item):
+    """
+    流式遍历一个分组映射（一级分类或二级分类），返回(分组名, 子项)
+
+    items_key下的列表逐项交给iter_item处理，不整体构建；其余键正常构建。
+    分组名出现在列表之后时，之前的子项先暂存，读到分组名后再返回。
+    """
+    loader = builder.loader
+    if not loader.check_event(yaml.MappingStartEvent):
+        raise ValueError(f"书签数据格式错误：{name_key}所在的项应为映射")
+    loader.get_event()
+
+    name = None
+    found_name = found_items = False
+    pending = []
+    while not loader.check_event(yaml.MappingEndEvent):
+        key = builder.build()
+        if key == items_key and loader.check_event(yaml.SequenceStartEvent):
+            found_items = True
+            loader.get_event()
+            while not loader.check_event(yaml.SequenceEndEvent):
+                for item in iter_item(builder):
+                    if found_name:
+                        yield name, item
+                    else:
+                        pending.append(item)
+            loader.get_event()
+        else:
+            value = builder.build()
+            if key == name_key:
+                name, found_name = value, True
+                for item in pending:
+                    yield name, item
+                pending = []
+    loader.get_event()
+
+    if not found_name:
+        raise KeyError(name_key)
+    if not found_items:
+        raise KeyError(items_key)
+
+
+def _iter_subcategory(builder):
+    """流式遍历一个二级分类，返回(二级分类名, 书签)"""
+    return _iter_group(builder, 'name', 'bookmarks', lambda builder: (Bookmark.from_dict(builder.build()),))
+
+
+def iter_yaml_bookmarks(yaml_file):
+    """
+    以事件方式流式解析书签YAML文件，逐个返回(一级分类, 二级分类, 书签)，书签为models.Bookmark
+
+    不构建整个文档，每次只在内存中保留一个书签，适合处理超大文件；不读写解析缓存。
+
+    Raises:
+        FileNotFoundError: 文件不存在
+        yaml.YAMLError: YAML解析失败
+        KeyError: 分类缺少必要的键
+    """
+    with open(yaml_file, 'rb') as f:
+        loader = SafeLoader(f)
+        try:
+            builder = _EventBuilder(loader)
+            if not _start_document(loader, builder):
+                return
+            while not loader.check_event(yaml.SequenceEndEvent):
+                for category_name, (subcategory_name, bookmark) in _iter_group(
+                        builder, 'category', 'subcategories', _iter_subcategory):
+                    yield category_name, subcategory_name, bookmark
+        finally:
+            loader.dispose()
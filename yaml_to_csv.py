@@ -1,66 +1,133 @@
+import argparse
+import os
 import yaml
 import csv
 
-def yaml_to_csv(yaml_file_path, csv_file_path):
+from models import CSV_ADDED_FIELD, CSV_FIELDNAMES
+import profiling
+from yaml_cache import CATEGORIES_CACHE_SUFFIX, cache_is_fresh, iter_yaml_bookmarks, load_categories
+
+# 超过此大小且没有可用的解析缓存时，默认以流式方式导出
+STREAMING_THRESHOLD = 32 * 1024 * 1024
+
+def iter_entries(bookmarks_data):
+    """遍历已加载的书签数据（models.Category列表），返回(一级分类, 二级分类, 书签)"""
+    for category in bookmarks_data:
+        # 缺少的键以KeyError报告
+        category_name = category['category']
+
+        for subcategory in category['subcategories']:
+            subcategory_name = subcategory['name']
+
+            for bookmark in subcategory['bookmarks']:
+                yield category_name, subcategory_name, bookmark
+
+def bookmark_added(bookmark):
+    """返回书签的添加时间（added字段），没有时返回None"""
+    added = bookmark.extra.get('added') if bookmark.extra else None
+    return str(added) if added else None
+
+def bookmark_row(category_name, subcategory_name, bookmark, with_added=False):
+    """构建一个书签（models.Bookmark）的CSV行（按CSV_FIELDNAMES的顺序，with_added为True时另加CSV_ADDED_FIELD列）"""
+    if bookmark.name is None or bookmark.url is None:
+        raise KeyError('name' if bookmark.name is None else 'url')
+
+    # 处理标签元组，转换为逗号分隔的字符串
+    tags_str = ', '.join(bookmark.tags or ())
+
+    row = [
+        category_name,
+        subcategory_name,
+        bookmark.name,
+        bookmark.url,
+        bookmark.icon or '',
+        tags_str,
+        bookmark.description or '',
+    ]
+    if with_added:
+        row.append(bookmark_added(bookmark) or '')
+    return row
+
+def add_added_column(csv_file, temp_path):
+    """
+    给已写出的CSV（表头和各行）补上空的添加时间列，返回续写的文件
+
+    第一次遇到有添加时间的书签时调用；从书签导入的数据通常第一个书签就有，此时只需改写表头。
+    """
+    csv_file.close()
+    padded_path = temp_path + '.added'
+    with open(temp_path, newline='', encoding='utf-8-sig') as src, \
+            open(padded_path, 'w', newline='', encoding='utf-8-sig') as dst:
+        reader = csv.reader(src)
+        writer = csv.writer(dst)
+        writer.writerow(next(reader) + [CSV_ADDED_FIELD])
+        writer.writerows(row + [''] for row in reader)
+    os.replace(padded_path, temp_path)
+    return open(temp_path, 'a', newline='', encoding='utf-8-sig')
+
+def yaml_to_csv(yaml_file_path, csv_file_path, streaming=None):
     """
     将YAML书签文件转换为CSV格式
-    
+
+    流式模式以解析事件逐个读取书签，每读完一个书签立即写出一行，不构建整个文档，
+    峰值内存与文件大小无关；否则整体加载（文件未变化时直接使用解析缓存）。
+    CSV先写入同一目录下的临时文件，全部成功后才替换输出文件，出错时原有文件保持不变。
+    有书签带有添加时间（added字段）时另加CSV_ADDED_FIELD列，否则列同CSV_FIELDNAMES。
+
     Args:
         yaml_file_path (str): 输入的YAML文件路径
         csv_file_path (str): 输出的CSV文件路径
+        streaming (bool): 是否流式导出，None表示文件超过STREAMING_THRESHOLD且没有可用缓存时自动启用
     """
-    
+
+    csv_file = None
+    temp_path = None
     try:
-        # 读取YAML文件
-        with open(yaml_file_path, 'r', encoding='utf-8') as yaml_file:
-            bookmarks_data = yaml.safe_load(yaml_file)
-        
-        # 准备CSV数据
-        csv_data = []
-        
-        # 遍历所有分类和书签
-        for category in bookmarks_data:
-            category_name = category['category']
-            
-            for subcategory in category['subcategories']:
-                subcategory_name = subcategory['name']
-                
-                for bookmark in subcategory['bookmarks']:
-                    # 处理标签数组，转换为逗号分隔的字符串
-                    tags_str = ', '.join(bookmark['tags'])
-                    
-                    # 构建CSV行数据
-                    csv_row = {
-                        '一级分类': category_name,
-                        '二级分类': subcategory_name,
-                        '网站名称': bookmark['name'],
-                        '网址': bookmark['url'],
-                        '图标URL': bookmark.get('icon', ''),
-                        '标签': tags_str,
-                        '简介': bookmark.get('description', '')
-                    }
-                    
-                    csv_data.append(csv_row)
-        
-        # 写入CSV文件
-        if csv_data:
-            # 定义CSV列的顺序
-            fieldnames = ['一级分类', '二级分类', '网站名称', '网址', '图标URL', '标签', '简介']
-            
-            with open(csv_file_path, 'w', newline='', encoding='utf-8-sig') as csv_file:
-                writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-                
-                # 写入表头
-                writer.writeheader()
-                
-                # 写入数据行
-                for row in csv_data:
-                    writer.writerow(row)
-            
-            print(f"成功导出 {len(csv_data)} 条书签到 {csv_file_path}")
+        if streaming is None:
+            streaming = (os.path.getsize(yaml_file_path) >= STREAMING_THRESHOLD
+                         and not cache_is_fresh(yaml_file_path, CATEGORIES_CACHE_SUFFIX))
+
+        if streaming:
+            entries = iter_yaml_bookmarks(yaml_file_path)
+        else:
+            # 读取YAML文件（文件未变化时直接使用解析缓存）
+            with profiling.phase('load'):
+                entries = iter_entries(load_categories(yaml_file_path))
+
+        # 读到第一个书签时才创建临时文件，没有书签时不写出
+        count = 0
+        with_added = False
+        # 流式导出时解析与写入交替进行，两者都计入此阶段
+        with profiling.phase('stream_write' if streaming else 'write'):
+            for category_name, subcategory_name, bookmark in entries:
+                if csv_file is None:
+                    temp_path = csv_file_path + '.tmp'
+                    csv_file = open(temp_path, 'w', newline='', encoding='utf-8-sig')
+                    writer = csv.writer(csv_file)
+
+                    # 写入表头
+                    writer.writerow(CSV_FIELDNAMES)
+
+                if not with_added and bookmark_added(bookmark):
+                    csv_file = add_added_column(csv_file, temp_path)
+                    writer = csv.writer(csv_file)
+                    with_added = True
+
+                writer.writerow(bookmark_row(category_name, subcategory_name, bookmark, with_added))
+                count += 1
+            if csv_file is not None:
+                csv_file.close()
+                os.replace(temp_path, csv_file_path)
+                temp_path = None
+
+        profiling.count('bookmarks', count)
+        profiling.count('streaming', streaming)
+        if count:
+            profiling.count('output_bytes', os.path.getsize(csv_file_path))
+            print(f"成功导出 {count} 条书签到 {csv_file_path}")
         else:
             print("未找到书签数据")
-            
+
     except FileNotFoundError:
         print(f"错误：找不到YAML文件 {yaml_file_path}")
     except yaml.YAMLError as e:
@@ -69,15 +136,28 @@ def yaml_to_csv(yaml_file_path, csv_file_path):
         print(f"数据格式错误：缺少必要的键 {e}")
     except Exception as e:
         print(f"发生未知错误：{e}")
+    finally:
+        if csv_file is not None:
+            csv_file.close()
+        # 出错时删除写了一半的临时文件
+        if temp_path is not None:
+            os.remove(temp_path)
 
 def main():
     """主函数"""
-    # 文件路径配置
-    yaml_file = 'bookmarks.yaml'  # 输入的YAML文件
-    csv_file = 'bookmarks.csv'    # 输出的CSV文件
-    
+    parser = argparse.ArgumentParser(description='将YAML书签文件转换为CSV格式')
+    parser.add_argument('yaml_file', nargs='?', default='bookmarks.yaml', help='输入的YAML文件（默认: bookmarks.yaml）')
+    parser.add_argument('csv_file', nargs='?', default='bookmarks.csv', help='输出的CSV文件（默认: bookmarks.csv）')
+    streaming = parser.add_mutually_exclusive_group()
+    streaming.add_argument('--streaming', dest='streaming', action='store_true', default=None,
+                           help='强制流式导出（默认: 文件超过32MB且没有解析缓存时自动启用）')
+    streaming.add_argument('--no-streaming', dest='streaming', action='store_false', help='整体加载后导出')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
     # 执行转换
-    yaml_to_csv(yaml_file, csv_file)
+    with profiling.profile_from_args('yaml_to_csv', args):
+        yaml_to_csv(args.yaml_file, args.csv_file, streaming=args.streaming)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file